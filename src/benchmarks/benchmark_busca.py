@@ -0,0 +1,111 @@
+"""
+Compara a busca de produtos pelo índice (palavras e trigramas) com a varredura
+do catálogo inteiro, que era o custo de exibir todos os produtos a cada
+seleção. Também mede a montagem do índice e a atualização de um produto.
+Uso, a partir de src/:
+
+    python -m benchmarks.benchmark_busca --produtos 200000 --buscas 1000
+"""
+import argparse
+import random
+import time
+from rich.console import Console
+from rich.table import Table
+
+from mercado.indice_produtos import IndiceProdutos, normalizar_texto
+
+MARCAS = ["Nativa", "Bom Gosto", "Serrana", "Pérola", "Vale Verde", "Aurora", "Sabor Real", "Campestre"]
+ITENS = ["Café Torrado", "Açúcar Refinado", "Arroz Integral", "Feijão Carioca", "Leite Integral",
+         "Óleo de Soja", "Farinha de Trigo", "Macarrão Espaguete", "Biscoito Recheado", "Sabão em Pó",
+         "Detergente Neutro", "Molho de Tomate", "Achocolatado", "Manteiga", "Queijo Minas"]
+TAMANHOS = ["200g", "500g", "1kg", "2kg", "1L", "5L", "pacote", "caixa"]
+
+
+def gerar_nomes(produtos: int) -> dict[int, str]:
+    gerador = random.Random(42)
+    return {produto_id: f"{gerador.choice(ITENS)} {gerador.choice(MARCAS)} {gerador.choice(TAMANHOS)} {produto_id}"
+            for produto_id in range(1, produtos + 1)}
+
+
+def gerar_buscas(nomes: dict[int, str], buscas: int) -> list[str]:
+    """
+    Gera buscas como um usuário digitaria: começos de palavras, o ID ou uma palavra com erro
+    """
+    gerador = random.Random(7)
+    ids = list(nomes)
+    consultas = []
+    for _ in range(buscas):
+        produto_id = gerador.choice(ids)
+        palavras = nomes[produto_id].split()
+        sorteio = gerador.random()
+        if sorteio < 0.6:
+            consultas.append(" ".join(palavra[:4] for palavra in gerador.sample(palavras[:3], 2)))
+        elif sorteio < 0.8:
+            consultas.append(str(produto_id))
+        else:
+            palavra = palavras[0]
+            consultas.append(palavra[:-1] + "x" if len(palavra) > 3 else palavra)
+    return consultas
+
+
+def varrer(nomes: dict[int, str], texto: str, limite: int) -> list[int]:
+    """
+    Busca sem índice: confere o nome de cada produto do catálogo
+    """
+    termos = normalizar_texto(texto).split()
+    encontrados = []
+    for produto_id, nome in nomes.items():
+        nome = normalizar_texto(nome)
+        if str(produto_id) == texto or all(termo in nome for termo in termos):
+            encontrados.append(produto_id)
+            if len(encontrados) == limite:
+                break
+    return encontrados
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Busca de produtos: índice x varredura do catálogo")
+    parser.add_argument("--produtos", type=int, default=200_000, help="Produtos no catálogo")
+    parser.add_argument("--buscas", type=int, default=1000, help="Buscas medidas")
+    parser.add_argument("--limite", type=int, default=15, help="Resultados por busca")
+    args = parser.parse_args()
+
+    nomes = gerar_nomes(args.produtos)
+    consultas = gerar_buscas(nomes, args.buscas)
+
+    inicio = time.perf_counter()
+    indice = IndiceProdutos.montar(nomes.items())
+    montagem = time.perf_counter() - inicio
+
+    inicio = time.perf_counter()
+    for produto_id in range(1, 1001):
+        indice.adicionar(produto_id, nomes[produto_id] + " Promoção")
+    atualizacao = (time.perf_counter() - inicio) / 1000
+
+    latencias = []
+    for texto in consultas:
+        inicio = time.perf_counter()
+        indice.buscar(texto, args.limite)
+        latencias.append(time.perf_counter() - inicio)
+    latencias.sort()
+
+    # A varredura é lenta demais para todas as buscas: uma amostra basta
+    amostra = consultas[:max(args.buscas // 20, 1)]
+    inicio = time.perf_counter()
+    for texto in amostra:
+        varrer(nomes, texto, args.limite)
+    varredura = (time.perf_counter() - inicio) / len(amostra)
+
+    tabela = Table(title=f"{args.produtos} produtos, {args.buscas} buscas", header_style="bold magenta")
+    tabela.add_column("Medida")
+    tabela.add_column("Valor", justify="right")
+    tabela.add_row("Montagem do índice (s)", f"{montagem:.2f}")
+    tabela.add_row("Atualização de um produto (ms)", f"{atualizacao * 1000:.3f}")
+    tabela.add_row("Busca pelo índice, média (ms)", f"{sum(latencias) / len(latencias) * 1000:.2f}")
+    tabela.add_row("Busca pelo índice, p99 (ms)", f"{latencias[int(len(latencias) * 0.99) - 1] * 1000:.2f}")
+    tabela.add_row("Varredura do catálogo, média (ms)", f"{varredura * 1000:.2f}")
+    Console().print(tabela)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,121 @@
+"""
+Compara a recarga completa do catálogo do fornecedor (regravar a tabela de
+produtos e recriar todos os produtos) com a sincronização por hash das linhas,
+que aplica só os produtos novos, alterados e removidos. Uso, a partir de src/:
+
+    python -m benchmarks.benchmark_catalogo --produtos 500000 --alterados 0.01
+
+No SQLite só as linhas alteradas são gravadas; no Excel e no Parquet o arquivo
+ainda é reescrito uma vez, mas sem recriar os produtos inalterados em memória.
+"""
+import argparse
+import tempfile
+import time
+import numpy as np
+import pandas as pd
+from rich.console import Console
+from rich.table import Table
+
+from ferramentas import configuracao
+from ferramentas.banco_de_dados import BancoDeDados
+
+MOTORES = ["sqlite", "parquet", "excel"]
+
+
+def gerar_catalogo(produtos: int) -> pd.DataFrame:
+    """
+    Gera um catálogo com metade de produtos físicos e metade digitais
+    """
+    gerador = np.random.default_rng(42)
+    ids = np.arange(1, produtos + 1)
+    fisico = ids % 2 == 1
+    dimensao = np.where(fisico, gerador.uniform(1, 50, produtos).round(1), np.nan)
+    return pd.DataFrame({
+        "id": ids,
+        "nome": [f"Produto {i}" for i in ids],
+        "preco": gerador.uniform(1, 500, produtos).round(2),
+        "tipo": np.where(fisico, "fisico", "digital"),
+        "quantidade": np.where(fisico, gerador.integers(0, 1000, produtos), np.nan),
+        "altura": dimensao,
+        "largura": dimensao,
+        "profundidade": dimensao,
+        "link_download": np.where(fisico, None, [f"https://loja.exemplo/{i}" for i in ids]),
+    })
+
+
+def alterar_catalogo(catalogo: pd.DataFrame, fracao: float) -> pd.DataFrame:
+    """
+    Altera uma fração do catálogo: um terço muda de preço, um terço sai do
+    catálogo e um terço de produtos novos entra
+    """
+    gerador = np.random.default_rng(7)
+    quantidade = max(int(len(catalogo) * fracao) // 3, 1)
+    escolhidos = gerador.choice(len(catalogo), quantidade * 2, replace=False)
+    novo = catalogo.copy()
+    novo.loc[escolhidos[:quantidade], "preco"] += 1
+    novo = novo.drop(index=escolhidos[quantidade:])
+    entrantes = catalogo.iloc[:quantidade].copy()
+    entrantes["id"] = np.arange(len(catalogo) + 1, len(catalogo) + quantidade + 1)
+    return pd.concat([novo, entrantes], ignore_index=True)
+
+
+def medir(motor: str, catalogo: pd.DataFrame, novo: pd.DataFrame) -> tuple[float, float, dict]:
+    """
+    Mede as duas formas de aplicar o catálogo novo, partindo do mesmo catálogo antigo
+
+    Returns:
+        Tupla (segundos da recarga completa, segundos da sincronização, resumo da sincronização)
+    """
+    from mercado.mercado import Mercado
+    with tempfile.TemporaryDirectory() as diretorio:
+        configuracao.DIRETORIO_DADOS = diretorio
+        configuracao.MOTOR_ARMAZENAMENTO = motor
+        banco = BancoDeDados()
+
+        banco.salvar_tabela(catalogo, "produtos")
+        mercado = Mercado()
+        inicio = time.perf_counter()
+        banco.salvar_tabela(novo, "produtos")
+        mercado._produtos = mercado.carregar_produtos()
+        recarga = time.perf_counter() - inicio
+        mercado.encerrar()
+
+        banco.salvar_tabela(catalogo, "produtos")
+        mercado = Mercado()
+        inicio = time.perf_counter()
+        resumo, _ = mercado.sincronizar_catalogo(novo, remover_ausentes=True)
+        sincronizacao = time.perf_counter() - inicio
+        mercado.encerrar()
+    return recarga, sincronizacao, resumo
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Recarga completa x sincronização do catálogo")
+    parser.add_argument("--produtos", type=int, default=100_000, help="Produtos no catálogo")
+    parser.add_argument("--alterados", type=float, default=0.01, help="Fração do catálogo alterada")
+    parser.add_argument("--motores", nargs="*", default=MOTORES, help="Motores a comparar")
+    args = parser.parse_args()
+
+    catalogo = gerar_catalogo(args.produtos)
+    novo = alterar_catalogo(catalogo, args.alterados)
+
+    console = Console()
+    tabela_resultados = Table(title=f"{args.produtos} produtos, {args.alterados:.1%} alterados",
+                              header_style="bold magenta")
+    tabela_resultados.add_column("Motor")
+    tabela_resultados.add_column("Recarga completa (s)", justify="right")
+    tabela_resultados.add_column("Sincronização (s)", justify="right")
+    tabela_resultados.add_column("Inseridos/atualizados/removidos", justify="right")
+    tabela_resultados.add_column("Custo relativo", justify="right")
+
+    for motor in args.motores:
+        recarga, sincronizacao, resumo = medir(motor, catalogo, novo)
+        tabela_resultados.add_row(motor, f"{recarga:.2f}", f"{sincronizacao:.2f}",
+                                  f"{resumo['inseridos']}/{resumo['atualizados']}/{resumo['removidos']}",
+                                  f"{sincronizacao / recarga:.1%}")
+
+    console.print(tabela_resultados)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,137 @@
+"""
+Teste de carga do estoque do Mercado com várias sessões de compra em threads.
+
+Cada thread faz vendas seguidas de uma unidade, com uma pausa após cada venda
+que simula o restante da sessão (exibição, pagamento). Ao final, confere que
+nenhuma baixa se perdeu, em memória e no banco após o checkpoint. Uso, a partir de src/:
+
+    python -m benchmarks.benchmark_estoque --vendas 20000 --espera-ms 1
+
+Com --espera-ms 0, o teste mede apenas a baixa do estoque, que é código Python
+puro: nesse caso o GIL limita o ganho com mais threads, mesmo sem disputa de travas.
+"""
+import argparse
+import tempfile
+import threading
+import time
+import pandas as pd
+from rich.console import Console
+from rich.table import Table
+
+from ferramentas import configuracao
+from ferramentas.banco_de_dados import BancoDeDados
+from ferramentas.travas import faixa_da_chave
+
+NUMEROS_THREADS = [1, 2, 4, 8]
+
+
+def escolher_produtos(quantidade: int) -> list[int]:
+    """
+    Escolhe IDs de produtos em faixas de trava diferentes
+    """
+    ids, faixas = [], set()
+    produto_id = 1
+    while len(ids) < quantidade:
+        if faixa_da_chave(produto_id) not in faixas:
+            faixas.add(faixa_da_chave(produto_id))
+            ids.append(produto_id)
+        produto_id += 1
+    return ids
+
+
+def criar_mercado(produtos: list[int], estoque: int):
+    from mercado.mercado import Mercado
+    BancoDeDados().salvar_tabela(pd.DataFrame([
+        dict(id=produto_id, nome=f"Produto {produto_id}", preco=10.0, tipo="fisico", quantidade=estoque,
+             altura=1.0, largura=1.0, profundidade=1.0, link_download=None)
+        for produto_id in produtos
+    ]), "produtos")
+    return Mercado()
+
+
+def executar(mercado, produtos_por_thread: list[int], vendas_por_thread: int, espera: float) -> float:
+    """
+    Executa as sessões em paralelo
+
+    Returns:
+        Segundos decorridos
+    """
+    barreira = threading.Barrier(len(produtos_por_thread) + 1)
+
+    def sessao(produto_id: int):
+        barreira.wait()
+        for _ in range(vendas_por_thread):
+            mercado.vender_produto(produto_id, 1)
+            if espera:
+                time.sleep(espera)
+
+    threads = [threading.Thread(target=sessao, args=(produto_id,)) for produto_id in produtos_por_thread]
+    for thread in threads:
+        thread.start()
+    barreira.wait()
+    inicio = time.perf_counter()
+    for thread in threads:
+        thread.join()
+    return time.perf_counter() - inicio
+
+
+def conferir(mercado, estoque: int, vendidos: dict[int, int]) -> bool:
+    """
+    Confere o estoque em memória e, após o checkpoint, no banco
+    """
+    mercado.checkpoint()
+    banco = BancoDeDados().carregar_tabela("produtos").set_index("id")["quantidade"]
+    return all(mercado._produtos[produto_id].quantidade == estoque - quantidade
+               and int(banco[produto_id]) == estoque - quantidade
+               for produto_id, quantidade in vendidos.items())
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Teste de carga do estoque com sessões simultâneas")
+    parser.add_argument("--vendas", type=int, default=20_000, help="Total de vendas por cenário")
+    parser.add_argument("--espera-ms", type=float, default=1.0, help="Pausa após cada venda")
+    args = parser.parse_args()
+    espera = args.espera_ms / 1000
+
+    console = Console()
+    tabela_resultados = Table(title=f"{args.vendas} vendas, pausa de {args.espera_ms} ms", header_style="bold magenta")
+    tabela_resultados.add_column("Cenário")
+    tabela_resultados.add_column("Threads", justify="right")
+    tabela_resultados.add_column("Vendas/s", justify="right")
+    tabela_resultados.add_column("Aceleração", justify="right")
+    tabela_resultados.add_column("Sem perdas", justify="center")
+
+    with tempfile.TemporaryDirectory() as diretorio:
+        configuracao.DIRETORIO_DADOS = diretorio
+        # O escritor só grava no checkpoint, para medir apenas a baixa em memória
+        configuracao.MODO_DURABILIDADE = "ao_sair"
+        produtos = escolher_produtos(max(NUMEROS_THREADS))
+        estoque = args.vendas * 2
+
+        for cenario in ["Produtos diferentes", "Mesmo produto"]:
+            base = None
+            for numero_threads in NUMEROS_THREADS:
+                mercado = criar_mercado(produtos, estoque)
+                if cenario == "Produtos diferentes":
+                    produtos_por_thread = produtos[:numero_threads]
+                else:
+                    produtos_por_thread = [produtos[0]] * numero_threads
+                vendas_por_thread = args.vendas // numero_threads
+                segundos = executar(mercado, produtos_por_thread, vendas_por_thread, espera)
+
+                vendidos = {}
+                for produto_id in produtos_por_thread:
+                    vendidos[produto_id] = vendidos.get(produto_id, 0) + vendas_por_thread
+                correto = conferir(mercado, estoque, vendidos)
+                mercado.encerrar()
+
+                vazao = vendas_por_thread * numero_threads / segundos
+                base = base or vazao
+                tabela_resultados.add_row(cenario, str(numero_threads), f"{vazao:,.0f}",
+                                          f"{vazao / base:.2f}x", "sim" if correto else "[red]não[/]")
+
+    console.print(tabela_resultados)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,143 @@
+"""
+Compara o caminho antigo de Excel (to_excel/read_excel com openpyxl) com o do
+MotorExcel (escrita em constant_memory e leitura pelo calamine).
+
+Cada cenário roda em um processo separado, para medir o pico de memória
+(RSS) só dele. Uso, a partir de src/:
+
+    python -m benchmarks.benchmark_excel --linhas 100000
+"""
+import argparse
+import json
+import multiprocessing
+import os
+import resource
+import sys
+import tempfile
+import time
+import numpy as np
+import pandas as pd
+from rich.console import Console
+from rich.table import Table
+
+from ferramentas.motores import MotorExcel
+
+
+def gerar_tabela(linhas: int) -> pd.DataFrame:
+    """
+    Gera uma tabela no formato da tabela de pedidos
+    """
+    gerador = np.random.default_rng(42)
+    datas = pd.Timestamp("2024-01-01") + pd.to_timedelta(gerador.integers(0, 365 * 24 * 3600, linhas), unit="s")
+    return pd.DataFrame({
+        "id": np.arange(1, linhas + 1),
+        "cliente_id": gerador.integers(1, 500, linhas),
+        "data": [data.isoformat() for data in datas],
+        "status": gerador.choice(["aguardando entrega", "entregue"], linhas),
+        "produtos": [json.dumps([{"id": int(i), "quantidade": 2}]) for i in gerador.integers(1, 200, linhas)],
+        "total": gerador.random(linhas).round(2) * 500,
+    })
+
+
+def _pico_memoria_mb() -> float:
+    # ru_maxrss vem em KB no Linux e em bytes no macOS
+    pico = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return pico / (1024 * 1024) if sys.platform == "darwin" else pico / 1024
+
+
+def _escrever_antigo(caminho: str, tabela: pd.DataFrame) -> None:
+    tabela.to_excel(caminho, index=False, engine="openpyxl")
+
+
+def _escrever_novo(caminho: str, tabela: pd.DataFrame) -> None:
+    motor = MotorExcel(os.path.dirname(caminho))
+    motor.salvar_tabela(tabela, os.path.basename(caminho))
+
+
+def _ler_antigo(caminho: str, tabela) -> None:
+    pd.read_excel(caminho, engine="openpyxl")
+
+
+def _ler_novo(caminho: str, tabela) -> None:
+    MotorExcel(os.path.dirname(caminho)).carregar_tabela(os.path.basename(caminho))
+
+
+def _lotes_antigo(caminho: str, tabela) -> None:
+    from openpyxl import load_workbook
+    livro = load_workbook(caminho, read_only=True)
+    linhas = livro.active.iter_rows(values_only=True)
+    cabecalho = next(linhas)
+    lote = []
+    for linha in linhas:
+        lote.append(linha)
+        if len(lote) == 1000:
+            pd.DataFrame(lote, columns=cabecalho)
+            lote = []
+    livro.close()
+
+
+def _lotes_novo(caminho: str, tabela) -> None:
+    for _ in MotorExcel(os.path.dirname(caminho)).iterar_tabela(os.path.basename(caminho), 1000):
+        pass
+
+
+CENARIOS = [
+    ("Escrita", _escrever_antigo, _escrever_novo),
+    ("Leitura completa", _ler_antigo, _ler_novo),
+    ("Leitura em lotes de 1000", _lotes_antigo, _lotes_novo),
+]
+
+
+def _executar(funcao, caminho: str, linhas: int, precisa_tabela: bool, fila) -> None:
+    tabela = gerar_tabela(linhas) if precisa_tabela else None
+    base = _pico_memoria_mb()
+    inicio = time.perf_counter()
+    funcao(caminho, tabela)
+    fila.put((time.perf_counter() - inicio, _pico_memoria_mb() - base))
+
+
+def medir(funcao, caminho: str, linhas: int, precisa_tabela: bool) -> tuple[float, float]:
+    """
+    Executa a função em um processo novo
+
+    Returns:
+        Tupla (segundos, crescimento do pico de memória em MB)
+    """
+    contexto = multiprocessing.get_context("spawn")
+    fila = contexto.Queue()
+    processo = contexto.Process(target=_executar, args=(funcao, caminho, linhas, precisa_tabela, fila))
+    processo.start()
+    resultado = fila.get()
+    processo.join()
+    return resultado
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark do caminho de Excel")
+    parser.add_argument("--linhas", type=int, default=100_000)
+    args = parser.parse_args()
+
+    console = Console()
+    tabela_resultados = Table(title=f"Excel com {args.linhas} linhas", header_style="bold magenta")
+    tabela_resultados.add_column("Cenário")
+    tabela_resultados.add_column("Antigo (s)", justify="right")
+    tabela_resultados.add_column("Novo (s)", justify="right")
+    tabela_resultados.add_column("Antigo (MB)", justify="right")
+    tabela_resultados.add_column("Novo (MB)", justify="right")
+
+    with tempfile.TemporaryDirectory() as diretorio:
+        caminho = os.path.join(diretorio, "pedidos.xlsx")
+        for nome, antigo, novo in CENARIOS:
+            escrita = nome == "Escrita"
+            if not escrita and not os.path.exists(caminho):
+                _escrever_novo(caminho, gerar_tabela(args.linhas))
+            tempo_antigo, memoria_antigo = medir(antigo, caminho, args.linhas, escrita)
+            tempo_novo, memoria_novo = medir(novo, caminho, args.linhas, escrita)
+            tabela_resultados.add_row(nome, f"{tempo_antigo:.2f}", f"{tempo_novo:.2f}",
+                                      f"{memoria_antigo:.0f}", f"{memoria_novo:.0f}")
+
+    console.print(tabela_resultados)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,87 @@
+"""
+Mede a memória ocupada por objeto de cada entidade (itens dos pedidos,
+pedidos e usuários), com o tracemalloc. Os valores repetidos, como o status
+e o tipo, chegam como strings novas a cada linha, como quando lidos do banco.
+Uso, a partir de src/:
+
+    python -m benchmarks.benchmark_memoria --itens 1000000
+"""
+import argparse
+import random
+import tracemalloc
+from datetime import datetime
+from rich.console import Console
+from rich.table import Table
+
+from mercado.pedido import Pedido
+from produto.produto_digital import ProdutoDigital
+from produto.produto_fisico import ProdutoFisico
+from usuarios.usuario import Usuario
+
+
+def bytes_por_objeto(criar, quantidade: int) -> float:
+    """
+    Memória alocada por objeto ao criar e guardar a quantidade informada de objetos.
+    A lista que guarda os objetos é alocada antes da medição.
+    """
+    objetos = [None] * quantidade
+    tracemalloc.start()
+    inicio = tracemalloc.get_traced_memory()[0]
+    for indice in range(quantidade):
+        objetos[indice] = criar(indice)
+    total = tracemalloc.get_traced_memory()[0] - inicio
+    tracemalloc.stop()
+    return total / quantidade
+
+
+def texto_lido(texto: str) -> str:
+    """
+    Uma cópia nova do texto, como o valor de uma célula lida do banco
+    """
+    return "".join(list(texto))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Memória por objeto das entidades")
+    parser.add_argument("--itens", type=int, default=1_000_000, help="Itens de pedidos")
+    parser.add_argument("--usuarios", type=int, default=100_000, help="Usuários")
+    args = parser.parse_args()
+
+    gerador = random.Random(42)
+    fisico = ProdutoFisico(id=1, nome="Café torrado 500g", preco=18.9, quantidade=100,
+                           altura=20.0, largura=10.0, profundidade=5.0)
+    digital = ProdutoDigital(id=2, nome="Curso de café", preco=49.9, link_download="https://exemplo.com/curso")
+    quantidades = [gerador.randint(1, 5) for _ in range(args.itens)]
+    pedidos = args.itens // 3
+    itens = [fisico.item_para_pedido(2) for _ in range(3)]
+    agora = datetime.now()
+    status = ["pendente", "aguardando entrega", "entregue"]
+    tipos = ["cliente"] * 9 + ["administrador"]
+
+    medidas = [
+        ("ItemPedido (físico)", args.itens,
+         bytes_por_objeto(lambda indice: fisico.item_para_pedido(quantidades[indice]), args.itens)),
+        ("ItemPedido (digital)", args.itens,
+         bytes_por_objeto(lambda indice: digital.item_para_pedido(), args.itens)),
+        ("Pedido (sem os itens)", pedidos,
+         bytes_por_objeto(lambda indice: Pedido(id=indice, cliente_id=indice % 1000, produtos=list(itens), data=agora,
+                                                status=texto_lido(status[indice % 3])), pedidos)),
+        ("Usuario", args.usuarios,
+         bytes_por_objeto(lambda indice: Usuario(indice, f"Usuário {indice}", "Rua A, 1", "3199999999",
+                                                 f"u{indice}@exemplo.com", "senha", texto_lido(tipos[indice % 10])),
+                          args.usuarios)),
+    ]
+
+    tabela = Table(title="Memória por objeto", header_style="bold magenta")
+    tabela.add_column("Entidade")
+    tabela.add_column("Objetos", justify="right")
+    tabela.add_column("Bytes por objeto", justify="right")
+    for nome, quantidade, por_objeto in medidas:
+        tabela.add_row(nome, str(quantidade), f"{por_objeto:.0f}")
+    Console().print(tabela)
+    Console().print(f"{args.itens} itens físicos em {pedidos} pedidos: "
+                    f"{(medidas[0][2] * args.itens + medidas[2][2] * pedidos) / 2**20:.0f} MB")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,84 @@
+"""
+Compara a varredura do catálogo (conferir o estoque de cada ProdutoFisico)
+com o acompanhamento de EstoqueBaixo, atualizado pelo setter de quantidade,
+para listar os produtos a repor e os menores estoques. Uso, a partir de src/:
+
+    python -m benchmarks.benchmark_reposicao --produtos 500000 --vendas 200000
+"""
+import argparse
+import heapq
+import random
+import time
+from rich.console import Console
+from rich.table import Table
+
+from mercado.estoque_baixo import EstoqueBaixo
+from produto.produto_fisico import ProdutoFisico
+
+
+def medir(funcao, repeticoes: int = 1) -> float:
+    inicio = time.perf_counter()
+    for _ in range(repeticoes):
+        funcao()
+    return (time.perf_counter() - inicio) / repeticoes
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Reposição de estoque: varredura x acompanhamento")
+    parser.add_argument("--produtos", type=int, default=500_000, help="Produtos físicos no catálogo")
+    parser.add_argument("--vendas", type=int, default=200_000, help="Mudanças de estoque")
+    parser.add_argument("--limite", type=int, default=10, help="Limite de reposição padrão")
+    args = parser.parse_args()
+
+    gerador = random.Random(42)
+    produtos = {produto_id: ProdutoFisico(id=produto_id, nome=f"Produto {produto_id}", preco=10.0,
+                                          quantidade=gerador.randint(0, 2000), altura=1, largura=1, profundidade=1)
+                for produto_id in range(1, args.produtos + 1)}
+    limites = {produto_id: gerador.randint(0, 50) for produto_id in gerador.sample(list(produtos), args.produtos // 10)}
+    vendas = [(gerador.randint(1, args.produtos), gerador.randint(1, 5)) for _ in range(args.vendas)]
+
+    def vender():
+        for produto_id, quantidade in vendas:
+            produto = produtos[produto_id]
+            produto.quantidade = max(produto.quantidade - quantidade, 0)
+
+    tempo_vendas_sem = medir(vender)
+
+    estoque = EstoqueBaixo(args.limite, limites)
+    inicio = time.perf_counter()
+    observador = estoque.atualizar
+    for produto in produtos.values():
+        produto.observar_quantidade(observador)
+    estoque.carregar((produto.id, produto.quantidade) for produto in produtos.values())
+    tempo_montagem = time.perf_counter() - inicio
+    tempo_vendas_com = medir(vender)
+
+    def varrer_repor():
+        return sorted((produto for produto in produtos.values()
+                       if produto.quantidade <= limites.get(produto.id, args.limite)),
+                      key=lambda produto: (produto.quantidade, produto.id))
+
+    def varrer_menores():
+        return heapq.nsmallest(20, produtos.values(), key=lambda produto: (produto.quantidade, produto.id))
+
+    repor_varredura = [produto.id for produto in varrer_repor()]
+    repor_indice = [produto_id for produto_id, _ in estoque.abaixo_do_limite()]
+    menores_varredura = [produto.id for produto in varrer_menores()]
+    menores_indice = [produto_id for produto_id, _ in estoque.menores(20)]
+
+    tabela = Table(title=f"{args.produtos} produtos, {len(repor_indice)} a repor", header_style="bold magenta")
+    tabela.add_column("Medida")
+    tabela.add_column("Varredura", justify="right")
+    tabela.add_column("EstoqueBaixo", justify="right")
+    tabela.add_row("Montagem", "-", f"{tempo_montagem:.2f} s")
+    tabela.add_row(f"{args.vendas} mudanças de estoque", f"{tempo_vendas_sem:.2f} s", f"{tempo_vendas_com:.2f} s")
+    tabela.add_row("Produtos a repor", f"{medir(varrer_repor, 3) * 1000:.1f} ms",
+                   f"{medir(estoque.abaixo_do_limite, 3) * 1000:.1f} ms")
+    tabela.add_row("20 menores estoques", f"{medir(varrer_menores, 3) * 1000:.1f} ms",
+                   f"{medir(lambda: estoque.menores(20), 100) * 1000:.3f} ms")
+    Console().print(tabela)
+    Console().print(f"Resultados iguais: {repor_varredura == repor_indice and menores_varredura == menores_indice}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,98 @@
+"""
+Teste de carga do modo serviço: vários clientes simultâneos, cada um com uma
+conexão keep-alive, alternando consultas ao catálogo, novos pedidos e
+consultas de pedidos. Ao final, exibe a vazão vista pelos clientes e as
+latências por rota medidas pelo próprio serviço (GET /metricas).
+
+Com o serviço rodando (python src/main.py servir), a partir de src/:
+
+    python -m benchmarks.benchmark_servico --clientes 16 --requisicoes 4000 --cliente-id 1
+"""
+import argparse
+import http.client
+import json
+import random
+import threading
+import time
+from rich.console import Console
+from rich.table import Table
+
+from ferramentas import configuracao
+
+
+def requisitar(conexao: http.client.HTTPConnection, metodo: str, caminho: str, corpo: dict | None = None):
+    conexao.request(metodo, caminho, body=json.dumps(corpo) if corpo is not None else None,
+                    headers={"Content-Type": "application/json"})
+    resposta = conexao.getresponse()
+    return resposta.status, json.loads(resposta.read())
+
+
+def sessao(produtos: list[int], cliente_id: int, quantidade: int, status: dict, trava: threading.Lock):
+    """
+    Executa as requisições de um cliente, contando as respostas por código de status
+    """
+    gerador = random.Random()
+    conexao = http.client.HTTPConnection(configuracao.SERVICO_ENDERECO, configuracao.SERVICO_PORTA)
+    contagem = {}
+    for _ in range(quantidade):
+        sorteio = gerador.random()
+        if sorteio < 0.5:
+            codigo, _ = requisitar(conexao, "GET", f"/produtos/{gerador.choice(produtos)}")
+        elif sorteio < 0.7:
+            codigo, _ = requisitar(conexao, "GET", f"/produtos?pagina={gerador.randint(1, 5)}")
+        elif sorteio < 0.9:
+            itens = [{"produto_id": produto_id, "quantidade": 1} for produto_id in gerador.sample(produtos, 2)]
+            codigo, _ = requisitar(conexao, "POST", "/pedidos", {"cliente_id": cliente_id, "itens": itens})
+        else:
+            codigo, _ = requisitar(conexao, "GET", f"/pedidos?cliente_id={cliente_id}&limite=10")
+        contagem[codigo] = contagem.get(codigo, 0) + 1
+    conexao.close()
+    with trava:
+        for codigo, total in contagem.items():
+            status[codigo] = status.get(codigo, 0) + total
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Teste de carga do modo serviço")
+    parser.add_argument("--clientes", type=int, default=16, help="Clientes simultâneos")
+    parser.add_argument("--requisicoes", type=int, default=4000, help="Total de requisições")
+    parser.add_argument("--cliente-id", type=int, required=True, help="ID de um cliente cadastrado, usado nos pedidos")
+    args = parser.parse_args()
+
+    conexao = http.client.HTTPConnection(configuracao.SERVICO_ENDERECO, configuracao.SERVICO_PORTA)
+    _, catalogo = requisitar(conexao, "GET", "/produtos?tipo=fisico&por_pagina=500")
+    produtos = [produto["id"] for produto in catalogo["produtos"] if produto.get("quantidade", 0) > 0]
+    if len(produtos) < 2:
+        Console().print("[bold red]São necessários pelo menos dois produtos físicos com estoque.[/]")
+        return
+
+    status, trava = {}, threading.Lock()
+    threads = [threading.Thread(target=sessao, args=(produtos, args.cliente_id, args.requisicoes // args.clientes,
+                                                     status, trava))
+               for _ in range(args.clientes)]
+    inicio = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    segundos = time.perf_counter() - inicio
+
+    _, metricas = requisitar(conexao, "GET", "/metricas")
+    conexao.close()
+
+    console = Console()
+    total = sum(status.values())
+    console.print(f"{total} requisições em {segundos:.2f} s ({total / segundos:,.0f}/s) com {args.clientes} clientes; "
+                  f"respostas: {dict(sorted(status.items()))}")
+    tabela = Table(title="Latência por rota (medida pelo serviço)", header_style="bold magenta")
+    for coluna in ["Rota", "Requisições", "Erros", "Média (ms)", "p50", "p95", "p99", "Máx."]:
+        tabela.add_column(coluna, justify="left" if coluna == "Rota" else "right")
+    for rota, dados in metricas.items():
+        tabela.add_row(rota, str(dados["requisicoes"]), str(dados["erros"]), f"{dados['media_ms']:.2f}",
+                       f"{dados['p50_ms']:.2f}", f"{dados['p95_ms']:.2f}", f"{dados['p99_ms']:.2f}",
+                       f"{dados['max_ms']:.2f}")
+    console.print(tabela)
+
+
+if __name__ == "__main__":
+    main()
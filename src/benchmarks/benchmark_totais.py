@@ -0,0 +1,82 @@
+"""
+Compara o cálculo dos totais de pedidos objeto a objeto (Pedido.calcular_total,
+que monta os produtos de cada pedido) com a soma agrupada de LinhasPedidos,
+que lê os itens gravados direto em colunas. Uso, a partir de src/:
+
+    python -m benchmarks.benchmark_totais --pedidos 100000 --produtos 5000
+"""
+import argparse
+import random
+import time
+from rich.console import Console
+from rich.table import Table
+
+from mercado.linhas_pedidos import LinhasPedidos
+from mercado.pedido import Pedido
+from produto.item_pedido import ItemPedido
+from produto.produto_digital import ProdutoDigital
+from produto.produto_fisico import ProdutoFisico
+
+
+def gerar_catalogo(produtos: int) -> dict:
+    gerador = random.Random(42)
+    catalogo = {}
+    for produto_id in range(1, produtos + 1):
+        if produto_id % 4:
+            catalogo[produto_id] = ProdutoFisico(
+                id=produto_id, nome=f"Produto {produto_id}", preco=round(gerador.uniform(1, 300), 2), quantidade=100,
+                altura=round(gerador.uniform(1, 30), 1), largura=round(gerador.uniform(1, 30), 1),
+                profundidade=round(gerador.uniform(1, 30), 1))
+        else:
+            catalogo[produto_id] = ProdutoDigital(id=produto_id, nome=f"Curso {produto_id}",
+                                                  preco=round(gerador.uniform(1, 90), 2), link_download="https://x")
+    return catalogo
+
+
+def gerar_pedidos(catalogo: dict, pedidos: int) -> list[Pedido]:
+    """
+    Gera pedidos como lidos do banco: com os itens gravados, ainda não hidratados
+    """
+    def hidratar(itens: list[dict]) -> list:
+        return [ItemPedido.de_gravado(item, catalogo[item['id']]) for item in itens]
+
+    gerador = random.Random(7)
+    lista = []
+    for pedido_id in range(1, pedidos + 1):
+        itens = []
+        for produto_id in gerador.sample(range(1, len(catalogo) + 1), gerador.randint(1, 6)):
+            itens.append({'id': produto_id, 'quantidade': gerador.randint(1, 5)} if produto_id % 4 else {'id': produto_id})
+        lista.append(Pedido(id=pedido_id, cliente_id=1, itens_serializados=itens, hidratar_itens=hidratar))
+    return lista
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Totais de pedidos: objeto a objeto x colunas")
+    parser.add_argument("--pedidos", type=int, default=100_000, help="Pedidos")
+    parser.add_argument("--produtos", type=int, default=5000, help="Produtos no catálogo")
+    args = parser.parse_args()
+
+    catalogo = gerar_catalogo(args.produtos)
+
+    pedidos = gerar_pedidos(catalogo, args.pedidos)
+    inicio = time.perf_counter()
+    por_objeto = [pedido.calcular_total() for pedido in pedidos]
+    tempo_objetos = time.perf_counter() - inicio
+
+    pedidos = gerar_pedidos(catalogo, args.pedidos)
+    inicio = time.perf_counter()
+    linhas = LinhasPedidos.de_pedidos(pedidos, catalogo)
+    em_colunas = linhas.totais().tolist()
+    tempo_colunas = time.perf_counter() - inicio
+
+    tabela = Table(title=f"{args.pedidos} pedidos, {len(linhas)} itens", header_style="bold magenta")
+    tabela.add_column("Método")
+    tabela.add_column("Tempo (s)", justify="right")
+    tabela.add_row("calcular_total por pedido", f"{tempo_objetos:.3f}")
+    tabela.add_row("LinhasPedidos (soma agrupada)", f"{tempo_colunas:.3f}")
+    Console().print(tabela)
+    Console().print(f"Totais iguais: {por_objeto == em_colunas}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,94 @@
+"""
+Mede os agregados de vendas (AnaliseVendas) com muitos pedidos: a montagem
+completa a partir da tabela de pedidos, a atualização a cada pedido novo e as
+consultas dos relatórios. Uso, a partir de src/:
+
+    python -m benchmarks.benchmark_vendas --pedidos 1000000 --produtos 5000
+"""
+import argparse
+import json
+import time
+from datetime import datetime, timedelta
+
+import numpy as np
+import pandas as pd
+from rich.console import Console
+from rich.table import Table
+
+from mercado.analise_vendas import AnaliseVendas
+
+
+def gerar_pedidos(pedidos: int, produtos: int, clientes: int) -> pd.DataFrame:
+    """
+    Gera pedidos de até 6 itens, espalhados pelo último ano, no formato da tabela de pedidos
+    """
+    gerador = np.random.default_rng(42)
+    itens_por_pedido = gerador.integers(1, 7, pedidos)
+    ids_produtos = gerador.integers(1, produtos + 1, itens_por_pedido.sum())
+    quantidades = gerador.integers(1, 5, itens_por_pedido.sum())
+    fim = np.cumsum(itens_por_pedido)
+    celulas = [json.dumps([{'id': int(produto_id), 'quantidade': int(quantidade)}
+                           for produto_id, quantidade in zip(ids_produtos[inicio:final], quantidades[inicio:final])])
+               for inicio, final in zip(fim - itens_por_pedido, fim)]
+    agora = datetime.now()
+    datas = agora - pd.to_timedelta(gerador.integers(0, 365 * 24 * 60, pedidos), unit='min')
+    return pd.DataFrame({
+        'id': np.arange(1, pedidos + 1),
+        'cliente_id': gerador.integers(1, clientes + 1, pedidos),
+        'data': datas.strftime('%Y-%m-%dT%H:%M:%S'),
+        'status': np.where(gerador.random(pedidos) < 0.9, 'entregue', 'aguardando entrega'),
+        'produtos': celulas,
+    })
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Agregados de vendas com muitos pedidos")
+    parser.add_argument("--pedidos", type=int, default=1_000_000, help="Pedidos")
+    parser.add_argument("--produtos", type=int, default=5000, help="Produtos no catálogo")
+    parser.add_argument("--clientes", type=int, default=50_000, help="Clientes")
+    args = parser.parse_args()
+
+    pedidos = gerar_pedidos(args.pedidos, args.produtos, args.clientes)
+    gerador = np.random.default_rng(7)
+    catalogo = pd.DataFrame({
+        'preco': gerador.uniform(1, 300, args.produtos).round(2),
+        'fisico': np.arange(args.produtos) % 4 != 0,
+        'volume': gerador.uniform(1, 1000, args.produtos).round(1),
+    }, index=pd.Index(np.arange(1, args.produtos + 1), name='id'))
+
+    analise = AnaliseVendas()
+    inicio = time.perf_counter()
+    analise.reconstruir(pedidos, catalogo)
+    montagem = time.perf_counter() - inicio
+
+    agora = datetime.now()
+    inicio = time.perf_counter()
+    for pedido_id in range(args.pedidos + 1, args.pedidos + 10_001):
+        linhas = [(int(produto_id), 2, 10.0, 1.0) for produto_id in gerador.integers(1, args.produtos + 1, 3)]
+        analise.registrar_pedido(pedido_id, int(gerador.integers(1, args.clientes + 1)), 'aguardando entrega',
+                                 agora, linhas)
+    registro = (time.perf_counter() - inicio) / 10_000
+
+    consultas = {
+        "Produtos mais vendidos (30 dias)": lambda: analise.por_produto((agora - timedelta(days=29)).date(), limite=10),
+        "Produtos mais vendidos (ano)": lambda: analise.por_produto(limite=10),
+        "Vendas por dia (ano)": lambda: analise.por_dia(),
+        "Maiores clientes": lambda: analise.por_cliente(limite=10),
+        "Pedidos por status": lambda: analise.por_status(),
+    }
+
+    tabela = Table(title=f"{args.pedidos} pedidos, {pedidos['produtos'].str.count('{').sum()} itens",
+                   header_style="bold magenta")
+    tabela.add_column("Medida")
+    tabela.add_column("Tempo", justify="right")
+    tabela.add_row("Montagem completa", f"{montagem:.2f} s")
+    tabela.add_row("Registro de um pedido novo", f"{registro * 1_000_000:.1f} µs")
+    for nome, consulta in consultas.items():
+        inicio = time.perf_counter()
+        consulta()
+        tabela.add_row(nome, f"{(time.perf_counter() - inicio) * 1000:.1f} ms")
+    Console().print(tabela)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,40 @@
+# Conjunto de campos alterados de todos os objetos sem alterações
+SEM_ALTERACOES: frozenset[str] = frozenset()
+
+
+class RastreiaAlteracoes:
+    """
+    Registra quais campos de um objeto foram alterados pelos setters desde a
+    última gravação, para que apenas os objetos alterados sejam persistidos.
+
+    As classes que usam este mixin devem declarar o slot _campos_alterados e
+    iniciá-lo com SEM_ALTERACOES no construtor. O conjunto é imutável: objetos
+    sem alterações (a grande maioria) compartilham o mesmo frozenset vazio, em
+    vez de cada um guardar um set próprio.
+    """
+
+    __slots__ = ()
+
+    def _marcar_alterado(self, campo: str, valor_anterior, valor_novo) -> None:
+        """
+        Marca o campo como alterado, se o valor realmente mudou
+        """
+        if valor_anterior != valor_novo:
+            self._campos_alterados |= {campo}
+
+    @property
+    def esta_sujo(self) -> bool:
+        """
+        Indica se algum campo foi alterado desde a última gravação
+        """
+        return bool(self._campos_alterados)
+
+    @property
+    def campos_alterados(self) -> frozenset[str]:
+        return self._campos_alterados
+
+    def limpar_alteracoes(self) -> None:
+        """
+        Marca o objeto como gravado
+        """
+        self._campos_alterados = SEM_ALTERACOES
@@ -1,56 +1,317 @@
 import pandas as pd
 import os
+from contextlib import nullcontext
+from ferramentas import configuracao
+from ferramentas.cache_tabelas import CacheTabelas
+from ferramentas.motores import MOTORES, MotorArmazenamento, aplicar_filtros, escrever_atomicamente
+from ferramentas.travas import TravaArquivo, travar_tabela, travar_chaves
+
 
 class BancoDeDados:
-    def __init__(self):
+    # Cache compartilhado por todas as instâncias do processo
+    _cache = CacheTabelas(configuracao.LIMITE_CACHE_MB * 1024 * 1024)
+    # Contador de gerações por tabela, incrementado a cada escrita feita por este processo
+    _geracoes: dict[tuple, int] = {}
+
+    def __init__(self, motor: str | None = None):
         """
         Inicializa a calsse com o caminho do diretório data
+
+        Args:
+            motor: Nome do motor de armazenamento ('excel', 'sqlite' ou 'parquet').
+                   Se não for informado, usa o valor da configuração.
         """
-        self._caminho_diretorio = os.path.join(os.getcwd(), "data")
-        
+        self._caminho_diretorio = configuracao.DIRETORIO_DADOS
+
         # Cria o diretório data se não existir
         if not os.path.exists(self._caminho_diretorio):
             os.makedirs(self._caminho_diretorio)
-    
+
+        nome_motor = (motor or configuracao.MOTOR_ARMAZENAMENTO).lower()
+        if nome_motor not in MOTORES:
+            raise ValueError(f"Motor de armazenamento inválido. Use um dos seguintes: {', '.join(MOTORES)}")
+        self._nome_motor = nome_motor
+        self._motor: MotorArmazenamento = MOTORES[nome_motor](self._caminho_diretorio)
+
+    @property
+    def motor(self) -> str:
+        return self._nome_motor
+
     def salvar_tabela(self, dados: pd.DataFrame, nome_tabela: str) -> None:
         """
-        Salva uma tabela em arquivo Excel
-        
+        Salva uma tabela inteira, substituindo o conteúdo anterior.
+        A escrita é atômica e feita com a tabela travada para os outros processos.
+
         Args:
             dados: DataFrame com os dados a serem salvos
-            nome_tabela: Nome da tabela (sem extensão, usa .xlsx por padrão)
-        """
-        
-        # Adiciona extensão .xlsx se não tiver
-        if not nome_tabela.endswith('.xlsx'):
-            nome_tabela += '.xlsx'
-        
-        caminho_arquivo = os.path.join(self._caminho_diretorio, nome_tabela)
-        
-        # Salva o DataFrame em Excel
-        dados.to_excel(caminho_arquivo, index=False)
-        
-    
-    def carregar_tabela(self, nome_tabela: str) -> pd.DataFrame:
-        """
-        Carrega uma tabela de um arquivo Excel
-        
-        Args:
-            nome_tabela: Nome do arquivo Excel a ser carregado
-            
+            nome_tabela: Nome da tabela (sem extensão)
+        """
+        nome_tabela = self._normalizar_nome(nome_tabela)
+        with self.travar_tabela(nome_tabela):
+            self._motor.salvar_tabela(dados, nome_tabela)
+            self._registrar_escrita(nome_tabela)
+
+
+    def carregar_tabela(self, nome_tabela: str, colunas: list[str] | None = None,
+                        filtros: list[tuple] | None = None) -> pd.DataFrame:
+        """
+        Carrega uma tabela
+
+        Args:
+            nome_tabela: Nome da tabela a ser carregada
+            colunas: Colunas a serem lidas (todas se None)
+            filtros: Lista de tuplas (coluna, operador, valor); motores colunares
+                     e o SQLite aplicam os filtros na própria leitura
+
         Returns:
-            DataFrame com os dados carregados
-        """
-        # Adiciona extensão .xlsx se não tiver
-        if not nome_tabela.endswith('.xlsx'):
-            nome_tabela += '.xlsx'
-        
-        caminho_arquivo = os.path.join(self._caminho_diretorio, nome_tabela)
-        
-        if not os.path.exists(caminho_arquivo):
+            DataFrame com os dados carregados (vazio se a tabela não existir)
+        """
+        nome_tabela = self._normalizar_nome(nome_tabela)
+        chave_cache = self._chave_cache(nome_tabela)
+        assinatura = self._assinatura(nome_tabela)
+        if assinatura is None:
             return pd.DataFrame()
-        
-        # Carrega o arquivo Excel
-        df = pd.read_excel(caminho_arquivo)
-        
-        return df
\ No newline at end of file
+
+        tabela = self._cache.obter(chave_cache, assinatura)
+        if tabela is not None:
+            # Cópia rasa: os dados são compartilhados com o cache e não devem ser alterados no lugar
+            return aplicar_filtros(tabela, colunas, filtros).copy(deep=False)
+
+        if self._motor.FILTRA_NA_LEITURA and filtros:
+            # Leitura filtrada não entra no cache: é mais barato deixar o motor filtrar
+            return self._motor.carregar_tabela(nome_tabela, colunas, filtros)
+
+        tabela = self._motor.carregar_tabela(nome_tabela)
+        self._cache.guardar(chave_cache, assinatura, tabela)
+        return aplicar_filtros(tabela, colunas, filtros).copy(deep=False)
+
+    def iterar_tabela(self, nome_tabela: str, tamanho_lote: int = 500, colunas: list[str] | None = None,
+                      filtros: list[tuple] | None = None):
+        """
+        Percorre a tabela em lotes, sem carregá-la inteira na memória quando o motor permite
+
+        Args:
+            nome_tabela: Nome da tabela
+            tamanho_lote: Quantidade de linhas lidas por vez
+            colunas: Colunas a serem lidas (todas se None)
+            filtros: Lista de tuplas (coluna, operador, valor)
+
+        Yields:
+            DataFrames com as linhas de cada lote que satisfazem os filtros
+        """
+        nome_tabela = self._normalizar_nome(nome_tabela)
+        assinatura = self._assinatura(nome_tabela)
+        if assinatura is None:
+            return
+
+        tabela = self._cache.obter(self._chave_cache(nome_tabela), assinatura)
+        if tabela is not None:
+            # A tabela já está na memória: basta fatiá-la
+            tabela = aplicar_filtros(tabela, colunas, filtros)
+            for inicio in range(0, len(tabela), tamanho_lote):
+                yield tabela.iloc[inicio:inicio + tamanho_lote].reset_index(drop=True)
+            return
+
+        yield from self._motor.iterar_tabela(nome_tabela, tamanho_lote, colunas, filtros)
+
+    def existe_tabela(self, nome_tabela: str) -> bool:
+        """
+        Indica se a tabela existe no motor de armazenamento atual
+        """
+        return self._motor.existe_tabela(self._normalizar_nome(nome_tabela))
+
+    def remover_tabela(self, nome_tabela: str) -> None:
+        """
+        Remove a tabela do motor de armazenamento atual
+        """
+        nome_tabela = self._normalizar_nome(nome_tabela)
+        with self.travar_tabela(nome_tabela):
+            self._motor.remover_tabela(nome_tabela)
+            self._registrar_escrita(nome_tabela)
+
+    def registrar_alteracao(self, nome_tabela: str) -> None:
+        """
+        Registra uma alteração feita sem passar pelos métodos de escrita (por exemplo,
+        em tabelas guardadas em várias partes), incrementando a versão da tabela
+        """
+        self._registrar_escrita(self._normalizar_nome(nome_tabela))
+
+    def upsert_linhas(self, dados: pd.DataFrame, nome_tabela: str, chave: str = "id") -> None:
+        """
+        Insere ou atualiza apenas as linhas informadas
+
+        Args:
+            dados: DataFrame com as linhas a serem gravadas
+            nome_tabela: Nome da tabela
+            chave: Coluna que identifica cada linha
+        """
+        if dados.empty:
+            return
+        nome_tabela = self._normalizar_nome(nome_tabela)
+        with self._trava_escrita_linhas(nome_tabela):
+            self._motor.upsert_linhas(dados, nome_tabela, chave)
+            self._registrar_escrita(nome_tabela)
+
+    def remover_linhas(self, nome_tabela: str, chaves: list, chave: str = "id") -> None:
+        """
+        Remove as linhas com as chaves informadas
+
+        Args:
+            nome_tabela: Nome da tabela
+            chaves: Valores da coluna chave das linhas a remover
+            chave: Coluna que identifica cada linha
+        """
+        if not chaves:
+            return
+        nome_tabela = self._normalizar_nome(nome_tabela)
+        with self._trava_escrita_linhas(nome_tabela):
+            self._motor.remover_linhas(nome_tabela, list(chaves), chave)
+            self._registrar_escrita(nome_tabela)
+
+    def aplicar_alteracoes(self, nome_tabela: str, gravar: pd.DataFrame, remover: list, chave: str = "id") -> None:
+        """
+        Insere ou atualiza algumas linhas e remove outras, em uma única escrita
+
+        Args:
+            nome_tabela: Nome da tabela
+            gravar: DataFrame com as linhas a serem inseridas ou atualizadas
+            remover: Valores da coluna chave das linhas a remover
+            chave: Coluna que identifica cada linha
+        """
+        if gravar.empty and not remover:
+            return
+        nome_tabela = self._normalizar_nome(nome_tabela)
+        with self._trava_escrita_linhas(nome_tabela):
+            self._motor.aplicar_alteracoes(nome_tabela, gravar, list(remover), chave)
+            self._registrar_escrita(nome_tabela)
+
+    def selecionar_por_chave(self, nome_tabela: str, chaves: list, chave: str = "id") -> pd.DataFrame:
+        """
+        Carrega apenas as linhas com as chaves informadas
+
+        Args:
+            nome_tabela: Nome da tabela
+            chaves: Valores da coluna chave das linhas desejadas
+            chave: Coluna que identifica cada linha
+
+        Returns:
+            DataFrame com as linhas encontradas; sem linhas, mas com a coluna chave,
+            se nenhuma for encontrada ou a tabela não existir
+        """
+        if self._motor.ESCRITA_POR_LINHA:
+            return self._motor.selecionar_por_chave(self._normalizar_nome(nome_tabela), list(chaves), chave)
+        # Nos motores de arquivo inteiro, o cache (validado pela versão da tabela) evita reler o arquivo
+        tabela = self.carregar_tabela(nome_tabela, filtros=[(chave, "in", list(chaves))])
+        return tabela if chave in tabela.columns else pd.DataFrame(columns=[chave])
+
+    def proximo_id(self, nome_tabela: str, minimo: int = 0, quantidade: int = 1) -> int:
+        """
+        Gera o próximo identificador da tabela de forma atômica entre processos,
+        sem precisar ler a tabela
+
+        Args:
+            nome_tabela: Nome da tabela
+            minimo: Maior identificador já conhecido pelo chamador (usado
+                    quando a sequência ainda não existe ou está atrasada)
+            quantidade: Quantos identificadores consecutivos reservar de uma vez
+
+        Returns:
+            O primeiro dos identificadores reservados
+        """
+        nome_tabela = self._normalizar_nome(nome_tabela)
+        caminho_sequencia = os.path.join(self._caminho_diretorio, ".versoes", f"{nome_tabela}.sequencia")
+        with TravaArquivo(caminho_sequencia + ".lock"):
+            try:
+                with open(caminho_sequencia, encoding="utf-8") as arquivo:
+                    ultimo = int(arquivo.read().strip() or 0)
+            except FileNotFoundError:
+                ultimo = 0
+            novo_id = max(ultimo, int(minimo)) + 1
+
+            def escrever(caminho):
+                with open(caminho, "w", encoding="utf-8") as arquivo:
+                    arquivo.write(str(novo_id + quantidade - 1))
+            escrever_atomicamente(caminho_sequencia, escrever)
+        return novo_id
+
+    def arquivos_tabela(self, nome_tabela: str) -> list[str]:
+        """
+        Retorna os arquivos em disco onde a tabela está guardada
+        """
+        return self._motor.arquivos(self._normalizar_nome(nome_tabela))
+
+    def escritas_locais(self, nome_tabela: str) -> int:
+        """
+        Retorna quantas escritas na tabela foram feitas por este processo
+        """
+        return self._geracoes.get(self._chave_cache(self._normalizar_nome(nome_tabela)), 0)
+
+    def travar_tabela(self, nome_tabela: str) -> TravaArquivo:
+        """
+        Retorna a trava exclusiva (entre processos) da tabela inteira
+        """
+        return travar_tabela(self._normalizar_nome(nome_tabela))
+
+    def travar_linhas(self, nome_tabela: str, chaves: list):
+        """
+        Retorna uma trava (entre processos) apenas das faixas de chaves informadas,
+        para leituras seguidas de escrita das mesmas linhas
+        """
+        return travar_chaves(self._normalizar_nome(nome_tabela), chaves)
+
+    def versao_tabela(self, nome_tabela: str) -> int:
+        """
+        Retorna a versão atual da tabela, incrementada a cada escrita de qualquer processo
+        """
+        try:
+            with open(self._caminho_versao(self._normalizar_nome(nome_tabela)), encoding="utf-8") as arquivo:
+                return int(arquivo.read().strip() or 0)
+        except FileNotFoundError:
+            return 0
+
+    def _caminho_versao(self, nome_tabela: str) -> str:
+        return os.path.join(self._caminho_diretorio, ".versoes", f"{nome_tabela}.versao")
+
+    def _trava_escrita_linhas(self, nome_tabela: str):
+        # Motores que gravam por linha já garantem a atomicidade; os demais reescrevem a tabela
+        if self._motor.ESCRITA_POR_LINHA:
+            return nullcontext()
+        return self.travar_tabela(nome_tabela)
+
+    @classmethod
+    def estatisticas_cache(cls) -> dict:
+        """
+        Retorna os contadores de acertos e faltas do cache de tabelas
+        """
+        return cls._cache.estatisticas()
+
+    def _chave_cache(self, nome_tabela: str) -> tuple:
+        return (self._nome_motor, self._caminho_diretorio, nome_tabela)
+
+    def _assinatura(self, nome_tabela: str) -> tuple | None:
+        # Combina o estado do arquivo com a geração local e a versão da tabela, pois
+        # o mtime pode não mudar entre duas escritas muito próximas
+        assinatura_arquivo = self._motor.assinatura(nome_tabela)
+        if assinatura_arquivo is None:
+            return None
+        return (self._geracoes.get(self._chave_cache(nome_tabela), 0), self.versao_tabela(nome_tabela),
+                assinatura_arquivo)
+
+    def _registrar_escrita(self, nome_tabela: str) -> None:
+        caminho_versao = self._caminho_versao(nome_tabela)
+        with TravaArquivo(caminho_versao + ".lock"):
+            nova_versao = str(self.versao_tabela(nome_tabela) + 1)
+
+            def escrever(caminho):
+                with open(caminho, "w", encoding="utf-8") as arquivo:
+                    arquivo.write(nova_versao)
+            escrever_atomicamente(caminho_versao, escrever)
+
+        chave_cache = self._chave_cache(nome_tabela)
+        self._geracoes[chave_cache] = self._geracoes.get(chave_cache, 0) + 1
+        self._cache.invalidar(chave_cache)
+
+    @staticmethod
+    def _normalizar_nome(nome_tabela: str) -> str:
+        # Aceita nomes com a extensão antiga (.xlsx) por compatibilidade
+        return nome_tabela[:-len('.xlsx')] if nome_tabela.endswith('.xlsx') else nome_tabela
@@ -0,0 +1,81 @@
+from collections import OrderedDict
+import threading
+import pandas as pd
+
+class CacheTabelas:
+    """
+    Cache de tabelas compartilhado pelo processo, com despejo LRU
+    limitado por um orçamento de memória
+    """
+
+    def __init__(self, limite_bytes: int):
+        """
+        Inicializa o cache
+
+        Args:
+            limite_bytes: Memória máxima ocupada pelas tabelas em cache
+        """
+        self._limite_bytes = limite_bytes
+        self._entradas: OrderedDict = OrderedDict()  # chave -> (assinatura, DataFrame, bytes)
+        self._bytes_ocupados = 0
+        self._trava = threading.Lock()
+        self.acertos = 0
+        self.faltas = 0
+
+    def obter(self, chave, assinatura) -> pd.DataFrame | None:
+        """
+        Retorna a tabela em cache se a assinatura ainda for a mesma, ou None
+
+        Args:
+            chave: Identificador da tabela
+            assinatura: Estado atual do arquivo (ex.: mtime e tamanho)
+        """
+        with self._trava:
+            entrada = self._entradas.get(chave)
+            if entrada is None or entrada[0] != assinatura:
+                self.faltas += 1
+                return None
+            self._entradas.move_to_end(chave)
+            self.acertos += 1
+            return entrada[1]
+
+    def guardar(self, chave, assinatura, tabela: pd.DataFrame) -> None:
+        """
+        Guarda a tabela no cache, despejando as menos usadas se passar do limite
+        """
+        tamanho = int(tabela.memory_usage(deep=True).sum())
+        with self._trava:
+            self._remover(chave)
+            if tamanho > self._limite_bytes:
+                return  # Tabela maior que o orçamento inteiro: não vale a pena guardar
+
+            self._entradas[chave] = (assinatura, tabela, tamanho)
+            self._bytes_ocupados += tamanho
+            while self._bytes_ocupados > self._limite_bytes:
+                _, (_, _, tamanho_despejado) = self._entradas.popitem(last=False)
+                self._bytes_ocupados -= tamanho_despejado
+
+    def invalidar(self, chave) -> None:
+        """
+        Descarta a tabela do cache
+        """
+        with self._trava:
+            self._remover(chave)
+
+    def _remover(self, chave) -> None:
+        entrada = self._entradas.pop(chave, None)
+        if entrada is not None:
+            self._bytes_ocupados -= entrada[2]
+
+    def estatisticas(self) -> dict:
+        """
+        Retorna contadores de uso do cache
+        """
+        with self._trava:
+            return {
+                "acertos": self.acertos,
+                "faltas": self.faltas,
+                "tabelas": len(self._entradas),
+                "bytes_ocupados": self._bytes_ocupados,
+                "limite_bytes": self._limite_bytes,
+            }
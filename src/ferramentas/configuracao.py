@@ -0,0 +1,41 @@
+import os
+
+# Motor de armazenamento usado pelo BancoDeDados: 'excel' (padrão), 'sqlite' ou 'parquet'
+MOTOR_ARMAZENAMENTO = os.environ.get("MERCADO_MOTOR", "excel").lower()
+
+# Diretório onde as tabelas são persistidas
+DIRETORIO_DADOS = os.environ.get("MERCADO_DIRETORIO_DADOS", os.path.join(os.getcwd(), "data"))
+
+# Memória máxima (em MB) do cache de tabelas compartilhado pelo processo
+LIMITE_CACHE_MB = int(os.environ.get("MERCADO_LIMITE_CACHE_MB", "256"))
+
+# Quantidade de registros no diário de pedidos a partir da qual ele é
+# incorporado à tabela base na inicialização do mercado
+LIMITE_DIARIO_PEDIDOS = int(os.environ.get("MERCADO_LIMITE_DIARIO_PEDIDOS", "1000"))
+
+# Durabilidade das gravações feitas durante o atendimento:
+# 'sincrono' (grava na hora), 'intervalo' (grava em segundo plano a cada
+# MERCADO_INTERVALO_ESCRITA segundos) ou 'ao_sair' (grava só nos checkpoints e ao sair)
+MODO_DURABILIDADE = os.environ.get("MERCADO_DURABILIDADE", "intervalo").lower()
+INTERVALO_ESCRITA = float(os.environ.get("MERCADO_INTERVALO_ESCRITA", "0.5"))
+
+# Pedidos dos últimos dias mantidos em memória pelo mercado; os mais antigos
+# ficam nas partições mensais e só são lidos quando consultados
+JANELA_PEDIDOS_DIAS = int(os.environ.get("MERCADO_JANELA_PEDIDOS_DIAS", "90"))
+
+# Quantidade máxima de pedidos já montados guardados pelo mercado para
+# reaproveitamento entre consultas (os mais antigos em uso são descartados)
+LIMITE_CACHE_PEDIDOS = int(os.environ.get("MERCADO_LIMITE_CACHE_PEDIDOS", "5000"))
+
+# Minutos que um item no carrinho segura o estoque antes da reserva vencer
+VALIDADE_RESERVA_MINUTOS = float(os.environ.get("MERCADO_VALIDADE_RESERVA_MINUTOS", "15"))
+
+# Limite de reposição dos produtos físicos sem limite próprio: com o estoque
+# nesse valor ou abaixo dele, o produto aparece no relatório de reposição
+LIMITE_ESTOQUE_PADRAO = int(os.environ.get("MERCADO_LIMITE_ESTOQUE_PADRAO", "10"))
+
+# Modo serviço (python src/main.py servir): endereço e porta da API JSON e
+# quantidade de threads que executam as operações que podem bloquear (gravações)
+SERVICO_ENDERECO = os.environ.get("MERCADO_SERVICO_ENDERECO", "127.0.0.1")
+SERVICO_PORTA = int(os.environ.get("MERCADO_SERVICO_PORTA", "8080"))
+SERVICO_TRABALHADORES = int(os.environ.get("MERCADO_SERVICO_TRABALHADORES", "8"))
@@ -0,0 +1,241 @@
+import json
+import os
+import time
+import pandas as pd
+from ferramentas import configuracao
+from ferramentas.motores import escrever_atomicamente
+from ferramentas.travas import TravaArquivo, travar_tabela
+
+class Diario:
+    """
+    Diário (journal) append-only de alterações de uma tabela.
+
+    Cada alteração é anexada como uma linha JSON ao arquivo <tabela>.diario.jsonl,
+    sem reescrever a tabela base. A leitura reaplica o diário sobre a base
+    e a compactação incorpora o diário à base e o esvazia.
+
+    A primeira linha do arquivo é um cabeçalho com a geração do diário, que
+    muda a cada compactação: é por ela que um leitor percebe que o diário foi
+    esvaziado (por qualquer processo) e precisa ser relido do início.
+    """
+
+    INSERIR = "inserir"
+    ATUALIZAR = "atualizar"
+
+    def __init__(self, nome_tabela: str, chave: str = "id"):
+        """
+        Inicializa o diário de uma tabela
+
+        Args:
+            nome_tabela: Nome da tabela base
+            chave: Coluna que identifica cada linha
+        """
+        self._nome_tabela = nome_tabela
+        self._chave = chave
+        self._caminho = os.path.join(configuracao.DIRETORIO_DADOS, f"{nome_tabela}.diario.jsonl")
+
+        # Registros já lidos e posição no arquivo até onde foram lidos, para ler só o que foi anexado depois
+        self._registros: list[dict] = []
+        self._posicao = 0
+        self._geracao = None
+
+    @property
+    def caminho(self) -> str:
+        return self._caminho
+
+    @property
+    def geracao(self) -> int | None:
+        """
+        Geração do diário lido por último (muda a cada compactação; None se não há diário)
+        """
+        return self._geracao
+
+    def trava(self) -> TravaArquivo:
+        """
+        Retorna a trava (entre processos) do diário, usada ao anexar e ao compactar
+        """
+        return travar_tabela(f"{self._nome_tabela}.diario")
+
+    def registro_insercao(self, linha: dict) -> dict:
+        """
+        Monta o registro de uma linha completa (nova ou substituída)
+        """
+        return {"op": self.INSERIR, "dados": linha}
+
+    def registro_atualizacao(self, chave, campos: dict) -> dict:
+        """
+        Monta o registro da alteração de alguns campos de uma linha já existente
+
+        Args:
+            chave: Valor da chave da linha alterada
+            campos: Campos alterados e seus novos valores
+        """
+        return {"op": self.ATUALIZAR, "dados": {self._chave: chave, **campos}}
+
+    def registrar_insercao(self, linhas: list[dict]) -> None:
+        """
+        Anexa linhas completas (novas ou substituídas) ao diário
+        """
+        self.anexar([self.registro_insercao(linha) for linha in linhas])
+
+    def registrar_atualizacao(self, chave, campos: dict) -> None:
+        """
+        Anexa a alteração de alguns campos de uma linha já existente
+        """
+        self.anexar([self.registro_atualizacao(chave, campos)])
+
+    def anexar(self, registros: list[dict]) -> None:
+        """
+        Anexa os registros ao diário em uma única escrita
+        """
+        if not registros:
+            return
+        os.makedirs(os.path.dirname(self._caminho), exist_ok=True)
+        conteudo = "".join(json.dumps(registro, default=str) + "\n" for registro in registros)
+        with self.trava(), open(self._caminho, "a", encoding="utf-8") as arquivo:
+            if arquivo.tell() == 0:
+                # Diário novo: a geração inicial não repete a de um diário apagado antes
+                conteudo = self._cabecalho(time.time_ns()) + conteudo
+            arquivo.write(conteudo)
+            arquivo.flush()
+            os.fsync(arquivo.fileno())
+
+    def ler(self) -> list[dict]:
+        """
+        Retorna todos os registros do diário, lendo do disco apenas o trecho novo
+        """
+        try:
+            arquivo = open(self._caminho, "rb")
+        except FileNotFoundError:
+            self._registros, self._posicao, self._geracao = [], 0, None
+            return []
+
+        with arquivo:
+            geracao, inicio = self._ler_cabecalho(arquivo)
+            if geracao is None:
+                # Cabeçalho ainda sendo escrito: o diário ainda não tem registros completos
+                self._registros, self._posicao, self._geracao = [], 0, None
+                return []
+            if geracao != self._geracao or os.fstat(arquivo.fileno()).st_size < self._posicao:
+                # O diário foi compactado (possivelmente por outro processo): relê do início
+                self._registros, self._posicao, self._geracao = [], inicio, geracao
+
+            arquivo.seek(self._posicao)
+            trecho = arquivo.read()
+        if trecho:
+            # Ignora uma última linha incompleta (escrita ainda em andamento)
+            fim = trecho.rfind(b"\n") + 1
+            for linha in trecho[:fim].decode("utf-8").splitlines():
+                if linha.strip():
+                    self._registros.append(json.loads(linha))
+            self._posicao += fim
+
+        return self._registros
+
+    def __len__(self) -> int:
+        return len(self.ler())
+
+    def resumir(self) -> tuple[dict, dict]:
+        """
+        Condensa os registros do diário no estado final de cada chave
+
+        Returns:
+            Tupla (novas, alteracoes): linhas completas vindas do diário e
+            campos alterados de linhas que estão na tabela base
+        """
+        novas = {}        # chave -> linha completa vinda do diário
+        alteracoes = {}   # chave -> campos alterados de linhas da base
+        for registro in self.ler():
+            dados = registro["dados"]
+            chave = dados[self._chave]
+            if registro["op"] == self.INSERIR:
+                novas[chave] = dict(dados)
+                alteracoes.pop(chave, None)
+            elif chave in novas:
+                novas[chave].update(dados)
+            else:
+                alteracoes.setdefault(chave, {}).update(dados)
+        return novas, alteracoes
+
+    def aplicar(self, base: pd.DataFrame, resumo: tuple[dict, dict] | None = None,
+                incluir_novas: bool = True) -> pd.DataFrame:
+        """
+        Reaplica os registros do diário sobre a tabela base
+
+        Args:
+            base: Tabela base (compactada), inteira ou apenas um lote dela
+            resumo: Resultado de resumir(), para não recalculá-lo a cada lote
+            incluir_novas: Se False, as linhas que vieram do diário não são
+                           anexadas (útil ao percorrer a base em lotes)
+
+        Returns:
+            Tabela com o estado atual
+        """
+        novas, alteracoes = resumo if resumo is not None else self.resumir()
+        if not novas and not alteracoes:
+            return base
+
+        if base.empty:
+            base = pd.DataFrame(columns=[self._chave])
+        else:
+            base = base[~base[self._chave].isin(list(novas))].copy()
+
+        if alteracoes:
+            posicoes = pd.Index(base[self._chave]).get_indexer(list(alteracoes))
+            for posicao, campos in zip(posicoes, alteracoes.values()):
+                if posicao < 0:
+                    continue  # Linha fora da base (ex.: removida pelo filtro da leitura)
+                for coluna, valor in campos.items():
+                    if coluna not in base.columns:
+                        base[coluna] = None
+                    base.iloc[posicao, base.columns.get_loc(coluna)] = valor
+
+        if novas and incluir_novas:
+            novas_df = pd.DataFrame(list(novas.values()))
+            base = novas_df if base.empty else pd.concat([base, novas_df], ignore_index=True)
+        return base.reset_index(drop=True)
+
+    def limpar(self) -> None:
+        """
+        Esvazia o diário (após sua incorporação à tabela base), deixando só o
+        cabeçalho com a próxima geração. Deve ser chamado com a trava do diário adquirida.
+        """
+        try:
+            with open(self._caminho, "rb") as arquivo:
+                geracao, _ = self._ler_cabecalho(arquivo)
+        except FileNotFoundError:
+            self._registros, self._posicao, self._geracao = [], 0, None
+            return
+
+        cabecalho = self._cabecalho((geracao or 0) + 1)
+
+        def escrever(caminho):
+            with open(caminho, "w", encoding="utf-8") as arquivo:
+                arquivo.write(cabecalho)
+                arquivo.flush()
+                os.fsync(arquivo.fileno())
+
+        escrever_atomicamente(self._caminho, escrever)
+        self._registros, self._posicao, self._geracao = [], len(cabecalho.encode("utf-8")), (geracao or 0) + 1
+
+    @staticmethod
+    def _cabecalho(geracao: int) -> str:
+        return json.dumps({"geracao": geracao}) + "\n"
+
+    @staticmethod
+    def _ler_cabecalho(arquivo) -> tuple[int | None, int]:
+        """
+        Lê a geração no início do arquivo aberto
+
+        Returns:
+            Tupla (geração, posição do primeiro registro). A geração é None se o
+            cabeçalho ainda está incompleto, e 0 nos diários de versões anteriores,
+            que não têm cabeçalho
+        """
+        linha = arquivo.readline()
+        if not linha.endswith(b"\n"):
+            return None, 0
+        dados = json.loads(linha)
+        if "geracao" not in dados:
+            return 0, 0
+        return dados["geracao"], len(linha)
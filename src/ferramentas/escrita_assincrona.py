@@ -0,0 +1,142 @@
+import atexit
+import threading
+import time
+from rich.console import Console
+from ferramentas import configuracao
+
+class EscritorAssincrono:
+    """
+    Grava em segundo plano (write-behind) as alterações agendadas, juntando as
+    gravações repetidas da mesma chave em uma só.
+
+    Modos de durabilidade:
+        sincrono: grava imediatamente, na thread de quem agendou
+        intervalo: uma thread grava as alterações acumuladas a cada intervalo
+        ao_sair: grava apenas nos checkpoints explícitos e ao encerrar o programa
+    """
+
+    SINCRONO = "sincrono"
+    INTERVALO = "intervalo"
+    AO_SAIR = "ao_sair"
+    MODOS = [SINCRONO, INTERVALO, AO_SAIR]
+
+    def __init__(self, modo: str | None = None, intervalo: float | None = None):
+        """
+        Inicializa o escritor
+
+        Args:
+            modo: Modo de durabilidade (padrão: o da configuração)
+            intervalo: Segundos de espera para acumular uma rajada de gravações
+                       antes de gravá-las (modo 'intervalo')
+        """
+        self._modo = (modo or configuracao.MODO_DURABILIDADE).lower()
+        if self._modo not in self.MODOS:
+            raise ValueError(f"Modo de durabilidade inválido. Use um dos seguintes: {', '.join(self.MODOS)}")
+        self._intervalo = intervalo if intervalo is not None else configuracao.INTERVALO_ESCRITA
+
+        self._pendentes: dict = {}  # chave -> função de gravação (a mais recente)
+        self._trava = threading.Lock()
+        self._trava_execucao = threading.Lock()
+        self._evento = threading.Event()
+        self._encerrado = False
+        self.gravacoes_agendadas = 0
+        self.gravacoes_executadas = 0
+
+        self._thread = None
+        if self._modo == self.INTERVALO:
+            self._thread = threading.Thread(target=self._executar, name="escritor-assincrono", daemon=True)
+            self._thread.start()
+        atexit.register(self.encerrar)
+
+    @property
+    def modo(self) -> str:
+        return self._modo
+
+    @property
+    def sincrono(self) -> bool:
+        return self._modo == self.SINCRONO
+
+    def agendar(self, chave, gravar) -> None:
+        """
+        Agenda uma gravação. Se já houver uma gravação pendente com a mesma
+        chave, ela é substituída pela nova.
+
+        Args:
+            chave: Identifica o que será gravado (ex.: ("produto", 3))
+            gravar: Função sem argumentos que faz a gravação
+
+        Raises:
+            Exception: O erro da gravação, no modo sincrono ou depois de encerrado,
+                       quando ela é feita na hora, na thread de quem agendou
+        """
+        self.gravacoes_agendadas += 1
+        if self.sincrono or self._encerrado:
+            self._gravar(gravar)
+            return
+
+        with self._trava:
+            self._pendentes[chave] = gravar
+        self._evento.set()
+
+    def descarregar(self, propagar: bool = False) -> None:
+        """
+        Grava imediatamente tudo o que está pendente (checkpoint). As gravações
+        que falham voltam a ficar pendentes, para a próxima descarga tentar de novo.
+
+        Args:
+            propagar: Se True, o primeiro erro é relançado depois de tentadas todas
+                      as gravações; senão, os erros só são avisados no terminal
+
+        Raises:
+            Exception: O primeiro erro de gravação, se propagar for True
+        """
+        primeiro_erro = None
+        with self._trava_execucao:
+            with self._trava:
+                pendentes, self._pendentes = self._pendentes, {}
+            for chave, gravar in pendentes.items():
+                try:
+                    self._gravar(gravar)
+                except Exception as erro:
+                    with self._trava:
+                        # Uma gravação mais nova da mesma chave, agendada enquanto isso, a substitui
+                        self._pendentes.setdefault(chave, gravar)
+                    if not propagar:
+                        # Em segundo plano não há a quem propagar o erro: avisa no terminal
+                        Console().print(f"[bold red]Erro ao gravar alterações: {erro}[/]")
+                    elif primeiro_erro is None:
+                        primeiro_erro = erro
+        if primeiro_erro is not None:
+            raise primeiro_erro
+
+    def _gravar(self, gravar) -> None:
+        gravar()
+        self.gravacoes_executadas += 1
+
+    def _executar(self) -> None:
+        # A condição é reavaliada a cada volta: encerrar() pode ter sido chamado
+        # durante o intervalo, e o clear() abaixo apagaria o seu aviso
+        while not self._encerrado:
+            self._evento.wait()
+            if self._encerrado:
+                return
+            # Espera o intervalo para acumular a rajada de alterações em uma gravação só
+            time.sleep(self._intervalo)
+            self._evento.clear()
+            self.descarregar()
+
+    def encerrar(self) -> None:
+        """
+        Grava o que estiver pendente e encerra a thread de gravação
+
+        Raises:
+            Exception: O primeiro erro da gravação final, que não terá outra tentativa
+        """
+        if self._encerrado:
+            return
+        self._encerrado = True
+        self._evento.set()
+        if self._thread is not None:
+            self._thread.join()
+        atexit.unregister(self.encerrar)
+        self.descarregar(propagar=True)
@@ -0,0 +1,82 @@
+import pandas as pd
+from rich.console import Console
+from ferramentas.banco_de_dados import BancoDeDados
+from ferramentas.diario import Diario
+from ferramentas.particoes import TabelaParticionada
+
+TABELAS_SISTEMA = ["usuarios", "produtos", "pedidos"]
+
+def migrar_tabelas(origem: str = "excel", destino: str = "parquet", tabelas: list[str] | None = None) -> dict[str, int]:
+    """
+    Copia as tabelas do sistema de um motor de armazenamento para outro
+
+    Args:
+        origem: Motor onde as tabelas estão hoje (ex.: 'excel')
+        destino: Motor para onde as tabelas serão copiadas (ex.: 'parquet')
+        tabelas: Tabelas a migrar (padrão: usuarios, produtos e pedidos)
+
+    Returns:
+        Dicionário com a quantidade de linhas migradas por tabela
+    """
+    if origem == destino:
+        raise ValueError("O motor de origem e o de destino devem ser diferentes.")
+
+    banco_origem = BancoDeDados(origem)
+    banco_destino = BancoDeDados(destino)
+    console = Console()
+
+    linhas_migradas = {}
+    for nome_tabela in tabelas or TABELAS_SISTEMA:
+        # O diário não depende do motor: o que estiver nele precisa entrar na origem antes da cópia
+        incorporadas = _incorporar_diario(banco_origem, nome_tabela)
+        if incorporadas:
+            console.print(f"[blue]Diário de '{nome_tabela}' incorporado em '{origem}': {incorporadas} linhas.[/]")
+
+        # Tabelas divididas em partições são copiadas partição por partição, junto com o manifesto
+        particionada = TabelaParticionada(nome_tabela, banco=banco_origem)
+        if particionada.particionada:
+            linhas_migradas[nome_tabela] = particionada.copiar_para(banco_destino)
+            console.print(f"[green]Tabela '{nome_tabela}' migrada: {linhas_migradas[nome_tabela]} linhas "
+                          f"em {len(particionada.tabelas())} partições ({origem} -> {destino}).[/]")
+            continue
+
+        if not banco_origem.existe_tabela(nome_tabela):
+            console.print(f"[yellow]Tabela '{nome_tabela}' não encontrada em '{origem}', ignorando.[/]")
+            continue
+
+        dados = banco_origem.carregar_tabela(nome_tabela)
+        banco_destino.salvar_tabela(dados, nome_tabela)
+        linhas_migradas[nome_tabela] = len(dados)
+        console.print(f"[green]Tabela '{nome_tabela}' migrada: {len(dados)} linhas ({origem} -> {destino}).[/]")
+
+    return linhas_migradas
+
+
+def _incorporar_diario(banco: BancoDeDados, nome_tabela: str) -> int:
+    """
+    Incorpora à tabela no motor de origem as alterações pendentes no diário dela e o esvazia.
+
+    Sem isso, o diário (que fica fora do motor) seria reaplicado no destino sobre partições
+    copiadas sem as linhas dele, e as novas alterações iriam para um motor desatualizado.
+
+    Returns:
+        Quantidade de linhas novas ou alteradas incorporadas (0 se o diário estava vazio)
+    """
+    diario = Diario(nome_tabela)
+    if not len(diario):
+        return 0
+
+    with banco.travar_tabela(nome_tabela), diario.trava():
+        # Usa a configuração do manifesto para manter os resumos das partições (ex.: contagem por status)
+        particionada = TabelaParticionada.existente(nome_tabela, banco)
+        if particionada.particionada:
+            return particionada.incorporar_diario(diario)
+
+        # Tabela única, ainda não particionada
+        novas, alteracoes = diario.resumir()
+        if not novas and not alteracoes:
+            return 0
+        base = banco.carregar_tabela(nome_tabela) if banco.existe_tabela(nome_tabela) else pd.DataFrame()
+        banco.salvar_tabela(diario.aplicar(base, (novas, alteracoes)), nome_tabela)
+        diario.limpar()
+        return len(novas) + len(alteracoes)
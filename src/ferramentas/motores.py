@@ -0,0 +1,598 @@
+from abc import ABC, abstractmethod
+import os
+import sqlite3
+import pandas as pd
+
+try:
+    import xlsxwriter
+except ImportError:  # Sem o xlsxwriter, a escrita usa o modo write_only do openpyxl
+    xlsxwriter = None
+
+try:
+    import python_calamine
+except ImportError:  # Sem o calamine, a leitura usa o modo read_only do openpyxl
+    python_calamine = None
+
+# Operadores aceitos nos filtros: lista de tuplas (coluna, operador, valor),
+# no mesmo formato usado pelo pyarrow
+OPERADORES_FILTRO = {
+    "==": lambda serie, valor: serie == valor,
+    "!=": lambda serie, valor: serie != valor,
+    "<": lambda serie, valor: serie < valor,
+    "<=": lambda serie, valor: serie <= valor,
+    ">": lambda serie, valor: serie > valor,
+    ">=": lambda serie, valor: serie >= valor,
+    "in": lambda serie, valor: serie.isin(list(valor)),
+}
+
+
+def aplicar_filtros(tabela: pd.DataFrame, colunas: list[str] | None = None,
+                    filtros: list[tuple] | None = None) -> pd.DataFrame:
+    """
+    Aplica em memória os filtros e a seleção de colunas sobre uma tabela já carregada
+
+    Args:
+        tabela: DataFrame carregado
+        colunas: Colunas a manter (todas se None)
+        filtros: Lista de tuplas (coluna, operador, valor)
+
+    Returns:
+        DataFrame filtrado
+    """
+    if tabela.empty:
+        return tabela
+    if filtros:
+        mascara = pd.Series(True, index=tabela.index)
+        for coluna, operador, valor in filtros:
+            mascara &= OPERADORES_FILTRO[operador](tabela[coluna], valor)
+        tabela = tabela[mascara].reset_index(drop=True)
+    if colunas is not None:
+        tabela = tabela[[coluna for coluna in colunas if coluna in tabela.columns]]
+    return tabela
+
+
+def escrever_atomicamente(caminho: str, escrever) -> None:
+    """
+    Escreve o arquivo em um temporário no mesmo diretório e o renomeia sobre o
+    destino, de modo que leitores nunca vejam um arquivo pela metade
+
+    Args:
+        caminho: Caminho final do arquivo
+        escrever: Função que recebe o caminho temporário e grava o conteúdo nele
+    """
+    base, extensao = os.path.splitext(caminho)
+    # Mantém a extensão para que o pandas escolha o formato correto
+    caminho_temporario = f"{base}.{os.getpid()}.tmp{extensao}"
+    try:
+        escrever(caminho_temporario)
+        os.replace(caminho_temporario, caminho)
+    finally:
+        if os.path.exists(caminho_temporario):
+            os.remove(caminho_temporario)
+
+
+def assinatura_arquivos(*caminhos: str) -> tuple | None:
+    """
+    Retorna (mtime, tamanho) de cada arquivo existente, ou None se nenhum existir
+    """
+    assinatura = []
+    for caminho in caminhos:
+        try:
+            estado = os.stat(caminho)
+        except FileNotFoundError:
+            continue
+        assinatura.append((estado.st_mtime_ns, estado.st_size))
+    return tuple(assinatura) or None
+
+
+class MotorArmazenamento(ABC):
+    """
+    Interface comum dos motores de armazenamento usados pelo BancoDeDados
+    """
+
+    # Indica se o motor aplica filtros e seleção de colunas já na leitura
+    FILTRA_NA_LEITURA = False
+    # Indica se o motor grava linhas isoladas com segurança, sem reescrever a tabela
+    ESCRITA_POR_LINHA = False
+
+    def __init__(self, caminho_diretorio: str):
+        """
+        Inicializa o motor
+
+        Args:
+            caminho_diretorio: Diretório onde as tabelas são persistidas
+        """
+        self._caminho_diretorio = caminho_diretorio
+
+    @abstractmethod
+    def salvar_tabela(self, dados: pd.DataFrame, nome_tabela: str) -> None:
+        """
+        Substitui todo o conteúdo da tabela pelos dados informados
+        """
+        pass
+
+    @abstractmethod
+    def carregar_tabela(self, nome_tabela: str, colunas: list[str] | None = None,
+                        filtros: list[tuple] | None = None) -> pd.DataFrame:
+        """
+        Carrega a tabela, opcionalmente apenas algumas colunas e as linhas que
+        satisfazem os filtros. Retorna um DataFrame vazio se ela não existir
+        """
+        pass
+
+    def existe_tabela(self, nome_tabela: str) -> bool:
+        """
+        Indica se a tabela já foi gravada por este motor
+        """
+        return not self.carregar_tabela(nome_tabela).empty
+
+    @abstractmethod
+    def arquivos(self, nome_tabela: str) -> list[str]:
+        """
+        Retorna os arquivos em disco onde a tabela está guardada
+        """
+        pass
+
+    @abstractmethod
+    def assinatura(self, nome_tabela: str) -> tuple | None:
+        """
+        Retorna um valor que muda sempre que o arquivo da tabela é alterado
+        (usado para validar o cache), ou None se a tabela não existir
+        """
+        pass
+
+    def remover_tabela(self, nome_tabela: str) -> None:
+        """
+        Remove a tabela. Implementação padrão: apaga os arquivos da tabela.
+        """
+        for caminho in self.arquivos(nome_tabela):
+            if os.path.exists(caminho):
+                os.remove(caminho)
+
+    def iterar_tabela(self, nome_tabela: str, tamanho_lote: int, colunas: list[str] | None = None,
+                      filtros: list[tuple] | None = None):
+        """
+        Percorre a tabela em lotes de até tamanho_lote linhas (antes dos filtros).
+
+        A implementação padrão carrega a tabela inteira; motores que conseguem ler
+        o arquivo aos poucos devem sobrescrever este método.
+        """
+        tabela = self.carregar_tabela(nome_tabela, colunas, filtros)
+        for inicio in range(0, len(tabela), tamanho_lote):
+            yield tabela.iloc[inicio:inicio + tamanho_lote].reset_index(drop=True)
+
+    def upsert_linhas(self, dados: pd.DataFrame, nome_tabela: str, chave: str = "id") -> None:
+        """
+        Insere ou atualiza as linhas informadas, identificadas pela coluna chave.
+
+        A implementação padrão reescreve a tabela inteira; motores com suporte
+        a escrita por linha devem sobrescrever este método.
+        """
+        tabela = self.carregar_tabela(nome_tabela)
+        if not tabela.empty:
+            tabela = tabela[~tabela[chave].isin(dados[chave])]
+            dados = pd.concat([tabela, dados], ignore_index=True)
+        self.salvar_tabela(dados, nome_tabela)
+
+    def remover_linhas(self, nome_tabela: str, chaves: list, chave: str = "id") -> None:
+        """
+        Remove as linhas cujas chaves estão na lista informada
+        """
+        tabela = self.carregar_tabela(nome_tabela)
+        if tabela.empty:
+            return
+        self.salvar_tabela(tabela[~tabela[chave].isin(chaves)], nome_tabela)
+
+    def aplicar_alteracoes(self, nome_tabela: str, gravar: pd.DataFrame, remover: list, chave: str = "id") -> None:
+        """
+        Insere ou atualiza as linhas de gravar e remove as chaves de remover, em uma única escrita.
+
+        A implementação padrão reescreve a tabela inteira uma vez; motores com
+        suporte a escrita por linha devem sobrescrever este método.
+        """
+        tabela = self.carregar_tabela(nome_tabela)
+        if not tabela.empty:
+            tabela = tabela[~tabela[chave].isin(remover) & ~tabela[chave].isin(gravar[chave])]
+            gravar = pd.concat([tabela, gravar], ignore_index=True) if not gravar.empty else tabela
+        self.salvar_tabela(gravar.reset_index(drop=True), nome_tabela)
+
+    def selecionar_por_chave(self, nome_tabela: str, chaves: list, chave: str = "id") -> pd.DataFrame:
+        """
+        Retorna apenas as linhas cujas chaves estão na lista informada
+        (sem linhas, mas com a coluna chave, se nenhuma for encontrada)
+        """
+        tabela = self.carregar_tabela(nome_tabela)
+        if tabela.empty:
+            return pd.DataFrame(columns=[chave]) if chave not in tabela.columns else tabela
+        return tabela[tabela[chave].isin(chaves)].reset_index(drop=True)
+
+
+class MotorExcel(MotorArmazenamento):
+    """
+    Motor que guarda cada tabela em um arquivo .xlsx.
+
+    A escrita grava as linhas em sequência, sem montar a planilha inteira na
+    memória (xlsxwriter em modo constant_memory), e a leitura usa o calamine,
+    bem mais rápido que o leitor padrão. Sem essas bibliotecas, usa os modos
+    write_only e read_only do openpyxl, que também não montam a planilha inteira.
+    """
+
+    # Linhas convertidas por vez para tipos nativos antes de irem para a planilha
+    LINHAS_POR_BLOCO = 10_000
+
+    def _caminho(self, nome_tabela: str) -> str:
+        # Adiciona extensão .xlsx se não tiver
+        if not nome_tabela.endswith('.xlsx'):
+            nome_tabela += '.xlsx'
+        return os.path.join(self._caminho_diretorio, nome_tabela)
+
+    def salvar_tabela(self, dados: pd.DataFrame, nome_tabela: str) -> None:
+        escrever_atomicamente(self._caminho(nome_tabela), lambda caminho: self._escrever_planilha(caminho, dados))
+
+    def _linhas_nativas(self, dados: pd.DataFrame):
+        """
+        Percorre as linhas com NaN convertido em None e tipos do numpy em tipos
+        nativos, convertendo um bloco por vez para não duplicar a tabela na memória
+        """
+        for inicio in range(0, len(dados), self.LINHAS_POR_BLOCO):
+            bloco = dados.iloc[inicio:inicio + self.LINHAS_POR_BLOCO]
+            bloco = bloco.astype(object).where(bloco.notna(), None)
+            for linha in bloco.itertuples(index=False, name=None):
+                yield [valor.item() if hasattr(valor, "item") else valor for valor in linha]
+
+    def _escrever_planilha(self, caminho: str, dados: pd.DataFrame) -> None:
+        cabecalho = [str(coluna) for coluna in dados.columns]
+
+        if xlsxwriter is None:
+            from openpyxl import Workbook
+            livro = Workbook(write_only=True)
+            planilha = livro.create_sheet()
+            planilha.append(cabecalho)
+            for linha in self._linhas_nativas(dados):
+                planilha.append(linha)
+            livro.save(caminho)
+            return
+
+        # Em constant_memory cada linha vai para o disco quando a seguinte começa; os textos
+        # são gravados como estão (sem virar fórmula ou hyperlink)
+        livro = xlsxwriter.Workbook(caminho, {"constant_memory": True, "strings_to_formulas": False,
+                                              "strings_to_urls": False,
+                                              "default_date_format": "yyyy-mm-dd hh:mm:ss"})
+        try:
+            planilha = livro.add_worksheet()
+            planilha.write_row(0, 0, cabecalho)
+            for numero_linha, linha in enumerate(self._linhas_nativas(dados), start=1):
+                planilha.write_row(numero_linha, 0, linha)
+        finally:
+            livro.close()
+
+    def carregar_tabela(self, nome_tabela: str, colunas: list[str] | None = None,
+                        filtros: list[tuple] | None = None) -> pd.DataFrame:
+        caminho_arquivo = self._caminho(nome_tabela)
+        if not os.path.exists(caminho_arquivo):
+            return pd.DataFrame()
+        # O Excel não permite ler só parte do arquivo, então os filtros são aplicados em memória
+        motor_leitura = "calamine" if python_calamine is not None else None
+        return aplicar_filtros(pd.read_excel(caminho_arquivo, engine=motor_leitura), colunas, filtros)
+
+    def iterar_tabela(self, nome_tabela: str, tamanho_lote: int, colunas: list[str] | None = None,
+                      filtros: list[tuple] | None = None):
+        caminho_arquivo = self._caminho(nome_tabela)
+        if not os.path.exists(caminho_arquivo):
+            return
+
+        linhas, fechar = self._abrir_linhas(caminho_arquivo)
+        try:
+            cabecalho = next(linhas, None)
+            if cabecalho is None:
+                return
+            lote = []
+            for linha in linhas:
+                lote.append(linha)
+                if len(lote) == tamanho_lote:
+                    yield aplicar_filtros(pd.DataFrame(lote, columns=cabecalho), colunas, filtros)
+                    lote = []
+            if lote:
+                yield aplicar_filtros(pd.DataFrame(lote, columns=cabecalho), colunas, filtros)
+        finally:
+            fechar()
+
+    @staticmethod
+    def _abrir_linhas(caminho_arquivo: str):
+        """
+        Abre a primeira planilha do arquivo para leitura linha a linha
+
+        Returns:
+            Tupla (iterador de linhas, função que fecha o arquivo)
+        """
+        if python_calamine is not None:
+            livro = python_calamine.CalamineWorkbook.from_path(caminho_arquivo)
+            linhas = livro.get_sheet_by_index(0).iter_rows()
+            # O calamine devolve números como float e células vazias como "", como o pandas faria na leitura
+            convertidas = ([None if valor == "" else
+                            int(valor) if isinstance(valor, float) and valor.is_integer() else valor
+                            for valor in linha] for linha in linhas)
+            return convertidas, livro.close
+
+        # O modo somente leitura do openpyxl percorre a planilha sem montá-la inteira na memória
+        from openpyxl import load_workbook
+        livro = load_workbook(caminho_arquivo, read_only=True)
+        return livro.active.iter_rows(values_only=True), livro.close
+
+    def existe_tabela(self, nome_tabela: str) -> bool:
+        return os.path.exists(self._caminho(nome_tabela))
+
+    def arquivos(self, nome_tabela: str) -> list[str]:
+        return [self._caminho(nome_tabela)]
+
+    def assinatura(self, nome_tabela: str) -> tuple | None:
+        return assinatura_arquivos(self._caminho(nome_tabela))
+
+
+class MotorParquet(MotorArmazenamento):
+    """
+    Motor colunar que guarda cada tabela em um arquivo .parquet.
+    Lê apenas as colunas pedidas e aplica os filtros já na leitura do arquivo.
+    """
+
+    FILTRA_NA_LEITURA = True
+
+    def _caminho(self, nome_tabela: str) -> str:
+        return os.path.join(self._caminho_diretorio, nome_tabela + '.parquet')
+
+    def salvar_tabela(self, dados: pd.DataFrame, nome_tabela: str) -> None:
+        escrever_atomicamente(self._caminho(nome_tabela), lambda caminho: dados.to_parquet(caminho, index=False))
+
+    def carregar_tabela(self, nome_tabela: str, colunas: list[str] | None = None,
+                        filtros: list[tuple] | None = None) -> pd.DataFrame:
+        caminho_arquivo = self._caminho(nome_tabela)
+        if not os.path.exists(caminho_arquivo):
+            return pd.DataFrame()
+        return pd.read_parquet(caminho_arquivo, columns=colunas, filters=filtros or None)
+
+    def iterar_tabela(self, nome_tabela: str, tamanho_lote: int, colunas: list[str] | None = None,
+                      filtros: list[tuple] | None = None):
+        caminho_arquivo = self._caminho(nome_tabela)
+        if not os.path.exists(caminho_arquivo):
+            return
+
+        import pyarrow.parquet as pq
+        arquivo = pq.ParquetFile(caminho_arquivo)
+        # Lê só as colunas pedidas e as usadas nos filtros
+        colunas_lidas = None
+        if colunas is not None:
+            colunas_lidas = list(dict.fromkeys([*colunas, *(filtro[0] for filtro in filtros or [])]))
+        for lote in arquivo.iter_batches(batch_size=tamanho_lote, columns=colunas_lidas):
+            yield aplicar_filtros(lote.to_pandas(), colunas, filtros)
+
+    def existe_tabela(self, nome_tabela: str) -> bool:
+        return os.path.exists(self._caminho(nome_tabela))
+
+    def arquivos(self, nome_tabela: str) -> list[str]:
+        return [self._caminho(nome_tabela)]
+
+    def assinatura(self, nome_tabela: str) -> tuple | None:
+        return assinatura_arquivos(self._caminho(nome_tabela))
+
+
+class MotorSQLite(MotorArmazenamento):
+    """
+    Motor que guarda todas as tabelas em um único banco SQLite,
+    permitindo gravar e remover linhas individualmente
+    """
+
+    NOME_ARQUIVO = "mercado.db"
+    FILTRA_NA_LEITURA = True
+    ESCRITA_POR_LINHA = True
+    # O SQLite limita os parâmetros por comando (SQLITE_MAX_VARIABLE_NUMBER, 999 em versões antigas):
+    # listas de IN maiores que isso vão para uma tabela temporária da conexão
+    LIMITE_PARAMETROS = 900
+
+    def __init__(self, caminho_diretorio: str):
+        super().__init__(caminho_diretorio)
+        self._caminho_banco = os.path.join(caminho_diretorio, self.NOME_ARQUIVO)
+
+    def _conectar(self) -> sqlite3.Connection:
+        # O timeout faz o processo esperar (em vez de falhar) quando outro está gravando
+        conexao = sqlite3.connect(self._caminho_banco, timeout=30)
+        conexao.execute("PRAGMA journal_mode=WAL")
+        return conexao
+
+    @staticmethod
+    def _tipo_coluna(serie: pd.Series) -> str:
+        if pd.api.types.is_integer_dtype(serie) or pd.api.types.is_bool_dtype(serie):
+            return "INTEGER"
+        if pd.api.types.is_float_dtype(serie):
+            return "REAL"
+        return "TEXT"
+
+    @staticmethod
+    def _nativo(valor):
+        # O sqlite3 não aceita tipos do numpy como parâmetro
+        return valor.item() if hasattr(valor, "item") else valor
+
+    @staticmethod
+    def _nulo(valor) -> bool:
+        return valor is None or valor is pd.NA or valor is pd.NaT or (isinstance(valor, float) and valor != valor)
+
+    @classmethod
+    def _linhas(cls, dados: pd.DataFrame) -> list[tuple]:
+        # Converte NaN em NULL e tipos do numpy em tipos nativos do Python, valor a valor:
+        # a maioria das gravações é de poucas linhas, em que converter o DataFrame inteiro custa mais
+        colunas = [dados[coluna].tolist() for coluna in dados.columns]
+        return [tuple(None if cls._nulo(v) else cls._nativo(v) for v in linha) for linha in zip(*colunas)]
+
+    def _existe(self, conexao: sqlite3.Connection, nome_tabela: str) -> bool:
+        cursor = conexao.execute("SELECT 1 FROM sqlite_master WHERE type='table' AND name=?", (nome_tabela,))
+        return cursor.fetchone() is not None
+
+    def _garantir_tabela(self, conexao: sqlite3.Connection, dados: pd.DataFrame, nome_tabela: str, chave: str) -> None:
+        """
+        Cria a tabela (com a chave primária) ou adiciona colunas novas que ainda não existam
+        """
+        if not self._existe(conexao, nome_tabela):
+            colunas = []
+            for coluna in dados.columns:
+                definicao = f'"{coluna}" {self._tipo_coluna(dados[coluna])}'
+                if coluna == chave:
+                    definicao += " PRIMARY KEY"
+                colunas.append(definicao)
+            conexao.execute(f'CREATE TABLE "{nome_tabela}" ({", ".join(colunas)})')
+            return
+
+        existentes = {linha[1] for linha in conexao.execute(f'PRAGMA table_info("{nome_tabela}")')}
+        for coluna in dados.columns:
+            if coluna not in existentes:
+                conexao.execute(f'ALTER TABLE "{nome_tabela}" ADD COLUMN "{coluna}" {self._tipo_coluna(dados[coluna])}')
+
+    def salvar_tabela(self, dados: pd.DataFrame, nome_tabela: str, chave: str = "id") -> None:
+        with self._conectar() as conexao:
+            conexao.execute(f'DROP TABLE IF EXISTS "{nome_tabela}"')
+            if not dados.columns.empty:
+                self._garantir_tabela(conexao, dados, nome_tabela, chave)
+                self._inserir(conexao, dados, nome_tabela, "INSERT")
+        conexao.close()
+
+    def carregar_tabela(self, nome_tabela: str, colunas: list[str] | None = None,
+                        filtros: list[tuple] | None = None) -> pd.DataFrame:
+        if not os.path.exists(self._caminho_banco):
+            return pd.DataFrame()
+
+        with self._conectar() as conexao:
+            if not self._existe(conexao, nome_tabela):
+                tabela = pd.DataFrame()
+            else:
+                consulta, parametros = self._montar_consulta(conexao, nome_tabela, colunas, filtros)
+                tabela = pd.read_sql_query(consulta, conexao, params=parametros)
+        conexao.close()
+        return tabela
+
+    def iterar_tabela(self, nome_tabela: str, tamanho_lote: int, colunas: list[str] | None = None,
+                      filtros: list[tuple] | None = None):
+        if not os.path.exists(self._caminho_banco):
+            return
+
+        conexao = self._conectar()
+        try:
+            if not self._existe(conexao, nome_tabela):
+                return
+            consulta, parametros = self._montar_consulta(conexao, nome_tabela, colunas, filtros)
+            cursor = conexao.execute(consulta, parametros)
+            nomes_colunas = [descricao[0] for descricao in cursor.description]
+            while True:
+                linhas = cursor.fetchmany(tamanho_lote)
+                if not linhas:
+                    break
+                yield pd.DataFrame(linhas, columns=nomes_colunas)
+        finally:
+            conexao.close()
+
+    def _lista_in(self, conexao: sqlite3.Connection, valores: list, nome: str) -> tuple[str, list]:
+        """
+        Monta a lista de um IN: "(?, ?, ...)" com os valores como parâmetros ou, acima
+        de LIMITE_PARAMETROS valores, uma subconsulta a uma tabela temporária da conexão
+
+        Returns:
+            Tupla (trecho SQL entre parênteses, parâmetros do trecho)
+        """
+        valores = [self._nativo(valor) for valor in valores]
+        if len(valores) <= self.LIMITE_PARAMETROS:
+            return f'({", ".join("?" for _ in valores)})', valores
+        conexao.execute(f'DROP TABLE IF EXISTS temp."{nome}"')
+        conexao.execute(f'CREATE TEMP TABLE "{nome}" (valor)')
+        conexao.executemany(f'INSERT INTO temp."{nome}" VALUES (?)', [(valor,) for valor in valores])
+        return f'(SELECT valor FROM temp."{nome}")', []
+
+    def _montar_consulta(self, conexao: sqlite3.Connection, nome_tabela: str, colunas: list[str] | None,
+                         filtros: list[tuple] | None) -> tuple[str, list]:
+        """
+        Monta o SELECT com a seleção de colunas e os filtros convertidos em WHERE
+        """
+        selecao = ", ".join(f'"{coluna}"' for coluna in colunas) if colunas else "*"
+        condicoes, parametros = [], []
+        for posicao, (coluna, operador, valor) in enumerate(filtros or []):
+            if operador not in OPERADORES_FILTRO:
+                raise ValueError(f"Operador de filtro inválido: {operador}")
+            if operador == "in":
+                lista, valores = self._lista_in(conexao, valor, f"filtro_{posicao}")
+                condicoes.append(f'"{coluna}" IN {lista}')
+                parametros.extend(valores)
+            else:
+                condicoes.append(f'"{coluna}" {"=" if operador == "==" else operador} ?')
+                parametros.append(self._nativo(valor))
+        where = f" WHERE {' AND '.join(condicoes)}" if condicoes else ""
+        return f'SELECT {selecao} FROM "{nome_tabela}"{where}', parametros
+
+    def existe_tabela(self, nome_tabela: str) -> bool:
+        if not os.path.exists(self._caminho_banco):
+            return False
+        with self._conectar() as conexao:
+            existe = self._existe(conexao, nome_tabela)
+        conexao.close()
+        return existe
+
+    def remover_tabela(self, nome_tabela: str) -> None:
+        if not os.path.exists(self._caminho_banco):
+            return
+        with self._conectar() as conexao:
+            conexao.execute(f'DROP TABLE IF EXISTS "{nome_tabela}"')
+        conexao.close()
+
+    def arquivos(self, nome_tabela: str) -> list[str]:
+        # Todas as tabelas ficam no mesmo banco
+        return [self._caminho_banco, self._caminho_banco + "-wal"]
+
+    def assinatura(self, nome_tabela: str) -> tuple | None:
+        # As escritas vão primeiro para o arquivo -wal, então ele também entra na assinatura
+        return assinatura_arquivos(self._caminho_banco, self._caminho_banco + "-wal")
+
+    def _inserir(self, conexao: sqlite3.Connection, dados: pd.DataFrame, nome_tabela: str, comando: str) -> None:
+        colunas = ", ".join(f'"{coluna}"' for coluna in dados.columns)
+        marcadores = ", ".join("?" for _ in dados.columns)
+        conexao.executemany(f'{comando} INTO "{nome_tabela}" ({colunas}) VALUES ({marcadores})', self._linhas(dados))
+
+    def upsert_linhas(self, dados: pd.DataFrame, nome_tabela: str, chave: str = "id") -> None:
+        if dados.empty:
+            return
+        with self._conectar() as conexao:
+            self._garantir_tabela(conexao, dados, nome_tabela, chave)
+            self._inserir(conexao, dados, nome_tabela, "INSERT OR REPLACE")
+        conexao.close()
+
+    def remover_linhas(self, nome_tabela: str, chaves: list, chave: str = "id") -> None:
+        if not chaves or not os.path.exists(self._caminho_banco):
+            return
+        with self._conectar() as conexao:
+            if self._existe(conexao, nome_tabela):
+                conexao.executemany(f'DELETE FROM "{nome_tabela}" WHERE "{chave}" = ?', [(self._nativo(c),) for c in chaves])
+        conexao.close()
+
+    def aplicar_alteracoes(self, nome_tabela: str, gravar: pd.DataFrame, remover: list, chave: str = "id") -> None:
+        # Uma única transação para as gravações e as remoções
+        with self._conectar() as conexao:
+            if not gravar.empty:
+                self._garantir_tabela(conexao, gravar, nome_tabela, chave)
+                self._inserir(conexao, gravar, nome_tabela, "INSERT OR REPLACE")
+            if remover and self._existe(conexao, nome_tabela):
+                conexao.executemany(f'DELETE FROM "{nome_tabela}" WHERE "{chave}" = ?', [(self._nativo(c),) for c in remover])
+        conexao.close()
+
+    def selecionar_por_chave(self, nome_tabela: str, chaves: list, chave: str = "id") -> pd.DataFrame:
+        if not chaves or not os.path.exists(self._caminho_banco):
+            return pd.DataFrame(columns=[chave])
+        with self._conectar() as conexao:
+            if not self._existe(conexao, nome_tabela):
+                tabela = pd.DataFrame(columns=[chave])
+            else:
+                lista, parametros = self._lista_in(conexao, chaves, "chaves")
+                tabela = pd.read_sql_query(f'SELECT * FROM "{nome_tabela}" WHERE "{chave}" IN {lista}',
+                                           conexao, params=parametros)
+        conexao.close()
+        return tabela
+
+
+MOTORES = {
+    "excel": MotorExcel,
+    "sqlite": MotorSQLite,
+    "parquet": MotorParquet,
+}
@@ -0,0 +1,326 @@
+import json
+import os
+import pandas as pd
+from ferramentas import configuracao
+from ferramentas.banco_de_dados import BancoDeDados
+from ferramentas.diario import Diario
+from ferramentas.motores import escrever_atomicamente
+
+
+def converter_datas(valores) -> pd.Series:
+    """
+    Converte datas gravadas em texto ISO (com ou sem hora) para Timestamp
+    """
+    return pd.to_datetime(valores, format="ISO8601")
+
+
+def filtrar_periodo(tabela: pd.DataFrame, coluna: str, inicio=None, fim=None) -> pd.DataFrame:
+    """
+    Mantém apenas as linhas com inicio <= coluna < fim
+
+    Args:
+        tabela: Tabela a ser filtrada
+        coluna: Coluna de data
+        inicio: Data inicial (inclusive); sem limite se None
+        fim: Data final (exclusive); sem limite se None
+    """
+    if (inicio is None and fim is None) or tabela.empty:
+        return tabela
+    datas = converter_datas(tabela[coluna])
+    mascara = pd.Series(True, index=tabela.index)
+    if inicio is not None:
+        mascara &= datas >= pd.Timestamp(inicio)
+    if fim is not None:
+        mascara &= datas < pd.Timestamp(fim)
+    return tabela[mascara]
+
+
+class TabelaParticionada:
+    """
+    Tabela dividida em partições mensais pela coluna de data. Cada partição é
+    uma tabela comum do BancoDeDados (ex.: pedidos_2024_01), e um manifesto
+    em data/.particoes/ guarda o período, a quantidade de linhas e contagens
+    de cada partição, para que as consultas abram apenas as partições relevantes.
+    """
+
+    # Manifestos já lidos: caminho -> ((mtime, tamanho), manifesto)
+    _manifestos: dict[str, tuple] = {}
+
+    def __init__(self, nome: str, coluna_data: str = "data", chave: str = "id",
+                 colunas_contadas: list[str] | None = None, banco: BancoDeDados | None = None):
+        """
+        Inicializa a tabela particionada
+
+        Args:
+            nome: Nome lógico da tabela (ex.: 'pedidos')
+            coluna_data: Coluna usada para escolher a partição de cada linha
+            chave: Coluna que identifica cada linha
+            colunas_contadas: Colunas cujos valores são contados por partição
+                              no manifesto (ex.: ['status']), para podar consultas
+            banco: Banco de dados usado (padrão: o do motor configurado)
+        """
+        self._nome = nome
+        self._coluna_data = coluna_data
+        self._chave = chave
+        self._colunas_contadas = list(colunas_contadas or [])
+        self._banco = banco or BancoDeDados()
+        self._caminho_manifesto = os.path.join(configuracao.DIRETORIO_DADOS, ".particoes",
+                                               f"{nome}.{self._banco.motor}.json")
+
+    @classmethod
+    def existente(cls, nome: str, banco: BancoDeDados | None = None) -> "TabelaParticionada":
+        """
+        Abre a tabela com a configuração gravada no manifesto (coluna de data, chave e
+        colunas contadas), para quem não a conhece (ex.: a migração entre motores)
+        """
+        tabela = cls(nome, banco=banco)
+        if not tabela.particionada:
+            return tabela
+        manifesto = tabela._manifesto()
+        return cls(nome, manifesto["coluna_data"], manifesto["chave"], manifesto["colunas_contadas"], banco)
+
+    @property
+    def nome(self) -> str:
+        return self._nome
+
+    @property
+    def particionada(self) -> bool:
+        """
+        Indica se a tabela já está guardada em partições (se o manifesto existe)
+        """
+        return os.path.exists(self._caminho_manifesto)
+
+    def particao_da_data(self, data) -> str:
+        """
+        Retorna a partição (AAAA-MM) à qual a data pertence
+        """
+        if isinstance(data, str) and len(data) >= 7 and data[4] == "-":
+            return data[:7]  # Texto ISO, como gravado: dispensa a conversão
+        return pd.Timestamp(data).strftime("%Y-%m")
+
+    def nome_tabela_particao(self, particao: str) -> str:
+        return f"{self._nome}_{particao.replace('-', '_')}"
+
+    def particoes(self, inicio=None, fim=None, contagem: tuple | None = None) -> list[str]:
+        """
+        Lista as partições, em ordem cronológica, que podem ter linhas no período
+
+        Args:
+            inicio: Data inicial (inclusive); sem limite se None
+            fim: Data final (exclusive); sem limite se None
+            contagem: Tupla (coluna, valor); mantém apenas as partições com
+                      alguma linha com esse valor na base
+        """
+        resultado = []
+        for particao, dados in sorted(self._manifesto()["particoes"].items()):
+            if inicio is not None and pd.Timestamp(dados["fim"]) < pd.Timestamp(inicio):
+                continue
+            if fim is not None and pd.Timestamp(dados["inicio"]) >= pd.Timestamp(fim):
+                continue
+            if contagem is not None:
+                coluna, valor = contagem
+                if not dados["contagens"].get(coluna, {}).get(str(valor)):
+                    continue
+            resultado.append(particao)
+        return resultado
+
+    def tabelas(self) -> list[str]:
+        """
+        Retorna os nomes das tabelas de todas as partições
+        """
+        return [dados["tabela"] for _, dados in sorted(self._manifesto()["particoes"].items())]
+
+    def chave_maxima(self) -> int:
+        """
+        Retorna o maior valor da chave entre todas as partições (0 se vazia)
+        """
+        return max((dados["chave_maxima"] for dados in self._manifesto()["particoes"].values()), default=0)
+
+    def carregar_particao(self, particao: str, colunas: list[str] | None = None,
+                          filtros: list[tuple] | None = None) -> pd.DataFrame:
+        """
+        Carrega uma partição (vazia se ela não existir)
+        """
+        return self._banco.carregar_tabela(self.nome_tabela_particao(particao), colunas, filtros)
+
+    def carregar(self, colunas: list[str] | None = None, filtros: list[tuple] | None = None,
+                 inicio=None, fim=None) -> pd.DataFrame:
+        """
+        Carrega as linhas do período, abrindo apenas as partições que o cobrem
+
+        Args:
+            colunas: Colunas a serem lidas (todas se None)
+            filtros: Lista de tuplas (coluna, operador, valor)
+            inicio: Data inicial (inclusive); sem limite se None
+            fim: Data final (exclusive); sem limite se None
+        """
+        if colunas is not None and self._coluna_data not in colunas and (inicio is not None or fim is not None):
+            colunas = [*colunas, self._coluna_data]
+        partes = [self.carregar_particao(particao, colunas, filtros) for particao in self.particoes(inicio, fim)]
+        partes = [parte for parte in partes if not parte.empty]
+        if not partes:
+            return pd.DataFrame()
+        tabela = partes[0] if len(partes) == 1 else pd.concat(partes, ignore_index=True)
+        return filtrar_periodo(tabela, self._coluna_data, inicio, fim).reset_index(drop=True)
+
+    def agrupar_por_particao(self, linhas: list[dict]) -> dict[str, dict]:
+        """
+        Separa as linhas pela partição de destino
+
+        Returns:
+            Dicionário partição -> {chave: linha}
+        """
+        grupos = {}
+        for linha in linhas:
+            grupos.setdefault(self.particao_da_data(linha[self._coluna_data]), {})[linha[self._chave]] = linha
+        return grupos
+
+    def salvar(self, dados: pd.DataFrame) -> None:
+        """
+        Substitui o conteúdo de todas as partições pelas linhas informadas
+        """
+        with self._banco.travar_tabela(self._nome):
+            particoes = {}
+            if not dados.empty:
+                meses = converter_datas(dados[self._coluna_data]).dt.strftime("%Y-%m")
+                particoes = {particao: grupo.reset_index(drop=True) for particao, grupo in dados.groupby(meses)}
+            # Partições que deixaram de ter linhas são esvaziadas
+            for particao in self._manifesto()["particoes"]:
+                particoes.setdefault(particao, pd.DataFrame())
+            self.salvar_particoes(particoes)
+
+    def salvar_particoes(self, particoes: dict[str, pd.DataFrame]) -> None:
+        """
+        Substitui o conteúdo apenas das partições informadas e atualiza o manifesto.
+        Partições vazias são removidas.
+
+        Args:
+            particoes: Dicionário partição -> linhas completas da partição
+        """
+        if not particoes:
+            return
+        with self._banco.travar_tabela(self._nome):
+            manifesto = self._manifesto()
+            for particao, dados in particoes.items():
+                tabela = self.nome_tabela_particao(particao)
+                if dados.empty:
+                    if self._banco.existe_tabela(tabela):
+                        self._banco.remover_tabela(tabela)
+                    manifesto["particoes"].pop(particao, None)
+                    continue
+                self._banco.salvar_tabela(dados, tabela)
+                manifesto["particoes"][particao] = self._resumir_particao(tabela, dados)
+
+            manifesto["versao"] += 1
+            self._gravar_manifesto(manifesto)
+            # A versão da tabela lógica muda junto, para quem acompanha a tabela pelo nome
+            self._banco.registrar_alteracao(self._nome)
+
+    def incorporar_diario(self, diario: Diario) -> int:
+        """
+        Incorpora o diário às partições que ele alterou, reescrevendo apenas essas
+        partições, e esvazia o diário. Deve ser chamado com a trava da tabela e a do
+        diário adquiridas, para que nenhum registro anexado durante a compactação se perca.
+
+        Returns:
+            Quantidade de linhas novas ou alteradas incorporadas
+        """
+        novas, alteracoes = diario.resumir()
+        if not novas and not alteracoes:
+            return 0
+
+        novas_por_particao = self.agrupar_por_particao(list(novas.values()))
+        afetadas = set(novas_por_particao)
+        for campos in alteracoes.values():
+            if self._coluna_data not in campos:
+                # Registro antigo, sem a data da linha: não há como saber a partição
+                afetadas.update(self.particoes())
+                break
+            afetadas.add(self.particao_da_data(campos[self._coluna_data]))
+
+        atualizadas = {}
+        for particao in afetadas:
+            base = self.carregar_particao(particao)
+            atualizadas[particao] = diario.aplicar(base, (novas_por_particao.get(particao, {}), alteracoes))
+        self.salvar_particoes(atualizadas)
+        diario.limpar()
+        return len(novas) + len(alteracoes)
+
+    def copiar_para(self, banco: BancoDeDados) -> int:
+        """
+        Copia todas as partições para outro banco (ex.: outro motor)
+
+        Returns:
+            Quantidade de linhas copiadas
+        """
+        manifesto = self._manifesto()
+        destino = TabelaParticionada(self._nome, manifesto["coluna_data"], manifesto["chave"],
+                                     manifesto["colunas_contadas"], banco)
+        dados = self.carregar()
+        destino.salvar(dados)
+        return len(dados)
+
+    def _resumir_particao(self, tabela: str, dados: pd.DataFrame) -> dict:
+        datas = converter_datas(dados[self._coluna_data])
+        contagens = {}
+        for coluna in self._colunas_contadas:
+            if coluna in dados.columns:
+                contagens[coluna] = {str(valor): int(quantidade)
+                                     for valor, quantidade in dados[coluna].value_counts().items()}
+        return {
+            "tabela": tabela,
+            "linhas": len(dados),
+            "inicio": datas.min().isoformat(),
+            "fim": datas.max().isoformat(),
+            "chave_maxima": int(dados[self._chave].max()),
+            "contagens": contagens,
+        }
+
+    def _manifesto(self) -> dict:
+        """
+        Lê o manifesto, reaproveitando a última leitura enquanto o arquivo não muda.
+        Na primeira leitura, converte a tabela única antiga (se houver) em partições.
+        """
+        try:
+            estado = os.stat(self._caminho_manifesto)
+        except FileNotFoundError:
+            return self._migrar_tabela_unica()
+
+        assinatura = (estado.st_mtime_ns, estado.st_size)
+        guardado = self._manifestos.get(self._caminho_manifesto)
+        if guardado is None or guardado[0] != assinatura:
+            with open(self._caminho_manifesto, encoding="utf-8") as arquivo:
+                guardado = (assinatura, json.load(arquivo))
+            self._manifestos[self._caminho_manifesto] = guardado
+        # Cópia, para que alterações de quem chamou não afetem a leitura guardada
+        return json.loads(json.dumps(guardado[1]))
+
+    def _manifesto_vazio(self) -> dict:
+        return {
+            "versao": 0,
+            "coluna_data": self._coluna_data,
+            "chave": self._chave,
+            "colunas_contadas": self._colunas_contadas,
+            "particoes": {},
+        }
+
+    def _migrar_tabela_unica(self) -> dict:
+        with self._banco.travar_tabela(self._nome):
+            if os.path.exists(self._caminho_manifesto):
+                return self._manifesto()  # Outro processo migrou enquanto esperávamos
+            if not self._banco.existe_tabela(self._nome):
+                return self._manifesto_vazio()
+
+            dados = self._banco.carregar_tabela(self._nome)
+            self._gravar_manifesto(self._manifesto_vazio())
+            self.salvar(dados)
+            self._banco.remover_tabela(self._nome)
+            return self._manifesto()
+
+    def _gravar_manifesto(self, manifesto: dict) -> None:
+        os.makedirs(os.path.dirname(self._caminho_manifesto), exist_ok=True)
+
+        def escrever(caminho):
+            with open(caminho, "w", encoding="utf-8") as arquivo:
+                json.dump(manifesto, arquivo, indent=2, sort_keys=True)
+        escrever_atomicamente(self._caminho_manifesto, escrever)
@@ -0,0 +1,278 @@
+import asyncio
+import json
+import signal
+import threading
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable
+from urllib.parse import parse_qsl, urlsplit
+
+import numpy as np
+
+# Mensagens padrão dos códigos de status usados pelo servidor
+MENSAGENS_STATUS = {
+    200: "OK", 201: "Created", 400: "Bad Request", 404: "Not Found", 405: "Method Not Allowed",
+    409: "Conflict", 413: "Payload Too Large", 500: "Internal Server Error",
+}
+TAMANHO_MAXIMO_CORPO = 1024 * 1024
+
+
+class ErroHTTP(Exception):
+    """
+    Erro que vira uma resposta JSON com o código de status informado
+    """
+
+    def __init__(self, status: int, mensagem: str):
+        super().__init__(mensagem)
+        self.status = status
+        self.mensagem = mensagem
+
+
+class MetricasLatencia:
+    """
+    Latência das requisições por rota. Guarda as últimas medições de cada rota,
+    para os percentis acompanharem o comportamento recente do serviço.
+    """
+
+    def __init__(self, tamanho_janela: int = 10_000):
+        """
+        Inicializa as métricas
+
+        Args:
+            tamanho_janela: Quantidade de medições mais recentes guardadas por rota
+        """
+        self._tamanho_janela = tamanho_janela
+        self._medicoes: dict[str, deque] = {}
+        self._totais: dict[str, int] = {}
+        self._erros: dict[str, int] = {}
+        self._trava = threading.Lock()
+
+    def registrar(self, rota: str, segundos: float, status: int) -> None:
+        with self._trava:
+            if rota not in self._medicoes:
+                self._medicoes[rota] = deque(maxlen=self._tamanho_janela)
+                self._totais[rota] = self._erros[rota] = 0
+            self._medicoes[rota].append(segundos)
+            self._totais[rota] += 1
+            if status >= 400:
+                self._erros[rota] += 1
+
+    def resumo(self) -> dict[str, dict]:
+        """
+        Retorna, para cada rota, o total de requisições e de erros e a latência
+        (média, p50, p95, p99 e máxima, em milissegundos) das medições guardadas
+        """
+        with self._trava:
+            copias = {rota: (np.fromiter(medicoes, dtype=float), self._totais[rota], self._erros[rota])
+                      for rota, medicoes in self._medicoes.items()}
+        resumo = {}
+        for rota, (medicoes, total, erros) in sorted(copias.items()):
+            milissegundos = medicoes * 1000
+            p50, p95, p99 = np.percentile(milissegundos, [50, 95, 99])
+            resumo[rota] = {
+                "requisicoes": total,
+                "erros": erros,
+                "media_ms": round(float(milissegundos.mean()), 3),
+                "p50_ms": round(float(p50), 3),
+                "p95_ms": round(float(p95), 3),
+                "p99_ms": round(float(p99), 3),
+                "max_ms": round(float(milissegundos.max()), 3),
+            }
+        return resumo
+
+
+class ServidorHTTP:
+    """
+    Servidor HTTP/1.1 mínimo, com respostas JSON, sobre o asyncio.
+
+    As conexões são atendidas pelo laço de eventos, que nunca bloqueia: rotas
+    marcadas como bloqueantes (gravações, travas, leitura de partições) rodam
+    em um pool limitado de threads, e as demais rodam direto no laço. Cada
+    conexão pode fazer várias requisições (keep-alive).
+    """
+
+    def __init__(self, endereco: str, porta: int, trabalhadores: int):
+        """
+        Inicializa o servidor
+
+        Args:
+            endereco: Endereço em que o servidor escuta (ex.: 127.0.0.1)
+            porta: Porta TCP
+            trabalhadores: Quantidade de threads para as rotas bloqueantes
+        """
+        self._endereco = endereco
+        self._porta = porta
+        self._trabalhadores = trabalhadores
+        self._rotas: list[tuple[str, list[str], Callable, bool, str]] = []
+        self._executor: ThreadPoolExecutor | None = None
+        self.metricas = MetricasLatencia()
+
+    def rota(self, metodo: str, padrao: str, funcao: Callable, bloqueante: bool = True) -> None:
+        """
+        Registra uma rota
+
+        Args:
+            metodo: Método HTTP (GET, POST...)
+            padrao: Caminho, com parâmetros entre chaves (ex.: /pedidos/{id})
+            funcao: Recebe (parametros do caminho, parametros da consulta, corpo JSON ou None)
+                    e retorna (status, dados serializáveis em JSON)
+            bloqueante: Se True, a função roda no pool de threads
+        """
+        partes = [parte for parte in padrao.split("/") if parte]
+        self._rotas.append((metodo.upper(), partes, funcao, bloqueante, f"{metodo.upper()} {padrao}"))
+
+    def _encontrar_rota(self, metodo: str, caminho: str) -> tuple[Callable, bool, str, dict]:
+        partes = [parte for parte in caminho.split("/") if parte]
+        metodo_errado = False
+        for metodo_rota, padrao, funcao, bloqueante, nome in self._rotas:
+            if len(padrao) != len(partes):
+                continue
+            parametros = {}
+            for esperado, recebido in zip(padrao, partes):
+                if esperado.startswith("{") and esperado.endswith("}"):
+                    parametros[esperado[1:-1]] = recebido
+                elif esperado != recebido:
+                    break
+            else:
+                if metodo_rota == metodo:
+                    return funcao, bloqueante, nome, parametros
+                metodo_errado = True
+        if metodo_errado:
+            raise ErroHTTP(405, f"Método {metodo} não permitido em {caminho}.")
+        raise ErroHTTP(404, f"Rota não encontrada: {caminho}")
+
+    async def _ler_requisicao(self, leitor: asyncio.StreamReader) -> tuple[str, str, dict, bytes] | None:
+        """
+        Lê uma requisição da conexão
+
+        Returns:
+            Tupla (método, alvo, cabeçalhos, corpo), ou None se o cliente fechou a conexão
+        """
+        try:
+            cabecalho = await leitor.readuntil(b"\r\n\r\n")
+        except asyncio.IncompleteReadError:
+            return None
+        except asyncio.LimitOverrunError:
+            raise ErroHTTP(413, "Cabeçalhos grandes demais.")
+
+        linhas = cabecalho.decode("latin-1").split("\r\n")
+        try:
+            metodo, alvo, versao = linhas[0].split(" ", 2)
+        except ValueError:
+            raise ErroHTTP(400, "Linha de requisição inválida.")
+        cabecalhos = {}
+        for linha in linhas[1:]:
+            if ":" in linha:
+                nome, valor = linha.split(":", 1)
+                cabecalhos[nome.strip().lower()] = valor.strip()
+        cabecalhos[":versao"] = versao
+
+        try:
+            tamanho = int(cabecalhos.get("content-length", "0") or 0)
+        except ValueError:
+            raise ErroHTTP(400, "Content-Length inválido.")
+        if tamanho > TAMANHO_MAXIMO_CORPO:
+            raise ErroHTTP(413, "Corpo da requisição grande demais.")
+        corpo = await leitor.readexactly(tamanho) if tamanho else b""
+        return metodo.upper(), alvo, cabecalhos, corpo
+
+    async def _executar(self, metodo: str, alvo: str, corpo: bytes) -> tuple[str, int, object]:
+        """
+        Executa a rota da requisição
+
+        Returns:
+            Tupla (nome da rota, status, dados)
+        """
+        url = urlsplit(alvo)
+        nome = f"{metodo} ?"
+        try:
+            funcao, bloqueante, nome, parametros = self._encontrar_rota(metodo, url.path)
+            consulta = dict(parse_qsl(url.query))
+            try:
+                dados_corpo = json.loads(corpo) if corpo else None
+            except json.JSONDecodeError:
+                raise ErroHTTP(400, "O corpo da requisição não é um JSON válido.")
+
+            if bloqueante:
+                laco = asyncio.get_running_loop()
+                status, dados = await laco.run_in_executor(self._executor, funcao, parametros, consulta, dados_corpo)
+            else:
+                status, dados = funcao(parametros, consulta, dados_corpo)
+        except ErroHTTP as erro:
+            status, dados = erro.status, {"erro": erro.mensagem}
+        except Exception as erro:  # Um erro inesperado não derruba o servidor
+            status, dados = 500, {"erro": f"{type(erro).__name__}: {erro}"}
+        return nome, status, dados
+
+    async def _atender(self, leitor: asyncio.StreamReader, escritor: asyncio.StreamWriter) -> None:
+        """
+        Atende as requisições de uma conexão até o cliente fechá-la
+        """
+        try:
+            while True:
+                try:
+                    requisicao = await self._ler_requisicao(leitor)
+                except ErroHTTP as erro:
+                    await self._responder(escritor, erro.status, {"erro": erro.mensagem}, manter=False)
+                    return
+                if requisicao is None:
+                    return
+                metodo, alvo, cabecalhos, corpo = requisicao
+
+                inicio = time.perf_counter()
+                nome, status, dados = await self._executar(metodo, alvo, corpo)
+                conexao = cabecalhos.get("connection", "").lower()
+                manter = conexao != "close" and (cabecalhos[":versao"] != "HTTP/1.0" or conexao == "keep-alive")
+                await self._responder(escritor, status, dados, manter)
+                self.metricas.registrar(nome, time.perf_counter() - inicio, status)
+                if not manter:
+                    return
+        except (ConnectionError, asyncio.IncompleteReadError):
+            return
+        finally:
+            escritor.close()
+
+    @staticmethod
+    async def _responder(escritor: asyncio.StreamWriter, status: int, dados, manter: bool) -> None:
+        corpo = json.dumps(dados, ensure_ascii=False, default=str).encode("utf-8")
+        cabecalho = (f"HTTP/1.1 {status} {MENSAGENS_STATUS.get(status, '')}\r\n"
+                     f"Content-Type: application/json; charset=utf-8\r\n"
+                     f"Content-Length: {len(corpo)}\r\n"
+                     f"Connection: {'keep-alive' if manter else 'close'}\r\n\r\n")
+        escritor.write(cabecalho.encode("latin-1") + corpo)
+        await escritor.drain()
+
+    async def servir(self, pronto: Callable[[], None] | None = None) -> None:
+        """
+        Atende as conexões até receber SIGINT (Ctrl+C) ou SIGTERM
+
+        Args:
+            pronto: Chamada quando o servidor já está escutando
+        """
+        self._executor = ThreadPoolExecutor(max_workers=self._trabalhadores, thread_name_prefix="servico")
+        parar = asyncio.Event()
+        laco = asyncio.get_running_loop()
+        for sinal in (signal.SIGINT, signal.SIGTERM):
+            try:
+                laco.add_signal_handler(sinal, parar.set)
+            except (NotImplementedError, RuntimeError):
+                pass  # Sem suporte (ex.: Windows): o Ctrl+C chega como KeyboardInterrupt
+        try:
+            servidor = await asyncio.start_server(self._atender, self._endereco, self._porta)
+            async with servidor:
+                if pronto is not None:
+                    pronto()
+                await parar.wait()
+        finally:
+            # As operações em andamento terminam antes de o mercado ser encerrado
+            self._executor.shutdown(wait=True)
+
+    def iniciar(self, pronto: Callable[[], None] | None = None) -> None:
+        """
+        Executa o servidor até Ctrl+C ou SIGTERM
+        """
+        try:
+            asyncio.run(self.servir(pronto))
+        except KeyboardInterrupt:
+            pass
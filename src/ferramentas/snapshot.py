@@ -0,0 +1,170 @@
+import hashlib
+import os
+import pickle
+import sys
+from ferramentas import configuracao
+from ferramentas.banco_de_dados import BancoDeDados
+from ferramentas.motores import escrever_atomicamente
+
+class Snapshot:
+    """
+    Retrato binário do estado já montado do sistema (usuários, catálogo e pedidos),
+    gravado no encerramento para que a próxima inicialização não precise reler
+    e reconstruir as tabelas.
+
+    O arquivo guarda o checksum dos arquivos das tabelas de origem. Se alguma
+    tabela mudou desde a gravação, ou se o formato é de outra versão, o snapshot
+    é ignorado e o sistema é montado a partir do banco, como antes.
+    """
+
+    # Incrementar sempre que a estrutura das classes gravadas mudar
+    VERSAO_FORMATO = 7
+    MARCA = b"MERCADO-SNAPSHOT\n"
+
+    def __init__(self, tabelas, caminho: str | None = None):
+        """
+        Inicializa o snapshot
+
+        Args:
+            tabelas: Tabelas de origem do estado guardado, ou uma função que as
+                     retorna (quando a lista muda com o tempo, como as partições)
+            caminho: Arquivo do snapshot (padrão: data/estado.snapshot)
+        """
+        self._tabelas = tabelas
+        self._caminho = caminho or os.path.join(configuracao.DIRETORIO_DADOS, "estado.snapshot")
+        self._referencia: dict[str, tuple[int, int]] = {}
+
+    @property
+    def caminho(self) -> str:
+        return self._caminho
+
+    def _listar_tabelas(self) -> list[str]:
+        return self._tabelas() if callable(self._tabelas) else list(self._tabelas)
+
+    def carregar(self):
+        """
+        Lê o estado guardado no snapshot
+
+        Returns:
+            O estado gravado por salvar(), ou None se o snapshot não existe,
+            é de outra versão ou está desatualizado em relação às tabelas
+        """
+        try:
+            with open(self._caminho, "rb") as arquivo:
+                if arquivo.read(len(self.MARCA)) != self.MARCA:
+                    return None
+                # O cabeçalho vem em um pickle separado, para validar antes de ler o estado
+                cabecalho = pickle.load(arquivo)
+                if (cabecalho.get("versao") != self.VERSAO_FORMATO
+                        or cabecalho.get("python") != sys.version_info[:2]
+                        or not self._origens_validas(cabecalho.get("origens", {}))):
+                    return None
+                return pickle.load(arquivo)
+        except FileNotFoundError:
+            return None
+        except Exception:
+            # Arquivo corrompido ou com classes que não existem mais: remonta a partir do banco
+            return None
+
+    def salvar(self, estado) -> None:
+        """
+        Grava o estado junto com o checksum atual das tabelas de origem
+        """
+        cabecalho = {
+            "versao": self.VERSAO_FORMATO,
+            "python": sys.version_info[:2],
+            "origens": self._origens(),
+        }
+
+        def escrever(caminho):
+            with open(caminho, "wb") as arquivo:
+                arquivo.write(self.MARCA)
+                pickle.dump(cabecalho, arquivo, protocol=pickle.HIGHEST_PROTOCOL)
+                pickle.dump(estado, arquivo, protocol=pickle.HIGHEST_PROTOCOL)
+
+        os.makedirs(os.path.dirname(self._caminho), exist_ok=True)
+        escrever_atomicamente(self._caminho, escrever)
+
+    def invalidar(self) -> None:
+        """
+        Remove o snapshot, forçando a próxima inicialização a montar tudo do banco
+        """
+        if os.path.exists(self._caminho):
+            os.remove(self._caminho)
+
+    def marcar_referencia(self) -> None:
+        """
+        Registra a versão atual das tabelas e quantas escritas este processo já fez
+        nelas, para depois detectar alterações feitas por outros processos
+        """
+        banco = BancoDeDados()
+        self._referencia = {tabela: (banco.versao_tabela(tabela), banco.escritas_locais(tabela))
+                            for tabela in self._listar_tabelas()}
+
+    def alteradas_externamente(self) -> list[str]:
+        """
+        Retorna as tabelas alteradas por outros processos desde marcar_referencia(),
+        ou seja, as que tiveram mais escritas do que as feitas por este processo
+        """
+        banco = BancoDeDados()
+        alteradas = []
+        for tabela, (versao, escritas) in self._referencia.items():
+            externas = (banco.versao_tabela(tabela) - versao) - (banco.escritas_locais(tabela) - escritas)
+            if externas != 0:
+                alteradas.append(tabela)
+        return alteradas
+
+    def _origens(self) -> dict:
+        """
+        Monta a identificação das tabelas de origem: versão de cada tabela e,
+        para cada arquivo, (mtime, tamanho, checksum do conteúdo)
+        """
+        banco = BancoDeDados()
+        tabelas = self._listar_tabelas()
+        arquivos = {}
+        for tabela in tabelas:
+            for caminho in banco.arquivos_tabela(tabela):
+                if caminho not in arquivos:
+                    arquivos[caminho] = self._identificar_arquivo(caminho)
+        versoes = {tabela: banco.versao_tabela(tabela) for tabela in tabelas}
+        return {"versoes": versoes, "arquivos": arquivos}
+
+    def _origens_validas(self, origens: dict) -> bool:
+        banco = BancoDeDados()
+        tabelas = self._listar_tabelas()
+        if origens.get("versoes") != {tabela: banco.versao_tabela(tabela) for tabela in tabelas}:
+            return False
+
+        gravados = origens.get("arquivos", {})
+        atuais = {caminho for tabela in tabelas for caminho in banco.arquivos_tabela(tabela)}
+        if atuais != set(gravados):
+            return False
+
+        for caminho, (mtime, tamanho, checksum) in gravados.items():
+            try:
+                estado = os.stat(caminho)
+            except FileNotFoundError:
+                if checksum is not None:
+                    return False
+                continue
+            if (estado.st_mtime_ns, estado.st_size) == (mtime, tamanho):
+                continue  # Arquivo não foi tocado: dispensa reler o conteúdo
+            if estado.st_size != tamanho or self._checksum(caminho) != checksum:
+                return False
+        return True
+
+    @classmethod
+    def _identificar_arquivo(cls, caminho: str) -> tuple:
+        try:
+            estado = os.stat(caminho)
+        except FileNotFoundError:
+            return (None, None, None)
+        return (estado.st_mtime_ns, estado.st_size, cls._checksum(caminho))
+
+    @staticmethod
+    def _checksum(caminho: str) -> str:
+        resumo = hashlib.blake2b(digest_size=16)
+        with open(caminho, "rb") as arquivo:
+            for bloco in iter(lambda: arquivo.read(1 << 20), b""):
+                resumo.update(bloco)
+        return resumo.hexdigest()
@@ -0,0 +1,117 @@
+from contextlib import contextmanager, ExitStack
+import os
+import threading
+import zlib
+from ferramentas import configuracao
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+    import msvcrt
+
+# Quantidade de faixas de chaves por tabela: chaves em faixas diferentes
+# podem ser travadas ao mesmo tempo por processos diferentes
+NUMERO_FAIXAS = 64
+
+
+class TravaArquivo:
+    """
+    Trava consultiva (advisory lock) entre processos, baseada em um arquivo .lock.
+
+    É reentrante dentro da mesma thread e também serializa as threads do
+    próprio processo, pois o flock não distingue threads.
+    """
+
+    # Estado compartilhado por caminho: [RLock, descritor do arquivo, contador de aquisições]
+    _estados: dict[str, list] = {}
+    _trava_estados = threading.Lock()
+
+    def __init__(self, caminho: str):
+        """
+        Args:
+            caminho: Caminho do arquivo de trava
+        """
+        self._caminho = caminho
+        with self._trava_estados:
+            self._estado = self._estados.setdefault(caminho, [threading.RLock(), None, 0])
+
+    def adquirir(self) -> None:
+        self._estado[0].acquire()
+        if self._estado[2] == 0:
+            os.makedirs(os.path.dirname(self._caminho), exist_ok=True)
+            descritor = os.open(self._caminho, os.O_RDWR | os.O_CREAT)
+            try:
+                self._travar(descritor)
+            except BaseException:
+                os.close(descritor)
+                self._estado[0].release()
+                raise
+            self._estado[1] = descritor
+        self._estado[2] += 1
+
+    def liberar(self) -> None:
+        self._estado[2] -= 1
+        if self._estado[2] == 0:
+            descritor, self._estado[1] = self._estado[1], None
+            self._destravar(descritor)
+            os.close(descritor)
+        self._estado[0].release()
+
+    @staticmethod
+    def _travar(descritor: int) -> None:
+        if fcntl is not None:
+            fcntl.flock(descritor, fcntl.LOCK_EX)
+        else:
+            while True:
+                try:
+                    msvcrt.locking(descritor, msvcrt.LK_LOCK, 1)
+                    return
+                except OSError:
+                    continue  # LK_LOCK desiste após ~10s; continua esperando
+
+    @staticmethod
+    def _destravar(descritor: int) -> None:
+        if fcntl is not None:
+            fcntl.flock(descritor, fcntl.LOCK_UN)
+        else:
+            os.lseek(descritor, 0, os.SEEK_SET)
+            msvcrt.locking(descritor, msvcrt.LK_UNLCK, 1)
+
+    def __enter__(self):
+        self.adquirir()
+        return self
+
+    def __exit__(self, *args):
+        self.liberar()
+
+
+def _caminho_trava(nome: str) -> str:
+    return os.path.join(configuracao.DIRETORIO_DADOS, ".travas", f"{nome}.lock")
+
+
+def travar_tabela(nome_tabela: str) -> TravaArquivo:
+    """
+    Retorna a trava exclusiva de uma tabela inteira
+    """
+    return TravaArquivo(_caminho_trava(nome_tabela))
+
+
+def faixa_da_chave(chave) -> int:
+    """
+    Retorna a faixa de travas à qual a chave pertence
+    """
+    return zlib.crc32(str(chave).encode("utf-8")) % NUMERO_FAIXAS
+
+
+@contextmanager
+def travar_chaves(nome_tabela: str, chaves: list):
+    """
+    Trava apenas as faixas das chaves informadas, permitindo que processos
+    trabalhando em chaves de outras faixas sigam em paralelo.
+    As faixas são travadas sempre em ordem crescente para evitar deadlock.
+    """
+    with ExitStack() as pilha:
+        for faixa in sorted({faixa_da_chave(chave) for chave in chaves}):
+            pilha.enter_context(TravaArquivo(_caminho_trava(f"{nome_tabela}.faixa{faixa:02d}")))
+        yield
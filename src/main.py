@@ -1,9 +1,69 @@
+import argparse
 from sistema import Sistema
 
 
 def main():
+    parser = argparse.ArgumentParser(description="Gerenciador de Mercado")
+    subcomandos = parser.add_subparsers(dest="comando")
+
+    migrar = subcomandos.add_parser("migrar", help="Converte as tabelas de um formato de armazenamento para outro")
+    migrar.add_argument("--origem", default="excel", help="Motor de origem (padrão: excel)")
+    migrar.add_argument("--destino", default="parquet", help="Motor de destino (padrão: parquet)")
+    migrar.add_argument("--tabelas", nargs="*", help="Tabelas a migrar (padrão: usuarios, produtos e pedidos)")
+
+    importar = subcomandos.add_parser("importar", help="Importa um lote de pedidos de um arquivo .csv ou .jsonl")
+    importar.add_argument("arquivo", help="Arquivo com uma linha por item (cliente_id, produto_id, quantidade, data, referencia)")
+    importar.add_argument("--erros", default="pedidos_rejeitados.csv", help="Relatório das linhas rejeitadas (padrão: pedidos_rejeitados.csv)")
+
+    catalogo = subcomandos.add_parser("sincronizar-catalogo", help="Aplica só as diferenças do catálogo do fornecedor à tabela de produtos")
+    catalogo.add_argument("arquivo", help="Catálogo completo (.csv, .jsonl ou .xlsx) com as colunas da tabela de produtos")
+    catalogo.add_argument("--remover-ausentes", action="store_true", help="Remove os produtos que não estão no catálogo")
+    catalogo.add_argument("--erros", default="catalogo_rejeitado.csv", help="Relatório das linhas rejeitadas (padrão: catalogo_rejeitado.csv)")
+
+    subcomandos.add_parser("servir", help="Mantém o mercado carregado e atende uma API JSON local (endereço e porta pela configuração)")
+
+    argumentos = parser.parse_args()
+
+    if argumentos.comando == "migrar":
+        from ferramentas.migracao import migrar_tabelas
+        migrar_tabelas(argumentos.origem, argumentos.destino, argumentos.tabelas)
+        return
+
+    if argumentos.comando == "importar":
+        from rich.console import Console
+        from mercado.mercado import Mercado
+        mercado = Mercado()
+        try:
+            criados, rejeitados = mercado.importar_pedidos(argumentos.arquivo, argumentos.erros)
+        finally:
+            mercado.encerrar()
+        Console().print(f"[green]{len(criados)} pedidos importados.[/]")
+        if not rejeitados.empty:
+            Console().print(f"[yellow]{len(rejeitados)} linhas rejeitadas; veja '{argumentos.erros}'.[/]")
+        return
+
+    if argumentos.comando == "sincronizar-catalogo":
+        from rich.console import Console
+        from mercado.mercado import Mercado
+        mercado = Mercado()
+        try:
+            resumo, rejeitados = mercado.sincronizar_catalogo(argumentos.arquivo, argumentos.remover_ausentes,
+                                                              argumentos.erros)
+        finally:
+            mercado.encerrar()
+        Console().print(f"[green]{resumo['inseridos']} produtos inseridos, {resumo['atualizados']} atualizados, "
+                        f"{resumo['removidos']} removidos e {resumo['inalterados']} inalterados.[/]")
+        if not rejeitados.empty:
+            Console().print(f"[yellow]{len(rejeitados)} linhas rejeitadas; veja '{argumentos.erros}'.[/]")
+        return
+
+    if argumentos.comando == "servir":
+        from servico import Servico
+        Servico().iniciar()
+        return
+
     sistema = Sistema()
     sistema.iniciar_sistema()
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    main()
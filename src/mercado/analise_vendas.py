@@ -0,0 +1,314 @@
+import json
+from datetime import date, datetime
+
+import numpy as np
+import pandas as pd
+
+
+# Dia 0 da coluna de dias dos agregados
+_EPOCA = date(1970, 1, 1)
+
+
+def dia_do_pedido(data: datetime | date) -> int:
+    """
+    Converte a data do pedido no número do dia usado nos agregados (dias desde 1970-01-01)
+    """
+    if isinstance(data, datetime):
+        data = data.date()
+    return (data - _EPOCA).days
+
+
+def data_do_dia(dia: int) -> date:
+    return date.fromordinal(_EPOCA.toordinal() + int(dia))
+
+
+class SomasPorChave:
+    """
+    Somas agrupadas por chave, guardadas em colunas NumPy que crescem conforme
+    aparecem chaves novas. Somar em uma chave custa O(1) (a posição de cada chave
+    fica em um dicionário) e as consultas agregam as colunas inteiras de uma vez.
+
+    As chaves são inteiros não negativos (IDs e dias); chaves de duas colunas são
+    guardadas no dicionário como um único inteiro (a primeira coluna nos 32 bits
+    mais altos), que é bem mais barato de montar e consultar que uma tupla.
+    """
+
+    def __init__(self, chaves: list[str], valores: list[str]):
+        """
+        Args:
+            chaves: Nomes das colunas da chave (inteiras, uma ou duas)
+            valores: Nomes das colunas somadas
+        """
+        self._nomes_chaves = chaves
+        self._nomes_valores = valores
+        self._posicoes: dict[int, int] = {}
+        self._tamanho = 0
+        self._chaves = np.zeros((16, len(chaves)), dtype=np.int64)
+        self._valores = np.zeros((16, len(valores)), dtype=float)
+
+    def __len__(self) -> int:
+        return self._tamanho
+
+    def somar(self, chave: tuple, valores: tuple) -> None:
+        codigo = chave[0] if len(chave) == 1 else (chave[0] << 32) | chave[1]
+        posicao = self._posicoes.get(codigo)
+        if posicao is None:
+            if self._tamanho == len(self._chaves):
+                self._crescer(self._tamanho * 2)
+            posicao = self._posicoes[codigo] = self._tamanho
+            self._chaves[posicao] = chave
+            self._tamanho += 1
+        self._valores[posicao] += valores
+
+    def substituir(self, tabela: pd.DataFrame) -> None:
+        """
+        Troca todas as somas pelas da tabela (com as colunas de chave e de valores, uma linha por chave)
+        """
+        self._tamanho = len(tabela)
+        self._chaves = tabela[self._nomes_chaves].to_numpy(dtype=np.int64, copy=True).reshape(-1, len(self._nomes_chaves))
+        self._valores = tabela[self._nomes_valores].to_numpy(dtype=float, copy=True).reshape(-1, len(self._nomes_valores))
+        self._crescer(max(self._tamanho, 16))
+        codigos = self._chaves[:self._tamanho, 0]
+        if self._chaves.shape[1] == 2:
+            codigos = (codigos << 32) | self._chaves[:self._tamanho, 1]
+        self._posicoes = dict(zip(codigos.tolist(), range(self._tamanho)))
+
+    def coluna(self, nome: str) -> np.ndarray:
+        """
+        Retorna uma coluna (de chave ou de valores) só com as linhas preenchidas, sem cópia
+        """
+        if nome in self._nomes_chaves:
+            return self._chaves[:self._tamanho, self._nomes_chaves.index(nome)]
+        return self._valores[:self._tamanho, self._nomes_valores.index(nome)]
+
+    def _crescer(self, capacidade: int) -> None:
+        if capacidade <= len(self._chaves):
+            return
+        chaves = np.zeros((capacidade, self._chaves.shape[1]), dtype=np.int64)
+        valores = np.zeros((capacidade, self._valores.shape[1]), dtype=float)
+        chaves[:self._tamanho] = self._chaves[:self._tamanho]
+        valores[:self._tamanho] = self._valores[:self._tamanho]
+        self._chaves, self._valores = chaves, valores
+
+
+class AnaliseVendas:
+    """
+    Agregados de vendas materializados: unidades e receita por produto e por dia,
+    pedidos e valor por cliente e quantidade de pedidos por status.
+
+    Os agregados são montados uma vez a partir de todos os pedidos (reconstruir,
+    com group-bys do pandas) e depois atualizados pedido a pedido, a cada pedido
+    novo ou mudança de status; os relatórios só leem os agregados, sem abrir os
+    itens dos pedidos. A receita de um item é o preço da venda gravado no item
+    (ou o do catálogo, nos itens gravados sem preço) vezes as unidades (produtos
+    digitais contam uma unidade); o valor por cliente inclui o frete, como o
+    total do pedido. Itens de produtos que saíram do catálogo continuam contando.
+    """
+
+    STATUS = ('pendente', 'aguardando entrega', 'entregue')
+
+    def __init__(self):
+        self._zerar()
+
+    def _zerar(self) -> None:
+        self._por_produto_dia = SomasPorChave(['produto_id', 'dia'], ['unidades', 'receita'])
+        self._por_cliente = SomasPorChave(['cliente_id'], ['pedidos', 'valor'])
+        self._por_status = dict.fromkeys(self.STATUS, 0)
+        # Status de cada pedido contabilizado, pelo ID do pedido (-1: ainda não contabilizado)
+        self._status_pedidos = np.full(16, -1, dtype=np.int8)
+
+    def contabilizado(self, pedido_id: int) -> bool:
+        return pedido_id < len(self._status_pedidos) and self._status_pedidos[pedido_id] >= 0
+
+    def registrar_pedido(self, pedido_id: int, cliente_id: int, status: str, data: datetime,
+                         linhas: list[tuple[int, float, float, float]]) -> None:
+        """
+        Soma um pedido novo aos agregados. Se o pedido já foi contabilizado, apenas o status é atualizado.
+
+        Args:
+            pedido_id: ID do pedido
+            cliente_id: ID do cliente
+            status: Status do pedido
+            data: Data do pedido
+            linhas: (produto_id, unidades, receita, frete) de cada item
+        """
+        if self.contabilizado(pedido_id):
+            self.atualizar_status(pedido_id, status)
+            return
+        dia = dia_do_pedido(data)
+        valor = 0.0
+        for produto_id, unidades, receita, frete in linhas:
+            self._por_produto_dia.somar((produto_id, dia), (unidades, receita))
+            valor += receita + frete
+        self._por_cliente.somar((cliente_id,), (1, valor))
+        self._marcar_status(pedido_id, status)
+        self._por_status[status] = self._por_status.get(status, 0) + 1
+
+    def atualizar_status(self, pedido_id: int, status: str) -> None:
+        """
+        Move o pedido para a contagem do novo status (se ele já foi contabilizado)
+        """
+        if not self.contabilizado(pedido_id):
+            return
+        anterior = self._nome_status(self._status_pedidos[pedido_id])
+        if anterior != status:
+            self._por_status[anterior] -= 1
+            self._por_status[status] = self._por_status.get(status, 0) + 1
+            self._marcar_status(pedido_id, status)
+
+    def reconstruir(self, pedidos: pd.DataFrame, catalogo: pd.DataFrame) -> None:
+        """
+        Recalcula todos os agregados de uma vez
+
+        Args:
+            pedidos: Todos os pedidos, com as colunas id, cliente_id, data, status e produtos (JSON)
+            catalogo: Produtos indexados pelo ID, com as colunas preco e frete (zero nos digitais)
+        """
+        self._zerar()
+        if pedidos.empty:
+            return
+        pedidos = pedidos.reset_index(drop=True)
+
+        # Todos os itens em um único JSON, lido de uma vez, com o pedido de cada item ao lado
+        produtos = pedidos['produtos'].fillna('[]').astype(str)
+        itens_por_pedido = produtos.str.count(r'\{').to_numpy()
+        com_itens = itens_por_pedido > 0
+        itens = json.loads('[' + produtos[com_itens].str.slice(1, -1).str.cat(sep=',') + ']')
+        linhas = pd.DataFrame({
+            'id': np.array([item['id'] for item in itens], dtype=np.int64),
+            'quantidade': np.array([item.get('quantidade', np.nan) for item in itens], dtype=float),
+            'preco_item': np.array([item.get('preco', np.nan) for item in itens], dtype=float),
+            'frete_item': np.array([item.get('frete', np.nan) for item in itens], dtype=float),
+            'pedido': np.repeat(np.arange(len(pedidos)), itens_por_pedido),
+        })
+
+        # Preço e frete do catálogo, para os itens gravados sem eles (zero se o produto saiu do catálogo)
+        linhas = linhas.join(catalogo, on='id', how='left')
+        # Como em ItemPedido, o item é físico se foi gravado com quantidade
+        fisico = ~np.isnan(linhas['quantidade'].to_numpy())
+        unidades = np.where(fisico, linhas['quantidade'].to_numpy(), 1.0)
+        # Preço da venda gravado no item; itens gravados sem preço usam o do catálogo
+        preco_item = linhas['preco_item'].to_numpy()
+        receita = np.where(np.isnan(preco_item), linhas['preco'].fillna(0.0).to_numpy(dtype=float), preco_item) * unidades
+        frete_item = linhas['frete_item'].to_numpy()
+        frete = np.where(fisico, np.where(np.isnan(frete_item), linhas['frete'].fillna(0.0).to_numpy(dtype=float),
+                                          frete_item), 0.0)
+
+        dias = (pd.to_datetime(pedidos['data'], format='ISO8601').to_numpy().astype('datetime64[D]')
+                .astype(np.int64))
+        posicoes = linhas['pedido'].to_numpy()
+        por_produto_dia = (pd.DataFrame({'produto_id': linhas['id'].to_numpy(), 'dia': dias[posicoes],
+                                         'unidades': unidades, 'receita': receita})
+                           .groupby(['produto_id', 'dia'], sort=False, as_index=False).sum())
+        self._por_produto_dia.substituir(por_produto_dia)
+
+        valores = np.bincount(posicoes, weights=receita + frete, minlength=len(pedidos))
+        por_cliente = (pd.DataFrame({'cliente_id': pedidos['cliente_id'].to_numpy(dtype=np.int64),
+                                     'pedidos': 1, 'valor': valores})
+                       .groupby('cliente_id', sort=False, as_index=False).sum())
+        self._por_cliente.substituir(por_cliente)
+
+        codigos = pd.Categorical(pedidos['status'], categories=self.STATUS).codes
+        if (codigos < 0).any():
+            desconhecido = pedidos['status'][codigos < 0].iloc[0]
+            raise ValueError(f"Status desconhecido: {desconhecido}")
+        for codigo, quantidade in enumerate(np.bincount(codigos, minlength=len(self.STATUS))):
+            self._por_status[self.STATUS[codigo]] = int(quantidade)
+        ids = pedidos['id'].to_numpy(dtype=np.int64)
+        self._garantir_capacidade(int(ids.max()))
+        self._status_pedidos[ids] = codigos
+
+    # Consultas
+
+    def por_status(self) -> dict[str, int]:
+        return {status: quantidade for status, quantidade in self._por_status.items() if quantidade}
+
+    def por_produto(self, inicio: date | None = None, fim: date | None = None,
+                    limite: int | None = None) -> pd.DataFrame:
+        """
+        Unidades e receita por produto no período, da maior para a menor receita
+
+        Args:
+            inicio: Primeiro dia (inclusive); sem limite se None
+            fim: Último dia (inclusive); sem limite se None
+            limite: Quantidade máxima de produtos
+        """
+        periodo = self._no_periodo(inicio, fim)
+        resultado = self._somar_por(self._por_produto_dia.coluna('produto_id')[periodo],
+                                    self._por_produto_dia, periodo, 'produto_id')
+        return self._maiores(resultado, 'receita', limite)
+
+    def por_dia(self, inicio: date | None = None, fim: date | None = None) -> pd.DataFrame:
+        """
+        Unidades e receita de cada dia do período, em ordem de data
+        """
+        periodo = self._no_periodo(inicio, fim)
+        resultado = self._somar_por(self._por_produto_dia.coluna('dia')[periodo],
+                                    self._por_produto_dia, periodo, 'dia')
+        resultado.index = pd.Index([data_do_dia(dia) for dia in resultado.index], name='data')
+        return resultado
+
+    def por_cliente(self, limite: int | None = None) -> pd.DataFrame:
+        """
+        Pedidos e valor (com frete) por cliente, do maior para o menor valor
+        """
+        somas = self._por_cliente
+        resultado = pd.DataFrame({'pedidos': somas.coluna('pedidos').astype(np.int64), 'valor': somas.coluna('valor')},
+                                 index=pd.Index(somas.coluna('cliente_id'), name='cliente_id'))
+        return self._maiores(resultado, 'valor', limite)
+
+    def _no_periodo(self, inicio: date | None, fim: date | None) -> np.ndarray | slice:
+        """
+        Seleção das linhas de (produto, dia) dentro do período
+        """
+        if inicio is None and fim is None:
+            return slice(None)
+        dias = self._por_produto_dia.coluna('dia')
+        selecao = np.ones(len(dias), dtype=bool)
+        if inicio is not None:
+            selecao &= dias >= dia_do_pedido(inicio)
+        if fim is not None:
+            selecao &= dias <= dia_do_pedido(fim)
+        return selecao
+
+    @staticmethod
+    def _somar_por(chaves: np.ndarray, somas: SomasPorChave, selecao: np.ndarray | slice, nome: str) -> pd.DataFrame:
+        """
+        Soma unidades e receita das linhas selecionadas agrupando pela chave, com bincount
+        (as chaves são IDs e dias, inteiros de faixa curta), em ordem de chave
+        """
+        if not len(chaves):
+            return pd.DataFrame({'unidades': [], 'receita': []}, index=pd.Index([], dtype=np.int64, name=nome))
+        menor = int(chaves.min())
+        deslocadas = chaves - menor
+        presentes = np.flatnonzero(np.bincount(deslocadas))
+        unidades = np.bincount(deslocadas, weights=somas.coluna('unidades')[selecao])[presentes]
+        receita = np.bincount(deslocadas, weights=somas.coluna('receita')[selecao])[presentes]
+        return pd.DataFrame({'unidades': unidades, 'receita': receita},
+                            index=pd.Index(presentes + menor, name=nome))
+
+    @staticmethod
+    def _maiores(tabela: pd.DataFrame, coluna: str, limite: int | None) -> pd.DataFrame:
+        if limite is not None:
+            return tabela.nlargest(limite, coluna)
+        return tabela.sort_values(coluna, ascending=False)
+
+    # Status dos pedidos
+
+    def _codigo_status(self, status: str) -> int:
+        if status not in self.STATUS:
+            raise ValueError(f"Status desconhecido: {status}")
+        return self.STATUS.index(status)
+
+    def _nome_status(self, codigo: int) -> str:
+        return self.STATUS[codigo]
+
+    def _marcar_status(self, pedido_id: int, status: str) -> None:
+        self._garantir_capacidade(pedido_id)
+        self._status_pedidos[pedido_id] = self._codigo_status(status)
+
+    def _garantir_capacidade(self, pedido_id: int) -> None:
+        if pedido_id >= len(self._status_pedidos):
+            novo = np.full(max(pedido_id + 1, len(self._status_pedidos) * 2), -1, dtype=np.int8)
+            novo[:len(self._status_pedidos)] = self._status_pedidos
+            self._status_pedidos = novo
@@ -0,0 +1,139 @@
+import heapq
+import threading
+
+
+class EstoqueBaixo:
+    """
+    Acompanha o estoque dos produtos físicos para a reposição: quais produtos
+    estão no limite de reposição ou abaixo dele e quais têm os menores estoques.
+
+    Cada produto tem um limite de reposição (o padrão, se não tiver um próprio).
+    O estoque atual de cada produto fica em um dicionário e o conjunto dos
+    produtos no limite ou abaixo dele é atualizado a cada mudança de estoque,
+    em O(1). Os menores estoques saem de um heap de (quantidade, produto_id):
+    quantidades que mudaram deixam a entrada antiga no heap, descartada ao ser
+    encontrada (como em Reservas), e o heap é refeito quando as entradas antigas
+    passam das válidas.
+    """
+
+    def __init__(self, limite_padrao: int, limites: dict[int, int] | None = None):
+        """
+        Args:
+            limite_padrao: Limite de reposição dos produtos sem limite próprio
+            limites: Limites próprios, por ID do produto
+        """
+        self._limite_padrao = limite_padrao
+        self._limites: dict[int, int] = dict(limites or {})
+        self._quantidades: dict[int, float] = {}  # produto_id -> estoque atual
+        self._abaixo: set[int] = set()            # produtos no limite de reposição ou abaixo dele
+        self._heap: list[tuple[float, int]] = []  # heap de (quantidade, produto_id), com entradas antigas
+        self._trava = threading.Lock()
+
+    def carregar(self, quantidades) -> None:
+        """
+        Passa a acompanhar todos os produtos informados de uma vez, com um único heapify
+
+        As quantidades são lidas com a trava tomada: se os produtos já avisam este
+        objeto das mudanças de estoque, uma mudança feita durante a carga espera e
+        é aplicada depois, sem ser sobrescrita pelo valor lido antes dela.
+
+        Args:
+            quantidades: Iterável de (produto_id, estoque atual)
+        """
+        with self._trava:
+            self._quantidades = dict(quantidades)
+            self._abaixo = {produto_id for produto_id, quantidade in self._quantidades.items()
+                            if quantidade <= self.limite(produto_id)}
+            self._refazer_heap()
+
+    def __len__(self) -> int:
+        return len(self._quantidades)
+
+    def limite(self, produto_id: int) -> int:
+        return self._limites.get(produto_id, self._limite_padrao)
+
+    def atualizar(self, produto_id: int, quantidade: float) -> None:
+        """
+        Registra o estoque atual do produto (passando a acompanhá-lo, se ainda não acompanhava)
+        """
+        with self._trava:
+            if self._quantidades.get(produto_id) == quantidade:
+                return
+            self._quantidades[produto_id] = quantidade
+            self._classificar(produto_id)
+            heapq.heappush(self._heap, (quantidade, produto_id))
+            if len(self._heap) > 2 * len(self._quantidades) + 64:
+                self._refazer_heap()
+
+    def remover(self, produto_id: int) -> None:
+        """
+        Deixa de acompanhar o produto (ex.: removido do catálogo)
+        """
+        with self._trava:
+            self._quantidades.pop(produto_id, None)
+            self._abaixo.discard(produto_id)
+
+    def definir_limite(self, produto_id: int, limite: int | None) -> None:
+        """
+        Define o limite de reposição do produto; None volta ao limite padrão
+
+        Raises:
+            ValueError: Se o limite for negativo
+        """
+        if limite is not None and limite < 0:
+            raise ValueError("O limite de reposição não pode ser negativo.")
+        with self._trava:
+            if limite is None:
+                self._limites.pop(produto_id, None)
+            else:
+                self._limites[produto_id] = limite
+            if produto_id in self._quantidades:
+                self._classificar(produto_id)
+
+    def abaixo_do_limite(self) -> list[tuple[int, float]]:
+        """
+        Produtos no limite de reposição ou abaixo dele, do menor para o maior estoque
+
+        Returns:
+            Lista de (produto_id, quantidade)
+        """
+        with self._trava:
+            itens = [(produto_id, self._quantidades[produto_id]) for produto_id in self._abaixo]
+        return sorted(itens, key=lambda item: (item[1], item[0]))
+
+    def menores(self, quantidade: int) -> list[tuple[int, float]]:
+        """
+        Os produtos de menor estoque, em ordem crescente, sem percorrer todos os produtos:
+        o heap é visitado a partir da raiz, sempre pela menor entrada ainda não visitada
+
+        Args:
+            quantidade: Quantidade máxima de produtos
+
+        Returns:
+            Lista de (produto_id, quantidade)
+        """
+        resultado = []
+        with self._trava:
+            heap = self._heap
+            candidatos = [(heap[0], 0)] if heap else []
+            vistos = set()
+            while candidatos and len(resultado) < quantidade:
+                (estoque, produto_id), posicao = heapq.heappop(candidatos)
+                # Entradas antigas (quantidade já alterada ou produto removido) ficam de fora
+                if self._quantidades.get(produto_id) == estoque and produto_id not in vistos:
+                    vistos.add(produto_id)
+                    resultado.append((produto_id, estoque))
+                for filho in (2 * posicao + 1, 2 * posicao + 2):
+                    if filho < len(heap):
+                        heapq.heappush(candidatos, (heap[filho], filho))
+        return resultado
+
+    def _classificar(self, produto_id: int) -> None:
+        if self._quantidades[produto_id] <= self.limite(produto_id):
+            self._abaixo.add(produto_id)
+        else:
+            self._abaixo.discard(produto_id)
+
+    def _refazer_heap(self) -> None:
+        self._heap = [(quantidade, produto_id) for produto_id, quantidade in self._quantidades.items()]
+        heapq.heapify(self._heap)
@@ -1,44 +1,204 @@
 from abc import ABC
 from rich.console import Console
+from rich.prompt import Prompt, FloatPrompt, IntPrompt
 from rich.table import Table
 
+from mercado.indice_produtos import normalizar_texto
+from produto.item_pedido import ItemPedido
 from produto.produto_digital import ProdutoDigital
 from produto.produto_fisico import ProdutoFisico
 
+
+def quantidade_exibida(produto) -> int | None:
+    """
+    Quantidade da coluna Quantidade: o estoque de um produto físico do catálogo ou
+    a quantidade de um item físico de pedido; None para produtos e itens digitais
+    """
+    if isinstance(produto, (ProdutoFisico, ItemPedido)):
+        return produto.quantidade
+    return None
+
+
 class ExibirProdutos(ABC):
+
+    __slots__ = ('_produtos',)
+
+    # Linhas por página nas listas de produtos
+    ITENS_POR_PAGINA = 20
+    # Critérios de ordenação: nome -> chave. Produtos sem estoque controlado (digitais) ficam no fim.
+    ORDENACOES = {
+        "id": lambda produto: produto.id,
+        "nome": lambda produto: normalizar_texto(produto.nome),
+        "preco": lambda produto: produto.preco,
+        "estoque": lambda produto: ((0, quantidade_exibida(produto)) if quantidade_exibida(produto) is not None
+                                    else (1, 0)),
+    }
+
     def __init__(self, produtos=None):
         """
         Inicializa a classe para exibir produtos disponíveis no mercado.
         """
         self._produtos = produtos
-        
-    def exibir_produtos(self):
+
+    def exibir_produtos(self, produtos=None, titulo: str = "Produtos"):
         """
-        Exibe os produtos disponíveis no mercado ou no pedido em uma tabela formatada.
+        Exibe os produtos disponíveis no mercado ou os itens do pedido em uma tabela formatada.
+        Listas maiores que uma página são exibidas página a página (navegar_produtos).
+
+        Args:
+            produtos: Produtos a exibir no lugar de todos (ex.: resultados de uma busca)
+            titulo: Título da tabela
         """
-        console = Console()
-        tabela = Table(title="Produtos", show_header=True, header_style="bold magenta")
+        produtos = self._lista_produtos(produtos)
+        if not produtos:
+            Console().print("[yellow]Nenhum produto adicionado.[/yellow]")
+            return
+        if len(produtos) > self.ITENS_POR_PAGINA:
+            self.navegar_produtos(produtos, titulo)
+            return
+        self._imprimir_pagina(produtos, titulo, self._larguras(produtos))
+
+    def navegar_produtos(self, produtos=None, titulo: str = "Produtos"):
+        """
+        Exibe os produtos página a página, com navegação (próxima, anterior e ir
+        para uma página), ordenação e filtros por nome, preço e estoque.
 
-        tabela.add_column("ID", style="dim", width=6, justify="center")
-        tabela.add_column("Nome", min_width=20)
-        tabela.add_column("Quantidade", justify="center")
-        tabela.add_column("Preço (R$)", justify="right")
+        Só as linhas da página atual são formatadas, e as larguras das colunas são
+        calculadas uma única vez, para a tabela não mudar de forma entre as páginas.
+        A ordenação e os filtros só são refeitos quando o usuário os altera.
 
-        if not self._produtos:
+        Args:
+            produtos: Produtos a exibir no lugar de todos (ex.: resultados de uma busca)
+            titulo: Título da tabela
+        """
+        console = Console()
+        produtos = self._lista_produtos(produtos)
+        if not produtos:
             console.print("[yellow]Nenhum produto adicionado.[/yellow]")
             return
 
-        # Lida com dicionários (do Mercado) e listas (do Pedido)
-        produtos_iteraveis = self._produtos.values() if isinstance(self._produtos, dict) else self._produtos
+        larguras = self._larguras(produtos)
+        por_pagina = self.ITENS_POR_PAGINA
+        ordenacao, decrescente = "id", False
+        filtros = {}
+        visiveis = produtos
+        pagina = 1
+
+        while True:
+            total_paginas = max((len(visiveis) + por_pagina - 1) // por_pagina, 1)
+            pagina = min(max(pagina, 1), total_paginas)
+            inicio = (pagina - 1) * por_pagina
+            descricao = f"{titulo} (página {pagina}/{total_paginas}, {len(visiveis)} de {len(produtos)} produtos)"
+            if visiveis:
+                self._imprimir_pagina(visiveis[inicio:inicio + por_pagina], descricao, larguras)
+            else:
+                console.print("[yellow]Nenhum produto atende aos filtros.[/yellow]")
+            resumo = [f"ordenado por {ordenacao}{' (decrescente)' if decrescente else ''}"]
+            resumo += [f"{campo}: {descricao_filtro}" for campo, (descricao_filtro, _) in filtros.items()]
+            console.print(f"[dim]{' | '.join(resumo)}[/dim]")
+
+            console.print("[cyan]p[/] Próxima  [cyan]a[/] Anterior  [cyan]i[/] Ir para a página  "
+                          "[cyan]o[/] Ordenar  [cyan]f[/] Filtrar  [cyan]l[/] Limpar filtros  "
+                          "[cyan]t[/] Itens por página  [cyan]s[/] Sair")
+            escolha = Prompt.ask("[bold]Opção[/]", choices=["p", "a", "i", "o", "f", "l", "t", "s"],
+                                 default="p" if pagina < total_paginas else "s")
+
+            if escolha == "p":
+                pagina += 1
+            elif escolha == "a":
+                pagina -= 1
+            elif escolha == "i":
+                pagina = IntPrompt.ask(f"Página (1 a {total_paginas})", default=pagina)
+            elif escolha == "t":
+                primeiro = inicio
+                por_pagina = max(IntPrompt.ask("Itens por página", default=por_pagina), 1)
+                pagina = primeiro // por_pagina + 1  # Continua mostrando o mesmo trecho da lista
+            elif escolha in ("o", "f", "l"):
+                if escolha == "o":
+                    ordenacao = Prompt.ask("Ordenar por", choices=list(self.ORDENACOES), default=ordenacao)
+                    decrescente = Prompt.ask("Ordem", choices=["crescente", "decrescente"],
+                                             default="decrescente" if decrescente else "crescente") == "decrescente"
+                elif escolha == "f":
+                    campo, filtro = self._pedir_filtro()
+                    filtros[campo] = filtro
+                else:
+                    filtros.clear()
+                visiveis = [produto for produto in produtos
+                            if all(condicao(produto) for _, condicao in filtros.values())]
+                if ordenacao != "id" or decrescente:
+                    visiveis.sort(key=self.ORDENACOES[ordenacao], reverse=decrescente)
+                pagina = 1
+            else:
+                return
+
+    @staticmethod
+    def _pedir_filtro() -> tuple[str, tuple]:
+        """
+        Pede um filtro ao usuário
 
-        for produto in produtos_iteraveis:
-            if isinstance(produto, ProdutoFisico):
-                quantidade_str = str(produto.quantidade)
-            elif isinstance(produto, ProdutoDigital):
+        Returns:
+            Tupla (campo, (descrição do filtro, função que diz se o produto passa))
+        """
+        campo = Prompt.ask("Filtrar por", choices=["nome", "preco", "estoque"], default="nome")
+        if campo == "nome":
+            texto = normalizar_texto(Prompt.ask("Nome contém"))
+            return campo, (f"'{texto}'", lambda produto: texto in normalizar_texto(produto.nome))
+        if campo == "preco":
+            minimo = FloatPrompt.ask("Preço mínimo (R$)", default=0.0)
+            maximo = FloatPrompt.ask("Preço máximo (R$)", default=float("inf"), show_default=False)
+            return campo, (f"R$ {minimo:.2f} a {maximo:.2f}", lambda produto: minimo <= produto.preco <= maximo)
+        # Estoque: apenas produtos físicos
+        minimo = IntPrompt.ask("Estoque mínimo", default=0)
+        maximo = IntPrompt.ask("Estoque máximo (vazio para sem limite)", default=-1, show_default=False)
+        if maximo < 0:
+            return campo, (f"a partir de {minimo}", lambda produto: quantidade_exibida(produto) is not None
+                           and quantidade_exibida(produto) >= minimo)
+        return campo, (f"{minimo} a {maximo}", lambda produto: quantidade_exibida(produto) is not None
+                       and minimo <= quantidade_exibida(produto) <= maximo)
+
+    def _lista_produtos(self, produtos=None) -> list:
+        """
+        Lida com dicionários (do Mercado) e listas (do Pedido)
+        """
+        if produtos is None:
+            produtos = self._produtos
+        if not produtos:
+            return []
+        return list(produtos.values()) if isinstance(produtos, dict) else list(produtos)
+
+    @staticmethod
+    def _larguras(produtos: list) -> dict[str, int]:
+        """
+        Larguras das colunas para a lista inteira, para todas as páginas terem o mesmo formato
+        """
+        return {
+            "id": max(len(str(max(produto.id for produto in produtos))), 2),
+            "nome": min(max(max(len(produto.nome) for produto in produtos), 20), 50),
+            "quantidade": max(len(str(max((quantidade for quantidade in map(quantidade_exibida, produtos)
+                                           if quantidade is not None), default=0))), 10),
+            "preco": max(len(f"{max(produto.preco for produto in produtos):.2f}"), 10),
+        }
+
+    @staticmethod
+    def _imprimir_pagina(produtos: list, titulo: str, larguras: dict[str, int]):
+        """
+        Formata e imprime apenas os produtos informados
+        """
+        tabela = Table(title=titulo, show_header=True, header_style="bold magenta")
+        tabela.add_column("ID", style="dim", width=larguras["id"], justify="center")
+        tabela.add_column("Nome", width=larguras["nome"], no_wrap=True, overflow="ellipsis")
+        tabela.add_column("Quantidade", width=larguras["quantidade"], justify="center")
+        tabela.add_column("Preço (R$)", width=larguras["preco"], justify="right")
+
+        for produto in produtos:
+            quantidade = quantidade_exibida(produto)
+            if quantidade is not None:
+                quantidade_str = str(quantidade)
+            elif isinstance(produto, (ProdutoDigital, ItemPedido)):
                 quantidade_str = "[cyan]Digital[/cyan]"
             else:
                 quantidade_str = "N/A"
 
             tabela.add_row(str(produto.id), produto.nome, quantidade_str, f"{produto.preco:.2f}")
-        
-        console.print("\n", tabela)
\ No newline at end of file
+
+        Console().print("\n", tabela)
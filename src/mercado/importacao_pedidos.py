@@ -0,0 +1,167 @@
+import json
+import os
+import numpy as np
+import pandas as pd
+
+# Colunas do lote de pedidos: cada linha é um item; as linhas com a mesma
+# referência formam um pedido (sem a coluna, cada linha é um pedido)
+COLUNAS_OBRIGATORIAS = ["cliente_id", "produto_id"]
+COLUNAS_OPCIONAIS = ["referencia", "quantidade", "data"]
+
+
+def ler_lote(origem) -> pd.DataFrame:
+    """
+    Lê o lote de pedidos de um DataFrame ou de um arquivo .csv ou .jsonl
+
+    Raises:
+        ValueError: Se o formato não é suportado ou faltam colunas obrigatórias
+    """
+    if isinstance(origem, pd.DataFrame):
+        lote = origem.copy()
+    else:
+        extensao = os.path.splitext(str(origem))[1].lower()
+        if extensao == ".csv":
+            lote = pd.read_csv(origem)
+        elif extensao in (".jsonl", ".json"):
+            lote = pd.read_json(origem, lines=extensao == ".jsonl", dtype=False)
+        else:
+            raise ValueError(f"Formato de lote não suportado: '{extensao}'. Use .csv, .jsonl ou um DataFrame.")
+
+    faltantes = [coluna for coluna in COLUNAS_OBRIGATORIAS if coluna not in lote.columns]
+    if faltantes:
+        raise ValueError(f"Colunas obrigatórias ausentes no lote: {', '.join(faltantes)}")
+    return lote.reset_index(drop=True)
+
+
+def validar_lote(lote: pd.DataFrame, catalogo: pd.DataFrame, disponivel: pd.Series,
+                 clientes: set[int] | None = None) -> tuple[pd.DataFrame, pd.DataFrame]:
+    """
+    Valida todas as linhas do lote de uma vez. Um pedido é aceito inteiro ou
+    rejeitado inteiro. O estoque é disputado pelos pedidos na ordem do lote.
+
+    Args:
+        lote: Linhas do lote (ver ler_lote)
+        catalogo: Produtos do catálogo, com as colunas 'id', 'tipo', 'preco' e 'frete'
+        disponivel: Quantidade disponível para venda de cada produto físico (índice: produto_id)
+        clientes: IDs de clientes válidos (se None, não são conferidos)
+
+    Returns:
+        Tupla (itens aceitos, linhas rejeitadas). Os itens aceitos têm as colunas
+        pedido (número sequencial do pedido no lote), cliente_id, produto_id,
+        quantidade, data, fisico, preco e frete (os do catálogo na importação); as linhas rejeitadas são as do lote, com as
+        colunas 'linha' (posição no lote) e 'motivo'.
+    """
+    agora = pd.Timestamp.now()
+    itens = pd.DataFrame({
+        "linha": np.arange(len(lote)),
+        "cliente_id": pd.to_numeric(lote["cliente_id"], errors="coerce"),
+        "produto_id": pd.to_numeric(lote["produto_id"], errors="coerce"),
+        "quantidade": (pd.to_numeric(lote["quantidade"], errors="coerce")
+                       if "quantidade" in lote.columns else pd.Series(1.0, index=lote.index)),
+        "data": pd.Series(agora, index=lote.index),
+    })
+    if "data" in lote.columns:
+        # Linhas sem data entram com a data da importação
+        datas = pd.to_datetime(lote["data"], errors="coerce", format="ISO8601")
+        itens["data"] = datas.where(lote["data"].notna(), agora)
+    referencias = lote["referencia"].astype(str) if "referencia" in lote.columns else itens["linha"]
+    itens["pedido"] = pd.factorize(referencias)[0]
+
+    tipos = catalogo.set_index("id")["tipo"]
+    itens["fisico"] = itens["produto_id"].map(tipos).eq("fisico")
+    itens["preco"] = itens["produto_id"].map(catalogo.set_index("id")["preco"])
+    itens["frete"] = itens["produto_id"].map(catalogo.set_index("id")["frete"])
+    quantidade_inteira = itens["quantidade"].notna() & (itens["quantidade"] % 1 == 0)
+
+    condicoes = [
+        itens["cliente_id"].isna() | (~itens["cliente_id"].isin(clientes) if clientes is not None else False),
+        ~itens["produto_id"].isin(tipos.index),
+        itens["fisico"] & (~quantidade_inteira | (itens["quantidade"] <= 0)),
+        itens["data"].isna(),
+        itens.groupby("pedido")["cliente_id"].transform("nunique") > 1,
+    ]
+    motivos = ["cliente inválido", "produto inexistente", "quantidade inválida", "data inválida",
+               "itens do pedido com clientes diferentes"]
+    itens["motivo"] = np.select(condicoes, motivos, default="")
+
+    # Um item inválido rejeita o pedido inteiro
+    pedido_invalido = itens["motivo"].ne("").groupby(itens["pedido"]).transform("any")
+    itens.loc[pedido_invalido & itens["motivo"].eq(""), "motivo"] = "outro item do pedido foi rejeitado"
+
+    _disputar_estoque(itens, disponivel)
+
+    rejeitadas = itens["motivo"].ne("")
+    relatorio = lote[rejeitadas.to_numpy()].assign(linha=itens.loc[rejeitadas, "linha"].to_numpy(),
+                                                     motivo=itens.loc[rejeitadas, "motivo"].to_numpy())
+    aceitos = itens[~rejeitadas].drop(columns="motivo")
+    aceitos = aceitos.astype({"cliente_id": "int64", "produto_id": "int64"})
+    aceitos["quantidade"] = aceitos["quantidade"].where(aceitos["fisico"], 1).astype("int64")
+    return aceitos.reset_index(drop=True), relatorio.reset_index(drop=True)
+
+
+def _disputar_estoque(itens: pd.DataFrame, disponivel: pd.Series) -> None:
+    """
+    Rejeita (preenchendo 'motivo') os pedidos sem estoque, na ordem do lote.
+
+    A procura total de cada produto, calculada de uma vez, libera sem conferência
+    os produtos cujo estoque atende a todos os pedidos. Só os pedidos com produtos disputados (procura
+    maior que o disponível) são percorridos um a um, e só nesses produtos.
+    """
+    validos = itens["motivo"].eq("") & itens["fisico"]
+    procura = itens[validos].groupby("produto_id")["quantidade"].sum()
+    estoque = disputados = None
+    if not procura.empty:
+        estoque = disponivel.reindex(procura.index).fillna(0)
+        disputados = procura.index[procura > estoque]
+    if disputados is None or disputados.empty:
+        return
+
+    em_disputa = itens[validos & itens["produto_id"].isin(disputados)]
+    restante = estoque[disputados].to_dict()
+    rejeitados = {}
+    for pedido, linhas in em_disputa.groupby("pedido", sort=True):
+        pedidos_por_produto = linhas.groupby("produto_id")["quantidade"].sum()
+        faltando = [produto_id for produto_id, quantidade in pedidos_por_produto.items()
+                    if quantidade > restante[produto_id]]
+        if faltando:
+            rejeitados[pedido] = f"estoque insuficiente do produto {int(faltando[0])}"
+            continue
+        for produto_id, quantidade in pedidos_por_produto.items():
+            restante[produto_id] -= quantidade
+
+    if rejeitados:
+        motivo = itens["pedido"].map(rejeitados)
+        itens.loc[motivo.notna(), "motivo"] = motivo[motivo.notna()]
+
+
+def montar_pedidos(aceitos: pd.DataFrame, primeiro_id: int) -> pd.DataFrame:
+    """
+    Monta as linhas da tabela de pedidos a partir dos itens aceitos, numerando
+    os pedidos a partir de primeiro_id na ordem do lote
+
+    Returns:
+        DataFrame com as colunas id, cliente_id, data, status e produtos
+    """
+    if aceitos.empty:
+        return pd.DataFrame(columns=["id", "cliente_id", "data", "status", "produtos"])
+    # Itens do mesmo pedido ficam juntos, mantendo a ordem do lote
+    aceitos = aceitos.iloc[np.argsort(pd.factorize(aceitos["pedido"])[0], kind="stable")]
+    numeros = aceitos["pedido"].to_numpy()
+    inicios = np.flatnonzero(np.r_[True, numeros[1:] != numeros[:-1]])
+
+    itens = [{"id": produto_id, "quantidade": quantidade, "preco": preco, "frete": frete} if fisico
+             else {"id": produto_id, "preco": preco}
+             for produto_id, quantidade, fisico, preco, frete in zip(aceitos["produto_id"].tolist(),
+                                                                     aceitos["quantidade"].tolist(),
+                                                                     aceitos["fisico"].tolist(),
+                                                                     aceitos["preco"].tolist(),
+                                                                     aceitos["frete"].tolist())]
+    limites = np.r_[inicios, len(itens)].tolist()
+    primeiras = aceitos.iloc[inicios]
+    return pd.DataFrame({
+        "id": primeiro_id + np.arange(len(inicios)),
+        "cliente_id": primeiras["cliente_id"].to_numpy(),
+        "data": [data.isoformat() for data in primeiras["data"]],
+        "status": "aguardando entrega",
+        "produtos": [json.dumps(itens[inicio:fim]) for inicio, fim in zip(limites[:-1], limites[1:])],
+    })
@@ -0,0 +1,220 @@
+import heapq
+import re
+import unicodedata
+from bisect import bisect_left, insort
+from collections import Counter, defaultdict
+
+# Fração mínima dos trigramas da busca que um nome precisa ter para entrar como resultado aproximado
+SIMILARIDADE_MINIMA = 0.5
+
+_PALAVRA = re.compile(r"\w+")
+
+
+def normalizar_texto(texto: str) -> str:
+    """
+    Remove acentos e diferenças de maiúsculas e minúsculas (ex.: "Café" -> "cafe")
+    """
+    texto = str(texto)
+    if texto.isascii():
+        return texto.casefold()
+    decomposto = unicodedata.normalize("NFKD", texto)
+    return "".join(caractere for caractere in decomposto if not unicodedata.combining(caractere)).casefold()
+
+
+def palavras(texto: str) -> list[str]:
+    return _PALAVRA.findall(normalizar_texto(texto))
+
+
+def trigramas(palavra: str) -> set[str]:
+    """
+    Trigramas da palavra com as bordas marcadas (ex.: "sal" -> " sa", "sal", "al ")
+    """
+    marcada = f" {palavra} "
+    return {marcada[inicio:inicio + 3] for inicio in range(len(marcada) - 2)}
+
+
+class IndiceProdutos:
+    """
+    Índice de busca dos produtos pelo nome, mantido em memória: um índice
+    invertido de palavras para produtos (com a lista de palavras em ordem,
+    para a busca por prefixo) e um índice de trigramas das palavras, para
+    encontrar nomes digitados com erro ou por um pedaço do meio da palavra.
+
+    A busca custa proporcionalmente aos produtos que têm as palavras buscadas,
+    e não ao tamanho do catálogo; a busca aproximada percorre só o vocabulário
+    dos nomes, que é bem menor que o catálogo. O índice é atualizado produto a
+    produto, a cada cadastro, edição ou remoção.
+    """
+
+    def __init__(self):
+        self._nomes: dict[int, tuple[str, ...]] = {}        # id -> palavras do nome normalizado
+        self._por_palavra: dict[str, set[int]] = {}
+        self._palavras: list[str] = []                       # palavras indexadas, em ordem
+        self._por_trigrama: dict[str, set[str]] = defaultdict(set)  # trigrama -> palavras
+
+    def __len__(self) -> int:
+        return len(self._nomes)
+
+    def __contains__(self, produto_id: int) -> bool:
+        return produto_id in self._nomes
+
+    @classmethod
+    def montar(cls, nomes) -> "IndiceProdutos":
+        """
+        Monta o índice de uma vez, ordenando a lista de palavras só no final
+
+        Args:
+            nomes: Iterável de (id do produto, nome)
+        """
+        indice = cls()
+        for produto_id, nome in nomes:
+            indice._indexar(produto_id, nome, ordenar=False)
+        indice._palavras = sorted(indice._por_palavra)
+        return indice
+
+    def adicionar(self, produto_id: int, nome: str) -> None:
+        """
+        Indexa o nome do produto. Se ele já estava indexado, suas entradas são substituídas.
+        """
+        self._indexar(produto_id, nome, ordenar=True)
+
+    def _indexar(self, produto_id: int, nome: str, ordenar: bool) -> None:
+        if produto_id in self._nomes:
+            self.remover(produto_id)
+        nome_palavras = tuple(palavras(nome))
+        self._nomes[produto_id] = nome_palavras
+        for palavra in nome_palavras:
+            ids = self._por_palavra.get(palavra)
+            if ids is None:
+                # Palavra nova no vocabulário
+                ids = self._por_palavra[palavra] = set()
+                if ordenar:
+                    insort(self._palavras, palavra)
+                for trigrama in trigramas(palavra):
+                    self._por_trigrama[trigrama].add(palavra)
+            ids.add(produto_id)
+
+    def remover(self, produto_id: int) -> None:
+        """
+        Remove o produto do índice (se estiver indexado)
+        """
+        nome_palavras = self._nomes.pop(produto_id, None)
+        if nome_palavras is None:
+            return
+        for palavra in set(nome_palavras):
+            ids = self._por_palavra[palavra]
+            ids.discard(produto_id)
+            if not ids:
+                # Nenhum produto usa mais a palavra: sai do vocabulário
+                del self._por_palavra[palavra]
+                del self._palavras[bisect_left(self._palavras, palavra)]
+                for trigrama in trigramas(palavra):
+                    self._descartar(self._por_trigrama, trigrama, palavra)
+
+    def buscar(self, texto: str, limite: int = 20) -> list[int]:
+        """
+        Retorna os IDs dos produtos que correspondem à busca, dos mais relevantes
+        para os menos relevantes: primeiro o produto com o ID digitado, depois os
+        nomes com palavras que começam com todas as palavras buscadas (palavras
+        inteiras e o começo do nome contam mais) e, para completar, os nomes com
+        palavras parecidas, pelos trigramas em comum.
+
+        Args:
+            texto: Parte do nome (em qualquer ordem, sem diferenciar acentos) ou o ID
+            limite: Quantidade máxima de resultados
+        """
+        termos = palavras(texto)
+        if not termos or limite <= 0:
+            return []
+
+        resultado = []
+        texto = texto.strip()
+        if texto.isdigit() and int(texto) in self._nomes:
+            resultado.append(int(texto))
+
+        candidatos = None
+        for termo in termos:
+            ids = self._ids_das_palavras(self._com_prefixo(termo))
+            candidatos = ids if candidatos is None else candidatos & ids
+            if not candidatos:
+                break
+        if candidatos:
+            def relevancia(produto_id: int):
+                nome_palavras = self._nomes[produto_id]
+                inteiras = sum(termo in nome_palavras for termo in termos)
+                comeca = nome_palavras[0].startswith(termos[0])
+                return -inteiras, not comeca, sum(map(len, nome_palavras)), produto_id
+
+            escolhidos = heapq.nsmallest(limite + len(resultado), candidatos, key=relevancia)
+            resultado.extend(produto_id for produto_id in escolhidos if produto_id not in resultado)
+
+        if len(resultado) < limite:
+            resultado.extend(self._parecidos(termos, limite - len(resultado), set(resultado)))
+        return resultado[:limite]
+
+    def _com_prefixo(self, prefixo: str) -> list[str]:
+        """
+        Palavras do vocabulário que começam com o prefixo
+        """
+        inicio = fim = bisect_left(self._palavras, prefixo)
+        while fim < len(self._palavras) and self._palavras[fim].startswith(prefixo):
+            fim += 1
+        return self._palavras[inicio:fim]
+
+    def _ids_das_palavras(self, palavras_encontradas) -> set[int]:
+        conjuntos = [self._por_palavra[palavra] for palavra in palavras_encontradas]
+        if len(conjuntos) == 1:
+            return set(conjuntos[0])
+        return set().union(*conjuntos)
+
+    def _semelhantes(self, termo: str) -> dict[str, float]:
+        """
+        Palavras do vocabulário parecidas com o termo, com a semelhança de cada
+        uma (coeficiente de Dice dos trigramas; 1 para as que começam com o termo).
+        Números (códigos, tamanhos) só casam pelo começo.
+        """
+        if termo.isdigit():
+            return dict.fromkeys(self._com_prefixo(termo), 1.0)
+        trigramas_termo = trigramas(termo)
+        contagem = Counter()
+        for trigrama in trigramas_termo:
+            contagem.update(self._por_trigrama.get(trigrama, ()))
+        semelhantes = {}
+        for palavra, comuns in contagem.items():
+            semelhanca = 2 * comuns / (len(trigramas_termo) + len(trigramas(palavra)))
+            if semelhanca >= SIMILARIDADE_MINIMA:
+                semelhantes[palavra] = semelhanca
+        semelhantes.update(dict.fromkeys(self._com_prefixo(termo), 1.0))
+        return semelhantes
+
+    def _parecidos(self, termos: list[str], limite: int, excluir: set[int]) -> list[int]:
+        """
+        IDs dos produtos com uma palavra parecida com cada termo da busca,
+        dos mais para os menos parecidos
+        """
+        semelhancas = []
+        candidatos = None
+        for termo in termos:
+            semelhantes = self._semelhantes(termo)
+            ids = self._ids_das_palavras(semelhantes)
+            candidatos = ids if candidatos is None else candidatos & ids
+            if not candidatos:
+                return []
+            semelhancas.append(semelhantes)
+        candidatos -= excluir
+
+        def relevancia(produto_id: int):
+            nome_palavras = self._nomes[produto_id]
+            total = sum(max(semelhantes.get(palavra, 0.0) for palavra in nome_palavras)
+                        for semelhantes in semelhancas)
+            return -total, sum(map(len, nome_palavras)), produto_id
+
+        return heapq.nsmallest(limite, candidatos, key=relevancia)
+
+    @staticmethod
+    def _descartar(indice: dict, chave, valor) -> None:
+        valores = indice.get(chave)
+        if valores is not None:
+            valores.discard(valor)
+            if not valores:
+                del indice[chave]
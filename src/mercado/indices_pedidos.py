@@ -0,0 +1,167 @@
+from bisect import bisect_left, insort
+from collections import defaultdict
+from datetime import datetime
+
+class IndicePedidos:
+    """
+    Índices secundários dos pedidos, mantidos em memória: por cliente, por status,
+    por data (lista ordenada) e um índice invertido de produto para pedidos.
+
+    As consultas custam proporcionalmente ao número de pedidos encontrados, e
+    não ao total de pedidos. O índice também registra quais partições da tabela
+    de pedidos já foram indexadas (e em qual versão), para que só as partições
+    necessárias a uma consulta precisem ser lidas.
+    """
+
+    def __init__(self):
+        # id -> (cliente_id, status, data, ids dos produtos, partição)
+        self._pedidos: dict[int, tuple] = {}
+        self._por_cliente: dict[int, set[int]] = defaultdict(set)
+        self._por_status: dict[str, set[int]] = defaultdict(set)
+        self._por_produto: dict[int, set[int]] = defaultdict(set)
+        self._por_data: list[tuple[datetime, int]] = []  # (data, id), em ordem crescente
+        self._por_particao: dict[str, set[int]] = defaultdict(set)
+        self._versoes_particoes: dict[str, int] = {}     # partição indexada -> versão da tabela
+
+    def __len__(self) -> int:
+        return len(self._pedidos)
+
+    def __contains__(self, pedido_id: int) -> bool:
+        return pedido_id in self._pedidos
+
+    def adicionar(self, pedido_id: int, cliente_id: int, status: str, data: datetime,
+                  produtos: list[int], particao: str) -> None:
+        """
+        Indexa um pedido. Se ele já estava indexado, suas entradas são substituídas.
+
+        Args:
+            pedido_id: ID do pedido
+            cliente_id: ID do cliente
+            status: Status atual do pedido
+            data: Data do pedido
+            produtos: IDs dos produtos do pedido
+            particao: Partição da tabela de pedidos onde o pedido fica
+        """
+        if pedido_id in self._pedidos:
+            self.remover(pedido_id)
+        produtos = tuple(dict.fromkeys(produtos))
+        self._pedidos[pedido_id] = (cliente_id, status, data, produtos, particao)
+        self._por_cliente[cliente_id].add(pedido_id)
+        self._por_status[status].add(pedido_id)
+        for produto_id in produtos:
+            self._por_produto[produto_id].add(pedido_id)
+        insort(self._por_data, (data, pedido_id))
+        self._por_particao[particao].add(pedido_id)
+
+    def remover(self, pedido_id: int) -> None:
+        """
+        Remove o pedido de todos os índices (se estiver indexado)
+        """
+        entrada = self._pedidos.pop(pedido_id, None)
+        if entrada is None:
+            return
+        cliente_id, status, data, produtos, particao = entrada
+        self._descartar(self._por_cliente, cliente_id, pedido_id)
+        self._descartar(self._por_status, status, pedido_id)
+        for produto_id in produtos:
+            self._descartar(self._por_produto, produto_id, pedido_id)
+        self._descartar(self._por_particao, particao, pedido_id)
+        posicao = bisect_left(self._por_data, (data, pedido_id))
+        if posicao < len(self._por_data) and self._por_data[posicao] == (data, pedido_id):
+            del self._por_data[posicao]
+
+    def atualizar_status(self, pedido_id: int, status: str) -> bool:
+        """
+        Move o pedido para o índice do novo status
+
+        Returns:
+            False se o pedido não está indexado
+        """
+        entrada = self._pedidos.get(pedido_id)
+        if entrada is None:
+            return False
+        cliente_id, status_anterior, data, produtos, particao = entrada
+        if status != status_anterior:
+            self._descartar(self._por_status, status_anterior, pedido_id)
+            self._por_status[status].add(pedido_id)
+            self._pedidos[pedido_id] = (cliente_id, status, data, produtos, particao)
+        return True
+
+    def ids(self):
+        """
+        Retorna os IDs de todos os pedidos indexados
+        """
+        return self._pedidos.keys()
+
+    def particao_de(self, pedido_id: int) -> str | None:
+        entrada = self._pedidos.get(pedido_id)
+        return entrada[4] if entrada is not None else None
+
+    def particao_indexada(self, particao: str, versao: int) -> bool:
+        """
+        Indica se a partição já foi indexada na versão informada
+        """
+        return self._versoes_particoes.get(particao) == versao
+
+    def marcar_particao(self, particao: str, versao: int) -> None:
+        self._versoes_particoes[particao] = versao
+
+    def remover_particao(self, particao: str) -> None:
+        """
+        Remove dos índices todos os pedidos da partição, para indexá-la de novo
+        """
+        for pedido_id in list(self._por_particao.get(particao, ())):
+            self.remover(pedido_id)
+        self._versoes_particoes.pop(particao, None)
+
+    def consultar(self, cliente_id: int | None = None, status: str | None = None,
+                  inicio: datetime | None = None, fim: datetime | None = None,
+                  produto_id: int | None = None) -> list[int]:
+        """
+        Retorna os IDs dos pedidos que atendem a todos os critérios informados,
+        dos mais recentes para os mais antigos
+
+        Args:
+            cliente_id: Apenas pedidos desse cliente
+            status: Apenas pedidos com esse status
+            inicio: Apenas pedidos feitos a partir dessa data
+            fim: Apenas pedidos feitos antes dessa data
+            produto_id: Apenas pedidos que contêm esse produto
+        """
+        conjuntos = []
+        if cliente_id is not None:
+            conjuntos.append(self._por_cliente.get(cliente_id, set()))
+        if status is not None:
+            conjuntos.append(self._por_status.get(status, set()))
+        if produto_id is not None:
+            conjuntos.append(self._por_produto.get(produto_id, set()))
+
+        if not conjuntos:
+            # Só o período: fatia da lista ordenada por data
+            esquerda = bisect_left(self._por_data, (inicio,)) if inicio is not None else 0
+            direita = bisect_left(self._por_data, (fim,)) if fim is not None else len(self._por_data)
+            return [pedido_id for _, pedido_id in reversed(self._por_data[esquerda:direita])]
+
+        # A interseção começa pelo menor conjunto, para custar o tamanho do resultado
+        conjuntos.sort(key=len)
+        encontrados = set(conjuntos[0])
+        for conjunto in conjuntos[1:]:
+            encontrados &= conjunto
+            if not encontrados:
+                return []
+
+        resultado = []
+        for pedido_id in encontrados:
+            data = self._pedidos[pedido_id][2]
+            if (inicio is None or data >= inicio) and (fim is None or data < fim):
+                resultado.append((data, pedido_id))
+        resultado.sort(reverse=True)
+        return [pedido_id for _, pedido_id in resultado]
+
+    @staticmethod
+    def _descartar(indice: dict, chave, pedido_id: int) -> None:
+        ids = indice.get(chave)
+        if ids is not None:
+            ids.discard(pedido_id)
+            if not ids:
+                del indice[chave]
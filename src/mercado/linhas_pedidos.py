@@ -0,0 +1,97 @@
+import numpy as np
+
+from produto.produto import Produto
+
+
+class LinhasPedidos:
+    """
+    Itens de vários pedidos em colunas (arrays NumPy): o pedido de cada linha
+    (posição na lista de pedidos), o preço, a quantidade e o frete da linha.
+
+    Os totais de todos os pedidos saem de uma única soma agrupada por pedido,
+    sem montar os produtos dos pedidos ainda não hidratados nem chamar métodos
+    item a item. Como em ItemPedido, o tipo de cada linha é o do item gravado
+    (físico se tem quantidade); itens digitais entram com quantidade 1 e frete zero.
+    """
+
+    def __init__(self, pedido: np.ndarray, preco: np.ndarray, quantidade: np.ndarray,
+                 frete: np.ndarray, quantidade_pedidos: int):
+        self.pedido = pedido
+        self.preco = preco
+        self.quantidade = quantidade
+        self.frete = frete
+        self.quantidade_pedidos = quantidade_pedidos
+
+    def __len__(self) -> int:
+        return len(self.pedido)
+
+    @classmethod
+    def de_pedidos(cls, pedidos: list, catalogo: dict[int, Produto] | None = None) -> "LinhasPedidos":
+        """
+        Monta as linhas dos pedidos
+
+        Os pedidos ainda não hidratados são lidos direto dos itens gravados, com as
+        mesmas regras de ItemPedido.de_gravado: o preço e o frete gravados no item
+        (ou os do catálogo, nos itens gravados sem eles), inclusive para produtos
+        que não estão mais no catálogo. Os já hidratados usam os próprios itens
+        (ItemPedido), que podem ter sido alterados depois de montados.
+
+        Args:
+            pedidos: Pedidos, na ordem em que os totais são retornados
+            catalogo: Produtos do mercado por ID. Se None, os pedidos são hidratados.
+        """
+        # Itens gravados: (posição do pedido, id do produto, quantidade, preço, frete), resolvidos no catálogo de uma vez
+        posicoes_gravadas, ids_gravados, quantidades_gravadas, precos_gravados, fretes_gravados = [], [], [], [], []
+        # Itens já montados: colunas preenchidas direto dos itens
+        posicoes, precos, quantidades, fretes = [], [], [], []
+
+        for posicao, pedido in enumerate(pedidos):
+            itens = pedido.itens_nao_hidratados() if catalogo is not None else None
+            if itens is not None:
+                for item in itens:
+                    posicoes_gravadas.append(posicao)
+                    ids_gravados.append(item['id'])
+                    quantidades_gravadas.append(item.get('quantidade', np.nan))
+                    precos_gravados.append(item.get('preco', np.nan))
+                    fretes_gravados.append(item.get('frete', np.nan))
+                continue
+            for item in pedido.produtos:
+                posicoes.append(posicao)
+                precos.append(item.preco)
+                quantidades.append(item.unidades)
+                fretes.append(item.calcular_frete())
+
+        pedido = np.array(posicoes, dtype=np.int64)
+        preco = np.array(precos, dtype=float)
+        quantidade = np.array(quantidades, dtype=float)
+        frete = np.array(fretes, dtype=float)
+
+        if ids_gravados:
+            # Uma consulta ao catálogo por produto distinto, e não por item
+            unicos, inverso = np.unique(np.array(ids_gravados, dtype=np.int64), return_inverse=True)
+            # Produtos fora do catálogo: preço e frete desconhecidos (zero) se não foram gravados no item
+            produtos = [catalogo.get(int(produto_id)) for produto_id in unicos]
+            preco_unico = np.array([produto.preco if produto is not None else 0.0 for produto in produtos], dtype=float)
+            frete_unico = np.array([produto.calcular_frete() if produto is not None else 0.0 for produto in produtos],
+                                   dtype=float)
+
+            pedido = np.concatenate([pedido, np.array(posicoes_gravadas, dtype=np.int64)])
+            # Itens gravados antes de o preço e o frete da venda serem guardados no item usam os do catálogo
+            preco_item = np.array(precos_gravados, dtype=float)
+            preco = np.concatenate([preco, np.where(np.isnan(preco_item), preco_unico[inverso], preco_item)])
+            # Itens gravados sem quantidade são digitais, qualquer que seja o tipo atual do produto
+            quantidade_item = np.array(quantidades_gravadas, dtype=float)
+            fisico = ~np.isnan(quantidade_item)
+            quantidade = np.concatenate([quantidade, np.where(fisico, quantidade_item, 1.0)])
+            frete_item = np.array(fretes_gravados, dtype=float)
+            frete = np.concatenate([frete, np.where(fisico, np.where(np.isnan(frete_item), frete_unico[inverso],
+                                                                     frete_item), 0.0)])
+
+        return cls(pedido, preco, quantidade, frete, len(pedidos))
+
+    def totais(self) -> np.ndarray:
+        """
+        Total de cada pedido (preço x quantidade + frete de cada linha), na ordem dos pedidos
+        """
+        return np.bincount(self.pedido, weights=self.preco * self.quantidade + self.frete,
+                           minlength=self.quantidade_pedidos)
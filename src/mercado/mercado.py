@@ -1,101 +1,1191 @@
 import pandas as pd
 import json
+import threading
+from collections import OrderedDict
+from contextlib import ExitStack
+from datetime import date, datetime, timedelta
+from types import SimpleNamespace
+from ferramentas import configuracao
 from ferramentas.banco_de_dados import BancoDeDados
+from ferramentas.diario import Diario
+from ferramentas.escrita_assincrona import EscritorAssincrono
+from ferramentas.particoes import TabelaParticionada
+from ferramentas.travas import NUMERO_FAIXAS, faixa_da_chave
+from mercado.analise_vendas import AnaliseVendas
+from mercado.estoque_baixo import EstoqueBaixo
 from mercado.exibir_produtos import ExibirProdutos
+from mercado.importacao_pedidos import ler_lote, validar_lote, montar_pedidos
+from mercado.indice_produtos import IndiceProdutos
+from mercado.indices_pedidos import IndicePedidos
+from mercado.linhas_pedidos import LinhasPedidos
 from mercado.pedido import Pedido
+from mercado.reservas import Reservas
+from mercado.sincronizacao_catalogo import COLUNAS_PRODUTOS, ler_catalogo, normalizar_catalogo, validar_catalogo, comparar_catalogos
+from produto.item_pedido import ItemPedido
 from produto.produto import Produto
 from produto.produto_digital import ProdutoDigital
-from produto.produto_fisico import ProdutoFisico
+from produto.produto_fisico import EstoqueInsuficiente, ProdutoFisico
 from rich.console import Console
 from rich.prompt import Prompt, FloatPrompt, IntPrompt
 from rich.table import Table
 
 class Mercado(ExibirProdutos):
 
-    def __init__(self):
+    # Colunas da tabela de pedidos usadas para reconstruir um Pedido
+    COLUNAS_PEDIDOS = ['id', 'cliente_id', 'data', 'status', 'produtos']
+    # Quantidade máxima de produtos exibidos por busca em selecionar_produto
+    LIMITE_RESULTADOS_BUSCA = 15
+
+    def __init__(self, estado: dict | None = None):
         """
         Inicializa o mercado com uma lista de produtos e pedidos
+
+        Args:
+            estado: Estado exportado por exportar_estado() (snapshot). Se informado,
+                    o mercado é restaurado a partir dele em vez de lido do banco.
+
+        Raises:
+            ValueError: Se o estado informado não corresponde mais ao diário de pedidos
+        """
+        self._diario_pedidos = Diario("pedidos")
+        self._tabela_pedidos = self.tabela_pedidos()
+        if estado is not None:
+            # Valida antes de criar o escritor, para não deixar uma thread órfã em caso de erro
+            registros_novos = self._registros_desde(*estado['diario'])
+
+        # Gravações feitas durante o atendimento vão para o escritor em segundo plano
+        self._escritor = EscritorAssincrono()
+        self._variacoes_estoque = {}           # produto_id -> variação ainda não gravada
+        self._registros_pedidos_pendentes = []  # registros do diário ainda não gravados
+        self._trava_pendentes = threading.Lock()
+        self._trava_gravacao_diario = threading.Lock()
+        # Serializa entre threads as consultas e alterações do índice, do cache e da lista de pedidos
+        self._trava_pedidos = threading.RLock()
+        # Travas do estoque em memória, uma por faixa de produtos: sessões que compram
+        # produtos de faixas diferentes não disputam a mesma trava
+        self._travas_estoque = [threading.Lock() for _ in range(NUMERO_FAIXAS)]
+        # Estoque segurado pelos carrinhos abertos, baixado só na conclusão do pedido
+        self._reservas = Reservas(configuracao.VALIDADE_RESERVA_MINUTOS * 60)
+        # Pedidos já montados, reaproveitados entre consultas: id -> Pedido (do menos para o mais recente em uso)
+        self._cache_pedidos: OrderedDict[int, Pedido] = OrderedDict()
+        # Índice de busca por nome, montado na primeira busca e atualizado a cada alteração do catálogo
+        self._indice_produtos: IndiceProdutos | None = None
+        # Produtos no limite de reposição e menores estoques, montado na primeira consulta e
+        # atualizado pelos próprios produtos a cada mudança de estoque
+        self._estoque_baixo: EstoqueBaixo | None = None
+
+        if estado is not None:
+            super().__init__(estado['produtos'])
+            self._pedidos = estado['pedidos']
+            self._indice_pedidos = estado['indice_pedidos']
+            self._analise_vendas = estado.get('analise_vendas')
+            for pedido in self._pedidos:
+                pedido.definir_hidratacao(self._hidratar_itens)
+                self._guardar_em_cache(pedido)
+            # Pedidos registrados por outros terminais depois do snapshot
+            self._aplicar_registros_pedidos(registros_novos)
+            self._registros_aplicados = len(self._diario_pedidos)
+            self._geracao_diario = self._diario_pedidos.geracao
+        else:
+            super().__init__(self.carregar_produtos())
+
+            # O índice começa com os pedidos do diário; as partições são indexadas sob demanda
+            self._pedidos = []
+            self._indice_pedidos = IndicePedidos()
+            # Agregados de vendas, montados no primeiro relatório
+            self._analise_vendas = None
+            self._registros_aplicados = 0
+            self._geracao_diario = None
+            self._sincronizar_diario()
+
+            # Apenas os pedidos recentes ficam em memória; o histórico é lido das partições sob demanda
+            self._pedidos = self.carregar_pedidos(
+                inicio=datetime.now() - timedelta(days=configuracao.JANELA_PEDIDOS_DIAS))
+
+            # Incorpora o diário à tabela base quando ele cresce demais, para manter a leitura rápida
+            if len(self._diario_pedidos) > configuracao.LIMITE_DIARIO_PEDIDOS:
+                self.salvar_pedidos()
+
+    def exportar_estado(self) -> dict | None:
+        """
+        Retorna o estado já montado do mercado, para ser guardado no snapshot
+        de inicialização rápida. Deve ser chamado após encerrar().
+
+        Returns:
+            Dicionário aceito pelo construtor, ou None se os pedidos em memória
+            não puderem ser atualizados com o diário
+        """
+        # Traz para a memória os pedidos registrados por outros terminais durante a sessão
+        if not self._sincronizar_diario():
+            return None
+
+        return {
+            'produtos': self._produtos,
+            'pedidos': self._pedidos,
+            'indice_pedidos': self._indice_pedidos,
+            'analise_vendas': self._analise_vendas,
+            'diario': (self._diario_pedidos.geracao, self._registros_aplicados),
+        }
+
+    def _registros_desde(self, geracao: int | None, quantidade: int) -> list[dict]:
         """
-        super().__init__(self.carregar_produtos())
-        self._pedidos = self.carregar_pedidos()
+        Retorna os registros anexados ao diário de pedidos depois dos primeiros 'quantidade'.
 
-    def carregar_pedidos(self, cliente_id: int | None = None) -> list[Pedido]:
+        Raises:
+            ValueError: Se o diário foi compactado depois disso
+        """
+        registros = self._diario_pedidos.ler()
+        if quantidade and (self._diario_pedidos.geracao != geracao or len(registros) < quantidade):
+            raise ValueError("O diário de pedidos foi compactado depois do snapshot.")
+        return registros[quantidade:]
+
+    def _sincronizar_diario(self) -> bool:
+        """
+        Reflete nos pedidos em memória e no índice os registros anexados ao
+        diário (por este ou por outros terminais) desde a última leitura.
+
+        Returns:
+            False se o diário foi compactado por outro terminal nesse meio tempo;
+            os registros incorporados às partições chegam ao índice quando elas
+            forem indexadas de novo (a versão delas muda na compactação)
+        """
+        registros = self._diario_pedidos.ler()
+        # Compactado desde a última leitura se a geração mudou, mesmo que já tenha tantos registros quanto antes
+        completo = not self._registros_aplicados or (self._diario_pedidos.geracao == self._geracao_diario
+                                                     and len(registros) >= self._registros_aplicados)
+        self._geracao_diario = self._diario_pedidos.geracao
+        if not completo:
+            self._registros_aplicados = 0
+            # Os pedidos incorporados às partições pelo outro terminal não passaram pelos agregados
+            self._analise_vendas = None
+        self._aplicar_registros_pedidos(registros[self._registros_aplicados:])
+        self._registros_aplicados = len(registros)
+        return completo
+
+    def _aplicar_registros_pedidos(self, registros: list[dict]):
+        """
+        Reflete nos pedidos em memória e no índice os registros do diário. Registros
+        que já estão em memória (por exemplo, os gravados por este processo) não mudam nada.
+        """
+        if not registros:
+            return
+        por_id = {pedido.id: pedido for pedido in self._pedidos}
+        for registro in registros:
+            dados = registro['dados']
+            if registro['op'] == Diario.INSERIR:
+                self._indexar_pedido(SimpleNamespace(**dados))
+                if dados['id'] not in por_id:
+                    pedido = self._cache_pedidos.get(dados['id']) or self._criar_pedido(SimpleNamespace(**dados))
+                    self._pedidos.append(pedido)
+                    por_id[pedido.id] = pedido
+            elif 'status' in dados:
+                self._indice_pedidos.atualizar_status(dados['id'], dados['status'])
+                if self._analise_vendas is not None:
+                    self._analise_vendas.atualizar_status(dados['id'], dados['status'])
+                pedido = por_id.get(dados['id']) or self._cache_pedidos.get(dados['id'])
+                if pedido is not None:
+                    pedido.status = dados['status']
+                    pedido.limpar_alteracoes()  # Já está gravado
+
+    @staticmethod
+    def tabela_pedidos() -> TabelaParticionada:
+        """
+        Retorna a tabela de pedidos, dividida em partições mensais pela data do pedido.
+        """
+        return TabelaParticionada("pedidos", coluna_data="data", chave="id", colunas_contadas=["status"])
+
+    @staticmethod
+    def _converter_data(valor) -> datetime:
+        """
+        Converte a data de um pedido (texto ISO, como gravada, ou Timestamp) para datetime
+        """
+        if isinstance(valor, str):
+            # Bem mais rápido que pd.to_datetime para um valor só
+            return datetime.fromisoformat(valor)
+        return pd.Timestamp(valor).to_pydatetime()
+
+    def _indexar_pedido(self, row, particao: str | None = None):
+        """
+        Adiciona ao índice o pedido de uma linha da tabela (ou de um registro do diário).
+        """
+        data = self._converter_data(row.data)
+        itens = json.loads(row.produtos) if isinstance(row.produtos, str) else []
+        self._indice_pedidos.adicionar(int(row.id), int(row.cliente_id), row.status, data,
+                                       [int(item['id']) for item in itens],
+                                       particao or self._tabela_pedidos.particao_da_data(data))
+        if self._analise_vendas is not None:
+            if self._analise_vendas.contabilizado(int(row.id)):
+                self._analise_vendas.atualizar_status(int(row.id), row.status)
+            else:
+                self._analise_vendas.registrar_pedido(int(row.id), int(row.cliente_id), row.status, data,
+                                                      self._linhas_venda(itens))
+
+    def _linhas_venda(self, itens: list[dict]) -> list[tuple[int, float, float, float]]:
+        """
+        Converte os itens gravados de um pedido em (produto_id, unidades, receita, frete),
+        com o preço e o frete da venda gravados no item, para os agregados de vendas.
+        Segue as regras de ItemPedido.de_gravado (inclusive para produtos fora do catálogo).
+        """
+        linhas = []
+        for item in itens:
+            item_pedido = ItemPedido.de_gravado(item, self._produtos.get(item['id']))
+            linhas.append((item_pedido.id, item_pedido.unidades, item_pedido.preco * item_pedido.unidades,
+                           item_pedido.calcular_frete()))
+        return linhas
+
+    def _particoes_relevantes(self, inicio: datetime | None, fim: datetime | None,
+                              status: str | None, resumo_diario: tuple) -> list[str]:
+        """
+        Retorna as partições que podem ter pedidos no período e com o status informados.
+        """
+        # O manifesto diz quais partições têm pedidos no período (e com o status pedido)
+        contagem = ('status', status) if status is not None else None
+        particoes = set(self._tabela_pedidos.particoes(inicio, fim, contagem))
+        if contagem is not None:
+            # Mudanças de status no diário ainda não estão nas contagens do manifesto
+            for campos in resumo_diario[1].values():
+                if 'data' not in campos:
+                    return self._tabela_pedidos.particoes(inicio, fim)
+                particoes.add(self._tabela_pedidos.particao_da_data(campos['data']))
+        return sorted(particoes)
+
+    def _garantir_indexado(self, particoes: list[str], resumo_diario: tuple):
+        """
+        Indexa as partições ainda não indexadas, ou alteradas desde a indexação
+        (por uma compactação deste ou de outro terminal).
+        """
+        banco = BancoDeDados()
+        for particao in particoes:
+            versao = banco.versao_tabela(self._tabela_pedidos.nome_tabela_particao(particao))
+            if self._indice_pedidos.particao_indexada(particao, versao):
+                continue
+
+            self._indice_pedidos.remover_particao(particao)
+            base = self._tabela_pedidos.carregar_particao(particao, colunas=self.COLUNAS_PEDIDOS)
+            # A base recebe as mudanças de status do diário; os pedidos que só existem no diário voltam em seguida
+            base = self._diario_pedidos.aplicar(base, resumo_diario, incluir_novas=False)
+            for row in base.itertuples(index=False):
+                self._indexar_pedido(row, particao)
+                # Pedidos já montados acompanham o status gravado (pode ter mudado em outro terminal)
+                pedido = self._cache_pedidos.get(int(row.id))
+                if pedido is not None and pedido.status != row.status:
+                    pedido.status = row.status
+                    pedido.limpar_alteracoes()
+            for linha in resumo_diario[0].values():
+                if self._tabela_pedidos.particao_da_data(linha['data']) == particao:
+                    self._indexar_pedido(SimpleNamespace(**linha), particao)
+            self._indice_pedidos.marcar_particao(particao, versao)
+
+    def buscar_pedidos(self, cliente_id: int | None = None, status: str | None = None,
+                       inicio: datetime | None = None, fim: datetime | None = None,
+                       produto_id: int | None = None) -> list[int]:
+        """
+        Consulta o índice de pedidos, sem ler a tabela de pedidos inteira.
+        Apenas as partições relevantes e ainda não indexadas são lidas.
+
+        Args:
+            cliente_id: Se informado, apenas os pedidos desse cliente.
+            status: Se informado, apenas os pedidos com esse status.
+            inicio: Se informado, apenas os pedidos feitos a partir dessa data.
+            fim: Se informado, apenas os pedidos feitos antes dessa data.
+            produto_id: Se informado, apenas os pedidos que contêm esse produto.
+
+        Returns:
+            IDs dos pedidos encontrados, dos mais recentes para os mais antigos.
+        """
+        # Garante que os pedidos ainda não gravados e os de outros terminais estejam no índice
+        self._descarregar_diario()
+        with self._trava_pedidos:
+            self._sincronizar_diario()
+            resumo_diario = self._diario_pedidos.resumir()
+            self._garantir_indexado(self._particoes_relevantes(inicio, fim, status, resumo_diario), resumo_diario)
+            return self._indice_pedidos.consultar(cliente_id=None if cliente_id is None else int(cliente_id),
+                                                  status=status, inicio=inicio, fim=fim, produto_id=produto_id)
+
+    def pedido_por_id(self, pedido_id: int) -> Pedido | None:
+        """
+        Retorna o pedido com o ID informado, ou None se não existir. As partições
+        ainda não indexadas só são lidas se o pedido não estiver no índice.
+        """
+        self._descarregar_diario()
+        with self._trava_pedidos:
+            self._sincronizar_diario()
+            resumo_diario = self._diario_pedidos.resumir()
+            if pedido_id not in self._indice_pedidos:
+                self._garantir_indexado(self._particoes_relevantes(None, None, None, resumo_diario), resumo_diario)
+            pedidos = self.pedidos_por_ids([pedido_id], resumo_diario) if pedido_id in self._indice_pedidos else []
+            return pedidos[0] if pedidos else None
+
+    def pedidos_por_ids(self, ids: list[int], resumo_diario: tuple | None = None) -> list[Pedido]:
+        """
+        Retorna os pedidos com os IDs informados (na mesma ordem). Os que já foram
+        montados vêm do cache; os demais são lidos apenas das partições onde o
+        índice diz que estão.
+        """
+        with self._trava_pedidos:
+            encontrados = {pedido_id: self._cache_pedidos[pedido_id] for pedido_id in ids
+                           if pedido_id in self._cache_pedidos}
+            faltantes = [pedido_id for pedido_id in ids if pedido_id not in encontrados]
+            if faltantes:
+                for pedido in self._montar_pedidos(faltantes, resumo_diario):
+                    encontrados[pedido.id] = pedido
+
+            pedidos = [encontrados[pedido_id] for pedido_id in ids if pedido_id in encontrados]
+            for pedido in pedidos:
+                self._guardar_em_cache(pedido)
+            return pedidos
+
+    def _guardar_em_cache(self, pedido: Pedido):
+        """
+        Guarda o pedido no cache de pedidos montados, descartando os usados há mais tempo.
+        """
+        self._cache_pedidos[pedido.id] = pedido
+        self._cache_pedidos.move_to_end(pedido.id)
+        while len(self._cache_pedidos) > configuracao.LIMITE_CACHE_PEDIDOS:
+            self._cache_pedidos.popitem(last=False)
+
+    def _montar_pedidos(self, ids: list[int], resumo_diario: tuple | None = None) -> list[Pedido]:
+        """
+        Monta os pedidos com os IDs informados a partir das partições e do diário.
+        """
+        if resumo_diario is None:
+            resumo_diario = self._diario_pedidos.resumir()
+        novas = resumo_diario[0]
+
+        por_particao = {}
+        for pedido_id in ids:
+            if pedido_id not in novas:
+                por_particao.setdefault(self._indice_pedidos.particao_de(pedido_id), []).append(pedido_id)
+
+        linhas = {pedido_id: SimpleNamespace(**novas[pedido_id]) for pedido_id in ids if pedido_id in novas}
+        for particao, ids_particao in por_particao.items():
+            if particao is None:
+                continue
+            base = self._tabela_pedidos.carregar_particao(particao, colunas=self.COLUNAS_PEDIDOS,
+                                                          filtros=[('id', 'in', ids_particao)])
+            base = self._diario_pedidos.aplicar(base, resumo_diario, incluir_novas=False)
+            for row in base.itertuples(index=False):
+                linhas[int(row.id)] = row
+
+        return [self._criar_pedido(linhas[pedido_id]) for pedido_id in ids if pedido_id in linhas]
+
+    def carregar_pedidos(self, cliente_id: int | None = None, inicio: datetime | None = None,
+                         fim: datetime | None = None) -> list[Pedido]:
         """
         Carrega os pedidos do sistema a partir do banco de dados.
         Se um cliente_id for fornecido, carrega apenas os pedidos desse cliente.
+
+        Args:
+            cliente_id: Se informado, apenas os pedidos desse cliente.
+            inicio: Se informado, apenas os pedidos feitos a partir dessa data.
+            fim: Se informado, apenas os pedidos feitos antes dessa data.
+        """
+        return self.pedidos_por_ids(self.buscar_pedidos(cliente_id=cliente_id, inicio=inicio, fim=fim))
+
+    def iterar_pedidos(self, cliente_id: int | None = None, status: str | None = None,
+                       tamanho_pagina: int = 20, inicio: datetime | None = None,
+                       fim: datetime | None = None, produto_id: int | None = None):
         """
-        tabela_pedidos = BancoDeDados().carregar_tabela("pedidos")
+        Percorre os pedidos em páginas, dos mais recentes para os mais antigos.
+        Os pedidos são encontrados pelo índice, e cada página lê do banco apenas
+        as suas linhas. Os produtos de cada pedido só são montados quando acessados.
 
-        if tabela_pedidos.empty:
-            return []
+        Args:
+            cliente_id: Se informado, apenas os pedidos desse cliente.
+            status: Se informado, apenas os pedidos com esse status.
+            tamanho_pagina: Quantidade de pedidos por página.
+            inicio: Se informado, apenas os pedidos feitos a partir dessa data.
+            fim: Se informado, apenas os pedidos feitos antes dessa data.
+            produto_id: Se informado, apenas os pedidos que contêm esse produto.
 
-        if cliente_id is not None:
-            # Garante que a coluna 'cliente_id' e o valor são do mesmo tipo para comparação
-            tabela_pedidos = tabela_pedidos[tabela_pedidos['cliente_id'].astype(int) == cliente_id]
+        Yields:
+            Listas com até tamanho_pagina pedidos.
+        """
+        ids = self.buscar_pedidos(cliente_id, status, inicio, fim, produto_id)
+        resumo_diario = self._diario_pedidos.resumir()
+        for posicao in range(0, len(ids), tamanho_pagina):
+            yield self.pedidos_por_ids(ids[posicao:posicao + tamanho_pagina], resumo_diario)
 
-        lista_pedidos = []
+    def totais_pedidos(self, pedidos: list[Pedido]) -> list[float]:
+        """
+        Calcula o total de vários pedidos de uma vez, sem montar os produtos dos
+        pedidos ainda não hidratados
 
-        for row in tabela_pedidos.itertuples(index=False):
-            produtos_no_pedido = []
-            # Desserializa a string JSON de produtos
-            itens_serializados = json.loads(row.produtos)
-            
-            for item in itens_serializados:
-                produto_original = self._produtos.get(item['id'])
-                if produto_original:
-                    if isinstance(produto_original, ProdutoFisico):
-                        # Cria uma instância específica para o pedido com a quantidade comprada
-                        produto_para_pedido = produto_original.realizar_venda(item['quantidade'])
-                        produto_original.quantidade += item['quantidade'] # Devolve ao estoque para não duplicar a remoção
-                    else: # ProdutoDigital
-                        produto_para_pedido = produto_original.realizar_venda()
-                    produtos_no_pedido.append(produto_para_pedido)
-
-            pedido = Pedido(id=row.id, cliente_id=row.cliente_id, produtos=produtos_no_pedido,
-                            data=pd.to_datetime(row.data), status=row.status)
-            lista_pedidos.append(pedido)
-        return lista_pedidos
+        Returns:
+            Os totais, na ordem dos pedidos
+        """
+        return LinhasPedidos.de_pedidos(pedidos, self._produtos).totais().tolist()
+
+    def relatorio_vendas(self, inicio: date | None = None, fim: date | None = None,
+                         limite: int = 10) -> dict:
+        """
+        Relatório de vendas a partir dos agregados materializados, que incluem os
+        pedidos de todos os terminais. Na primeira chamada, os agregados são
+        montados a partir de todos os pedidos; depois, só são atualizados.
+
+        Args:
+            inicio: Primeiro dia do período (inclusive); sem limite se None
+            fim: Último dia do período (inclusive); sem limite se None
+            limite: Quantidade de produtos e de clientes nos rankings
+
+        Returns:
+            Dicionário com 'status' (pedidos por status), 'produtos' (unidades e receita
+            dos produtos que mais venderam no período), 'dias' (unidades e receita por
+            dia do período) e 'clientes' (pedidos e valor dos maiores clientes)
+        """
+        self._descarregar_diario()
+        with self._trava_pedidos:
+            self._sincronizar_diario()
+            if self._analise_vendas is None:
+                self._analise_vendas = self._montar_analise_vendas()
+            return {
+                'status': self._analise_vendas.por_status(),
+                'produtos': self._analise_vendas.por_produto(inicio, fim, limite),
+                'dias': self._analise_vendas.por_dia(inicio, fim),
+                'clientes': self._analise_vendas.por_cliente(limite),
+            }
+
+    def _montar_analise_vendas(self) -> AnaliseVendas:
+        """
+        Monta os agregados de vendas a partir de todas as partições de pedidos e do diário
+        """
+        pedidos = self._diario_pedidos.aplicar(self._tabela_pedidos.carregar(colunas=self.COLUNAS_PEDIDOS))
+        catalogo = pd.DataFrame({
+            'preco': [produto.preco for produto in self._produtos.values()],
+            'frete': [produto.calcular_frete() for produto in self._produtos.values()],
+        }, index=pd.Index(list(self._produtos), dtype='int64', name='id'))
+        analise = AnaliseVendas()
+        analise.reconstruir(pedidos, catalogo)
+        return analise
+
+    def _criar_pedido(self, row) -> Pedido:
+        """
+        Cria um Pedido a partir de uma linha da tabela, adiando a montagem dos produtos.
+        """
+        # Desserializa a string JSON de produtos
+        itens_serializados = json.loads(row.produtos)
+        return Pedido(id=int(row.id), cliente_id=int(row.cliente_id), data=self._converter_data(row.data),
+                      status=row.status, itens_serializados=itens_serializados,
+                      hidratar_itens=self._hidratar_itens)
+
+    def _hidratar_itens(self, itens_serializados: list[dict]) -> list[ItemPedido]:
+        """
+        Monta os itens de um pedido a partir dos itens gravados no banco. Cada item
+        referencia o produto do catálogo, sem copiá-lo, e mantém o tipo, o preço e o
+        frete da linha gravada; itens de produtos que saíram do catálogo são mantidos
+        com os dados gravados. O estoque não é conferido nem alterado.
+        """
+        return [ItemPedido.de_gravado(item, self._produtos.get(item['id'])) for item in itens_serializados]
     
     def carregar_produtos(self) -> dict[int, Produto]:
         """
         Carrega os produtos disponíveis no mercado a partir do banco de dados.
         Retorna um dicionário de produtos.
         """
-        tabela_produtos = BancoDeDados().carregar_tabela("produtos")
+        banco = BancoDeDados()
+        tabela_produtos = banco.carregar_tabela("produtos")
         dicionario_produtos = {}
 
         if tabela_produtos.empty:
             return dicionario_produtos
 
         for row in tabela_produtos.itertuples(index=False):
-            if row.tipo == 'digital':
-                produto = ProdutoDigital(id=row.id, nome=row.nome, preco=row.preco, link_download=row.link_download)
-            elif row.tipo == 'fisico':
-                produto = ProdutoFisico(id=row.id, nome=row.nome, preco=row.preco, quantidade=row.quantidade, altura=row.altura, largura=row.largura, profundidade=row.profundidade)
-            
-            dicionario_produtos[int(row.id)] = produto
+            produto = self._criar_produto(row)
+            if produto is not None:
+                dicionario_produtos[int(row.id)] = produto
 
         return dicionario_produtos
 
+    @staticmethod
+    def _criar_produto(row) -> Produto | None:
+        """
+        Cria o produto a partir de uma linha da tabela de produtos
+        """
+        if row.tipo == 'digital':
+            return ProdutoDigital(id=int(row.id), nome=row.nome, preco=row.preco, link_download=row.link_download)
+        if row.tipo == 'fisico':
+            return ProdutoFisico(id=int(row.id), nome=row.nome, preco=row.preco, quantidade=int(row.quantidade), altura=row.altura, largura=row.largura, profundidade=row.profundidade)
+        return None
+
+    def buscar_produto(self, produto_id: int) -> Produto | None:
+        """
+        Retorna o produto do catálogo com o ID informado, ou None se não existir
+        """
+        return self._produtos.get(produto_id)
+
+    def listar_produtos(self, tipo: str | None = None) -> list[Produto]:
+        """
+        Retorna os produtos do catálogo, opcionalmente só os de um tipo ('fisico' ou 'digital')
+        """
+        if tipo is None:
+            return list(self._produtos.values())
+        classe = ProdutoFisico if tipo == 'fisico' else ProdutoDigital
+        return [produto for produto in self._produtos.values() if isinstance(produto, classe)]
+
+    def buscar_produtos(self, texto: str, limite: int | None = None) -> list[Produto]:
+        """
+        Busca produtos por parte do nome ou pelo ID, dos mais relevantes para os menos relevantes
+
+        Args:
+            texto: Palavras (ou começos de palavras) do nome, sem diferenciar acentos, ou o ID
+            limite: Quantidade máxima de resultados (padrão: LIMITE_RESULTADOS_BUSCA)
+        """
+        if self._indice_produtos is None:
+            self._indice_produtos = IndiceProdutos.montar(
+                (produto.id, produto.nome) for produto in self._produtos.values())
+        ids = self._indice_produtos.buscar(texto, limite or self.LIMITE_RESULTADOS_BUSCA)
+        return [self._produtos[produto_id] for produto_id in ids if produto_id in self._produtos]
+
+    def _indexar_produto(self, produto: Produto):
+        """
+        Atualiza o produto no índice de busca, se o índice já foi montado
+        """
+        if self._indice_produtos is not None:
+            self._indice_produtos.adicionar(produto.id, produto.nome)
+
+    def _desindexar_produto(self, produto_id: int):
+        if self._indice_produtos is not None:
+            self._indice_produtos.remover(produto_id)
+
+    def produtos_estoque_baixo(self) -> list[ProdutoFisico]:
+        """
+        Retorna os produtos físicos com o estoque no limite de reposição ou abaixo dele,
+        do menor para o maior estoque, sem percorrer o catálogo
+        """
+        return [self._produtos[produto_id] for produto_id, _ in self._garantir_estoque_baixo().abaixo_do_limite()]
+
+    def menores_estoques(self, quantidade: int = 10) -> list[ProdutoFisico]:
+        """
+        Retorna os produtos físicos de menor estoque, em ordem crescente
+        """
+        return [self._produtos[produto_id] for produto_id, _ in self._garantir_estoque_baixo().menores(quantidade)]
+
+    def limite_estoque(self, produto_id: int) -> int:
+        """
+        Retorna o limite de reposição do produto (o próprio ou o padrão)
+        """
+        return self._garantir_estoque_baixo().limite(produto_id)
+
+    def definir_limite_estoque(self, produto_id: int, limite: int | None):
+        """
+        Define e grava o limite de reposição de um produto físico
+
+        Args:
+            produto_id: ID do produto
+            limite: Novo limite; None volta ao limite padrão (MERCADO_LIMITE_ESTOQUE_PADRAO)
+
+        Raises:
+            ValueError: Se o produto não é físico ou o limite é negativo
+        """
+        if not isinstance(self._produtos.get(produto_id), ProdutoFisico):
+            raise ValueError(f"Produto {produto_id} não é um produto físico do catálogo.")
+        self._garantir_estoque_baixo().definir_limite(produto_id, limite)
+        banco = BancoDeDados()
+        if limite is None:
+            banco.remover_linhas("limites_estoque", [produto_id])
+        else:
+            banco.upsert_linhas(pd.DataFrame([{'id': produto_id, 'limite': limite}]), "limites_estoque")
+
+    def _garantir_estoque_baixo(self) -> EstoqueBaixo:
+        """
+        Monta o acompanhamento do estoque com os limites de reposição gravados, se ainda não foi montado
+        """
+        if self._estoque_baixo is None:
+            banco = BancoDeDados()
+            limites = {}
+            if banco.existe_tabela("limites_estoque"):
+                tabela = banco.carregar_tabela("limites_estoque")
+                limites = dict(zip(tabela['id'].astype(int).tolist(), tabela['limite'].astype(int).tolist()))
+            estoque = EstoqueBaixo(configuracao.LIMITE_ESTOQUE_PADRAO, limites)
+            fisicos = [produto for produto in self._produtos.values() if isinstance(produto, ProdutoFisico)]
+            # Os produtos passam a avisar antes da carga, para nenhuma mudança feita durante ela se perder.
+            # Todos compartilham o mesmo método ligado, em vez de um objeto novo por produto.
+            observador = estoque.atualizar
+            for produto in fisicos:
+                produto.observar_quantidade(observador)
+            estoque.carregar((produto.id, produto.quantidade) for produto in fisicos)
+            self._estoque_baixo = estoque
+        return self._estoque_baixo
+
+    def _acompanhar_estoque(self, produto: Produto):
+        """
+        Passa a acompanhar o estoque de um produto que entrou no catálogo (se o acompanhamento já foi montado)
+        """
+        if self._estoque_baixo is not None and isinstance(produto, ProdutoFisico):
+            produto.observar_quantidade(self._estoque_baixo.atualizar)
+            self._estoque_baixo.atualizar(produto.id, produto.quantidade)
+
+    def _desacompanhar_estoque(self, produto_id: int):
+        """
+        Deixa de acompanhar o produto que vai sair do catálogo (removido ou substituído)
+        """
+        if self._estoque_baixo is not None:
+            produto = self._produtos.get(produto_id)
+            if isinstance(produto, ProdutoFisico):
+                produto.observar_quantidade(None)
+            self._estoque_baixo.remover(produto_id)
+
     def salvar_produtos(self):
         """
-        Converte a lista de produtos em um DataFrame e salva no banco de dados.
+        Persiste apenas os produtos alterados desde a última gravação, linha a linha.
+        Se nenhum produto foi alterado, o banco não é acessado.
         """
-        # Usa o método get_dic de cada produto para criar a lista de dicionários,
-        # aproveitando o polimorfismo.
-        lista_para_df = [produto.get_dic() for produto in self._produtos.values()]
-        df_produtos = pd.DataFrame(lista_para_df)
-        BancoDeDados().salvar_tabela(df_produtos, "produtos")
+        alterados = [produto for produto in self._produtos.values() if produto.esta_sujo]
+        if alterados:
+            self._gravar_produtos(alterados)
 
-    def salvar_pedidos(self):
+    def salvar_produto(self, produto: Produto):
+        """
+        Persiste imediatamente apenas a linha do produto informado, sem reescrever o catálogo inteiro.
+        """
+        self._gravar_produtos([produto])
+
+    def _gravar_produtos(self, produtos: list[Produto]):
+        """
+        Grava as linhas dos produtos. A quantidade em memória pode estar desatualizada
+        (outro terminal pode ter vendido depois da leitura), então, como em
+        _gravar_variacao_estoque, o estoque é relido do banco sob a trava e só a
+        variação ainda não gravada deste processo é somada a ele.
         """
-        Converte a lista de pedidos em um DataFrame e salva no banco de dados.
+        banco = BancoDeDados()
+        produto_ids = [produto.id for produto in produtos]
+        with self._travar_produtos(banco, produto_ids):
+            atuais = banco.selecionar_por_chave("produtos", produto_ids)
+            estoques = {} if atuais.empty else {
+                int(produto_id): int(quantidade)
+                for produto_id, quantidade in zip(atuais['id'], atuais['quantidade']) if pd.notna(quantidade)}
+            for produto in produtos:
+                variacao = self._variacoes_estoque.pop(produto.id, 0)
+                if isinstance(produto, ProdutoFisico) and produto.id in estoques:
+                    produto.quantidade = self._estoque_sem_falta(banco, produto, estoques[produto.id] + variacao)
+            banco.upsert_linhas(pd.DataFrame([produto.get_dic() for produto in produtos]), "produtos")
+        for produto in produtos:
+            produto.limpar_alteracoes()
+
+    def checkpoint(self):
+        """
+        Grava imediatamente todas as alterações que estão aguardando o escritor em segundo plano.
+        """
+        self._escritor.descarregar()
+
+    def _descarregar_diario(self):
         """
-        if not self._pedidos:
+        Anexa ao diário os registros de pedidos pendentes, sem esperar as demais
+        gravações (como as de estoque), que continuam sendo agrupadas pelo escritor.
+        """
+        self._gravar_registros_pedidos()
+
+    def encerrar(self):
+        """
+        Grava as alterações pendentes e encerra o escritor em segundo plano.
+        """
+        self._escritor.encerrar()
+
+    def _trava_estoque(self, produto_id: int) -> threading.Lock:
+        """
+        Retorna a trava (dentro do processo) da faixa do produto, que protege a
+        quantidade em memória e a variação ainda não gravada desse produto
+        """
+        return self._travas_estoque[faixa_da_chave(produto_id)]
+
+    def _travar_produtos(self, banco: BancoDeDados, produto_ids: list[int]) -> ExitStack:
+        """
+        Trava as linhas dos produtos entre processos e depois as faixas de estoque
+        em memória, em ordem: a mesma ordem de vender_produto, para não haver impasse
+        """
+        pilha = ExitStack()
+        try:
+            pilha.enter_context(banco.travar_linhas("produtos", produto_ids))
+            for faixa in sorted({faixa_da_chave(produto_id) for produto_id in produto_ids}):
+                pilha.enter_context(self._travas_estoque[faixa])
+        except BaseException:
+            pilha.close()
+            raise
+        return pilha
+
+    def _registrar_variacao_estoque(self, produto_id: int, variacao: int):
+        """
+        Acumula a variação de estoque e agenda sua gravação. Variações seguidas
+        do mesmo produto são somadas e gravadas de uma vez. Deve ser chamado com
+        a trava de estoque do produto, junto com a alteração da quantidade.
+        """
+        self._variacoes_estoque[produto_id] = self._variacoes_estoque.get(produto_id, 0) + variacao
+        self._escritor.agendar(("estoque", produto_id), lambda: self._gravar_variacao_estoque(produto_id))
+
+    def _gravar_variacao_estoque(self, produto_id: int):
+        """
+        Aplica a variação acumulada sobre o estoque atual do banco (que pode ter
+        sido alterado por outro terminal) e grava a linha do produto.
+        """
+        banco = BancoDeDados()
+        with banco.travar_linhas("produtos", [produto_id]):
+            with self._trava_estoque(produto_id):
+                variacao = self._variacoes_estoque.pop(produto_id, 0)
+            if variacao == 0:
+                return
+            produto = self._produtos[produto_id]
+
+            linha = banco.selecionar_por_chave("produtos", [produto_id])
+            if linha.empty or pd.isna(linha.iloc[0]['quantidade']):
+                atual = produto.quantidade - variacao
+            else:
+                atual = int(linha.iloc[0]['quantidade'])
+
+            nova_quantidade = self._estoque_sem_falta(banco, produto, atual + variacao)
+
+            dados = produto.get_dic()
+            dados['quantidade'] = nova_quantidade
+            banco.upsert_linhas(pd.DataFrame([dados]), "produtos")
+
+            # Atualiza a memória com o valor do banco, somando o que ainda não foi gravado
+            with self._trava_estoque(produto_id):
+                produto.quantidade = max(nova_quantidade + self._variacoes_estoque.get(produto_id, 0), 0)
+                if produto_id not in self._variacoes_estoque:
+                    # A linha gravada já tem todos os campos do produto
+                    produto.limpar_alteracoes()
+
+    def _estoque_sem_falta(self, banco: BancoDeDados, produto: ProdutoFisico, quantidade: int) -> int:
+        """
+        Retorna o estoque a gravar. Fora do modo sincrono, cada terminal confere as
+        vendas só contra o próprio estoque em memória, então vendas de terminais
+        diferentes podem passar do estoque do banco. O excedente fica registrado
+        em faltas_estoque, para o administrador resolver, e o estoque vai a zero.
+        Deve ser chamado com a linha do produto travada.
+        """
+        if quantidade >= 0:
+            return quantidade
+        with banco.travar_linhas("faltas_estoque", [produto.id]):
+            registrada = banco.selecionar_por_chave("faltas_estoque", [produto.id])
+            faltando = -quantidade + (int(registrada.iloc[0]['faltando']) if not registrada.empty else 0)
+            banco.upsert_linhas(pd.DataFrame([{'id': produto.id, 'faltando': faltando}]), "faltas_estoque")
+        Console().print(f"[bold red]Vendas em outro terminal passaram do estoque de '{produto.nome}' "
+                        f"em {-quantidade} unidade(s); veja as faltas em Verificar Estoque.[/]")
+        return 0
+
+    def faltas_estoque(self) -> dict[int, int]:
+        """
+        Retorna as unidades vendidas além do estoque por produto (ainda não resolvidas), de todos os terminais
+        """
+        banco = BancoDeDados()
+        if not banco.existe_tabela("faltas_estoque"):
+            return {}
+        tabela = banco.carregar_tabela("faltas_estoque")
+        return dict(zip(tabela['id'].astype(int).tolist(), tabela['faltando'].astype(int).tolist()))
+
+    def resolver_faltas_estoque(self, produto_ids: list[int]):
+        """
+        Remove o registro de faltas dos produtos (ex.: as vendas excedentes já foram tratadas)
+        """
+        BancoDeDados().remover_linhas("faltas_estoque", produto_ids)
+
+    def _sincronizar_estoque(self, produto: ProdutoFisico, banco: BancoDeDados):
+        """
+        Atualiza a quantidade do produto em memória com o valor atual do banco,
+        que pode ter sido alterado por outro terminal. Deve ser chamado com a linha travada.
+        """
+        linha = banco.selecionar_por_chave("produtos", [produto.id])
+        if not linha.empty and pd.notna(linha.iloc[0]['quantidade']):
+            produto.quantidade = int(linha.iloc[0]['quantidade'])
+
+    def disponivel(self, produto_id: int) -> int:
+        """
+        Retorna a quantidade do produto físico disponível para venda: o estoque
+        menos o que está reservado pelos carrinhos abertos. Custa O(1).
+        """
+        return self._produtos[produto_id].quantidade - self._reservas.reservado(produto_id)
+
+    def _conferir_disponivel(self, produto_id: int, quantidade: int):
+        """
+        Deve ser chamado com a trava de estoque do produto.
+
+        Raises:
+            EstoqueInsuficiente: Se a quantidade passa do disponível para venda
+        """
+        if quantidade > self.disponivel(produto_id):
+            raise EstoqueInsuficiente("Quantidade insuficiente em estoque")
+
+    def reservar_produto(self, produto_id: int, quantidade: int) -> tuple[int, ItemPedido]:
+        """
+        Reserva a quantidade de um produto físico para um carrinho, sem baixar o
+        estoque. A reserva vence sozinha após MERCADO_VALIDADE_RESERVA_MINUTOS.
+
+        Returns:
+            Tupla (ID da reserva, item do pedido)
+
+        Raises:
+            EstoqueInsuficiente: Se não houver quantidade disponível para venda
+        """
+        produto = self._produtos[produto_id]
+        with self._trava_estoque(produto_id):
+            self._conferir_disponivel(produto_id, quantidade)
+            reserva_id = self._reservas.reservar(produto_id, quantidade)
+        return reserva_id, produto.item_para_pedido(quantidade)
+
+    def liberar_reserva(self, reserva_id: int):
+        """
+        Devolve ao disponível a quantidade reservada (ex.: item removido do carrinho)
+        """
+        self._reservas.liberar(reserva_id)
+
+    def renovar_reservas(self, reserva_ids: list[int]):
+        """
+        Reinicia a validade das reservas de um carrinho em uso
+        """
+        self._reservas.renovar(reserva_ids)
+
+    def confirmar_reservas(self, reservas: list[tuple[int, int, int]]):
+        """
+        Transforma as reservas de um carrinho em baixas de estoque, na conclusão
+        do pedido. Reservas já vencidas são vendidas se ainda houver disponível.
+        Se algum item não puder ser vendido, as baixas já feitas são desfeitas.
+
+        Args:
+            reservas: Lista de (ID da reserva, produto_id, quantidade)
+
+        Raises:
+            EstoqueInsuficiente: Se não houver estoque para algum item cuja reserva venceu
+        """
+        vendidos = []
+        try:
+            for reserva_id, produto_id, quantidade in reservas:
+                self.vender_produto(produto_id, quantidade, reserva_id)
+                vendidos.append((produto_id, quantidade))
+        except ValueError:
+            for produto_id, quantidade in vendidos:
+                self.ajustar_estoque(produto_id, quantidade)
+            raise
+
+    def vender_produto(self, produto_id: int, quantidade: int, reserva_id: int | None = None) -> ItemPedido:
+        """
+        Realiza a venda de um produto físico de forma segura entre threads e entre
+        processos: a conferência e a baixa do estoque acontecem sob a trava da faixa
+        do produto, então vendas simultâneas do mesmo produto não perdem atualizações
+        e vendas de produtos de outras faixas não esperam umas pelas outras.
+
+        Args:
+            produto_id: ID do produto físico
+            quantidade: Quantidade vendida
+            reserva_id: Reserva do carrinho que passa a ser a venda, se houver
+
+        Returns:
+            O item do pedido, com a quantidade vendida
+
+        Raises:
+            EstoqueInsuficiente: Se não houver estoque suficiente
+        """
+        produto = self._produtos[produto_id]
+        if not self._escritor.sincrono:
+            # Baixa o estoque em memória e deixa a gravação para o escritor em segundo plano
+            with self._trava_estoque(produto_id):
+                if reserva_id is not None:
+                    self._reservas.liberar(reserva_id)
+                self._conferir_disponivel(produto_id, quantidade)
+                item_pedido = produto.realizar_venda(quantidade)
+                self._registrar_variacao_estoque(produto_id, -quantidade)
+            return item_pedido
+
+        banco = BancoDeDados()
+        # A trava entre processos vem sempre antes da trava em memória, para não haver deadlock
+        with banco.travar_linhas("produtos", [produto_id]), self._trava_estoque(produto_id):
+            if reserva_id is not None:
+                self._reservas.liberar(reserva_id)
+            self._sincronizar_estoque(produto, banco)
+            self._conferir_disponivel(produto_id, quantidade)
+            item_pedido = produto.realizar_venda(quantidade)
+            banco.upsert_linhas(pd.DataFrame([produto.get_dic()]), "produtos")
+            self._variacoes_estoque.pop(produto_id, None)
+        produto.limpar_alteracoes()
+        return item_pedido
+
+    def ajustar_estoque(self, produto_id: int, variacao: int):
+        """
+        Soma a variação ao estoque de um produto físico de forma segura entre threads
+        e entre processos (ex.: devolução de um item removido do carrinho).
+
+        Raises:
+            ValueError: Se o estoque resultante for negativo
+        """
+        produto = self._produtos[produto_id]
+        if not self._escritor.sincrono:
+            with self._trava_estoque(produto_id):
+                produto.quantidade += variacao
+                self._registrar_variacao_estoque(produto_id, variacao)
             return
-        lista_para_df = [pedido.get_dic() for pedido in self._pedidos]
-        df_pedidos = pd.DataFrame(lista_para_df)
-        BancoDeDados().salvar_tabela(df_pedidos, "pedidos")
+
+        banco = BancoDeDados()
+        with banco.travar_linhas("produtos", [produto_id]), self._trava_estoque(produto_id):
+            self._sincronizar_estoque(produto, banco)
+            produto.quantidade += variacao
+            banco.upsert_linhas(pd.DataFrame([produto.get_dic()]), "produtos")
+            self._variacoes_estoque.pop(produto_id, None)
+        produto.limpar_alteracoes()
+
+    def salvar_pedidos(self):
+        """
+        Compacta os pedidos: incorpora o diário às partições de pedidos que ele
+        alterou, reescrevendo apenas essas partições, e esvazia o diário.
+        """
+        self.checkpoint()
+        banco = BancoDeDados()
+        # Trava a tabela e o diário para que nenhum pedido anexado durante a compactação se perca
+        with banco.travar_tabela("pedidos"), self._diario_pedidos.trava():
+            if self._tabela_pedidos.incorporar_diario(self._diario_pedidos):
+                self._registros_aplicados = 0
+                self._geracao_diario = self._diario_pedidos.geracao
+
+    def salvar_pedido(self, pedido: Pedido):
+        """
+        Registra o pedido no diário de pedidos, sem reescrever a tabela.
+        Pedidos novos são anexados por completo; pedidos já existentes têm
+        apenas a mudança de status anexada, e só se foram alterados.
+        """
+        with self._trava_pedidos:
+            if pedido.id in self._indice_pedidos and not pedido.esta_sujo:
+                return
+
+            for i, existente in enumerate(self._pedidos):
+                if existente.id == pedido.id:
+                    self._pedidos[i] = pedido
+                    break
+            else:
+                if pedido.id not in self._indice_pedidos:
+                    self._pedidos.append(pedido)
+            self._guardar_em_cache(pedido)
+
+            if self._indice_pedidos.atualizar_status(pedido.id, pedido.status):
+                if self._analise_vendas is not None:
+                    self._analise_vendas.atualizar_status(pedido.id, pedido.status)
+                # A data acompanha a mudança de status para indicar a partição do pedido
+                registro = self._diario_pedidos.registro_atualizacao(
+                    pedido.id, {'status': pedido.status, 'data': pedido.data.isoformat()})
+            else:
+                registro = self._diario_pedidos.registro_insercao(pedido.get_dic())
+                self._indexar_pedido(SimpleNamespace(**registro['dados']))
+            pedido.limpar_alteracoes()
+
+            # Os registros acumulados são anexados ao diário de uma vez pelo escritor em segundo plano
+            with self._trava_pendentes:
+                self._registros_pedidos_pendentes.append(registro)
+            self._escritor.agendar("diario_pedidos", self._gravar_registros_pedidos)
+
+    def _gravar_registros_pedidos(self):
+        """
+        Anexa ao diário, em uma única escrita, todos os registros de pedidos pendentes.
+        Se a escrita falhar, os registros voltam para o início dos pendentes, para a
+        próxima gravação tentar de novo.
+        """
+        # Mantém a ordem dos registros no diário quando mais de uma thread grava ao mesmo tempo
+        with self._trava_gravacao_diario:
+            with self._trava_pendentes:
+                registros, self._registros_pedidos_pendentes = self._registros_pedidos_pendentes, []
+            try:
+                self._diario_pedidos.anexar(registros)
+            except BaseException:
+                with self._trava_pendentes:
+                    self._registros_pedidos_pendentes[:0] = registros
+                raise
+
+    def importar_pedidos(self, origem, relatorio_erros: str | None = None) -> tuple[list[int], pd.DataFrame]:
+        """
+        Importa um lote de pedidos (marketplace, telefone) sem passar pelo menu do carrinho.
+
+        Produtos, clientes, quantidades e estoque são validados de uma vez para o
+        lote inteiro; as baixas de estoque são somadas por produto e gravadas em
+        uma única escrita, e os pedidos aceitos são anexados ao diário também de
+        uma vez. Pedidos com algum item inválido são rejeitados inteiros.
+
+        Args:
+            origem: DataFrame ou caminho de um arquivo .csv ou .jsonl, com uma linha
+                    por item e as colunas cliente_id, produto_id e, opcionalmente,
+                    quantidade, data e referencia (que agrupa os itens de um pedido)
+            relatorio_erros: Se informado, arquivo .csv onde as linhas rejeitadas são gravadas
+
+        Returns:
+            Tupla (IDs dos pedidos criados, linhas rejeitadas com a coluna 'motivo')
+        """
+        lote = ler_lote(origem)
+        banco = BancoDeDados()
+        clientes = None
+        if banco.existe_tabela("usuarios"):
+            clientes = set(banco.carregar_tabela("usuarios", colunas=["id"])["id"].astype(int))
+        catalogo = pd.DataFrame({'id': list(self._produtos),
+                                 'tipo': ['fisico' if isinstance(produto, ProdutoFisico) else 'digital'
+                                          for produto in self._produtos.values()],
+                                 'preco': [produto.preco for produto in self._produtos.values()],
+                                 'frete': [produto.calcular_frete() for produto in self._produtos.values()]})
+        # Produtos físicos do lote: só as linhas deles são travadas e relidas
+        ids_lote = pd.to_numeric(lote['produto_id'], errors='coerce')
+        fisicos = sorted(catalogo.loc[(catalogo['tipo'] == 'fisico') & catalogo['id'].isin(ids_lote), 'id'].astype(int))
+
+        # Variações de estoque pendentes vão para o banco antes, para a leitura abaixo ser a atual
+        self.checkpoint()
+        with self._travar_produtos(banco, fisicos):
+            # Lote só com produtos digitais: não há estoque a reler
+            atuais = banco.selecionar_por_chave("produtos", fisicos).set_index('id') if fisicos else None
+            for produto_id in fisicos:
+                produto = self._produtos[produto_id]
+                if produto_id in atuais.index and pd.notna(atuais.at[produto_id, 'quantidade']):
+                    produto.quantidade = (int(atuais.at[produto_id, 'quantidade'])
+                                          + self._variacoes_estoque.get(produto_id, 0))
+            disponivel = pd.Series({produto_id: self._produtos[produto_id].quantidade
+                                    - self._reservas.reservado(produto_id) for produto_id in fisicos}, dtype='int64')
+
+            aceitos, rejeitados = validar_lote(lote, catalogo, disponivel, clientes)
+
+            baixas = aceitos[aceitos['fisico']].groupby('produto_id')['quantidade'].sum()
+            for produto_id, quantidade in baixas.items():
+                self._produtos[produto_id].quantidade -= int(quantidade)
+                self._variacoes_estoque.pop(produto_id, None)
+            banco.upsert_linhas(pd.DataFrame([self._produtos[produto_id].get_dic() for produto_id in baixas.index]),
+                                "produtos")
+            for produto_id in baixas.index:
+                self._produtos[produto_id].limpar_alteracoes()
+
+        pedidos = pd.DataFrame()
+        if not aceitos.empty:
+            primeiro_id = self._proximo_id_pedido(aceitos['pedido'].nunique())
+            pedidos = montar_pedidos(aceitos, primeiro_id)
+            self._diario_pedidos.registrar_insercao(pedidos.to_dict('records'))
+            self._sincronizar_diario()
+            if len(self._diario_pedidos) > configuracao.LIMITE_DIARIO_PEDIDOS:
+                self.salvar_pedidos()
+
+        if relatorio_erros and not rejeitados.empty:
+            rejeitados.to_csv(relatorio_erros, index=False)
+        return pedidos['id'].astype(int).tolist() if not pedidos.empty else [], rejeitados
+
+    def sincronizar_catalogo(self, origem, remover_ausentes: bool = False,
+                             relatorio_erros: str | None = None) -> tuple[dict[str, int], pd.DataFrame]:
+        """
+        Sincroniza a tabela de produtos com o catálogo completo do fornecedor.
+
+        Cada linha do catálogo e da tabela é resumida em um hash do conteúdo, e só
+        as diferenças são aplicadas: produtos novos, produtos com algum campo
+        alterado e, se pedido, produtos que saíram do catálogo, todos em uma
+        única escrita. Os pedidos que venderam um produto removido mantêm os
+        itens gravados.
+
+        Linhas inválidas para ProdutoFisico ou ProdutoDigital são rejeitadas e o
+        produto correspondente fica como está. Se o catálogo não traz a
+        quantidade de um produto físico, o estoque atual é mantido.
+
+        Args:
+            origem: DataFrame ou caminho de um arquivo .csv, .jsonl ou .xlsx com as
+                    colunas da tabela de produtos (id, nome, preco, tipo, quantidade,
+                    altura, largura, profundidade, link_download)
+            remover_ausentes: Se True, remove os produtos que não estão no catálogo;
+                              por padrão, um catálogo parcial só insere e atualiza
+            relatorio_erros: Se informado, arquivo .csv onde as linhas rejeitadas são gravadas
+
+        Returns:
+            Tupla (quantidade de produtos inseridos, atualizados, removidos e
+            inalterados, linhas rejeitadas com a coluna 'motivo')
+        """
+        bruto = ler_catalogo(origem)
+        validas, rejeitadas = validar_catalogo(normalizar_catalogo(bruto))
+        rejeitadas = bruto.loc[rejeitadas.index].assign(motivo=rejeitadas['motivo'])
+
+        banco = BancoDeDados()
+        # Variações de estoque pendentes vão para o banco antes, para a comparação ser com o estado atual
+        self.checkpoint()
+        tabela = banco.carregar_tabela("produtos") if banco.existe_tabela("produtos") else pd.DataFrame()
+        atual = normalizar_catalogo(tabela.reindex(columns=COLUNAS_PRODUTOS))
+        atual = atual[atual['id'].notna()]
+
+        # Produtos físicos sem quantidade no catálogo mantêm o estoque atual (novos começam zerados)
+        manter_estoque = validas['tipo'].eq('fisico') & validas['quantidade'].isna()
+        estoque_atual = atual.set_index('id')['quantidade']
+        validas.loc[manter_estoque, 'quantidade'] = validas.loc[manter_estoque, 'id'].map(estoque_atual).fillna(0)
+
+        inserir, atualizar, remover = comparar_catalogos(atual, validas, remover_ausentes)
+        # Um produto com linha rejeitada não é removido
+        protegidos = set(pd.to_numeric(bruto.loc[rejeitadas.index, 'id'], errors='coerce').dropna())
+        remover = [produto_id for produto_id in remover if produto_id not in protegidos]
+        alteradas = pd.concat([inserir, atualizar])
+        ids_mantidos = set(validas.loc[manter_estoque, 'id']) & set(atualizar['id'])
+
+        with self._travar_produtos(banco, sorted(alteradas['id'].tolist() + remover)):
+            # O estoque mantido é relido com as linhas travadas, pois outro terminal pode ter vendido
+            if ids_mantidos:
+                relidos = banco.selecionar_por_chave("produtos", sorted(ids_mantidos)).set_index('id')['quantidade']
+                mantidos = alteradas['id'].isin(relidos.index)
+                alteradas.loc[mantidos, 'quantidade'] = alteradas.loc[mantidos, 'id'].map(relidos)
+
+            produtos = [self._criar_produto(row) for row in alteradas.itertuples(index=False)]
+            gravar = pd.DataFrame([produto.get_dic() for produto in produtos])
+            banco.aplicar_alteracoes("produtos", gravar, remover)
+
+            for produto in produtos:
+                if produto.id in ids_mantidos:
+                    # A variação ainda não gravada continua pendente e será aplicada sobre o banco
+                    produto.quantidade = max(produto.quantidade + self._variacoes_estoque.get(produto.id, 0), 0)
+                    produto.limpar_alteracoes()
+                else:
+                    self._variacoes_estoque.pop(produto.id, None)
+                self._desacompanhar_estoque(produto.id)
+                self._produtos[produto.id] = produto
+                self._indexar_produto(produto)
+                self._acompanhar_estoque(produto)
+            for produto_id in remover:
+                self._desacompanhar_estoque(produto_id)
+                self._produtos.pop(produto_id, None)
+                self._variacoes_estoque.pop(produto_id, None)
+                self._desindexar_produto(produto_id)
+
+        if relatorio_erros and not rejeitadas.empty:
+            rejeitadas.to_csv(relatorio_erros, index=False)
+        resumo = {
+            'inseridos': len(inserir),
+            'atualizados': len(atualizar),
+            'removidos': len(remover),
+            'inalterados': len(validas) - len(inserir) - len(atualizar),
+        }
+        return resumo, rejeitadas.reset_index(drop=True)
+
+    def _proximo_id_pedido(self, quantidade: int = 1) -> int:
+        """
+        Reserva IDs para novos pedidos em uma sequência compartilhada, para não repetir entre terminais
+
+        Returns:
+            O primeiro dos IDs reservados
+        """
+        with self._trava_pedidos:
+            maior_id = max(self._tabela_pedidos.chave_maxima(), max(self._indice_pedidos.ids(), default=0))
+        return BancoDeDados().proximo_id("pedidos", minimo=maior_id, quantidade=quantidade)
+
+    def criar_pedido(self, cliente_id: int, itens: list[tuple[int, int]]) -> Pedido:
+        """
+        Cria e registra um pedido sem passar pelo menu do carrinho (ex.: pelo modo serviço).
+        O estoque dos itens físicos é baixado na hora; se algum item não tiver
+        estoque, as baixas já feitas são desfeitas e nenhum pedido é criado.
+
+        Args:
+            cliente_id: ID do cliente
+            itens: Lista de (produto_id, quantidade); a quantidade é ignorada para produtos digitais
+
+        Returns:
+            O pedido criado, com status 'aguardando entrega'
+
+        Raises:
+            EstoqueInsuficiente: Se não há estoque suficiente de algum item
+            ValueError: Se o pedido está vazio, um produto não existe ou uma quantidade é inválida
+        """
+        if not itens:
+            raise ValueError("O pedido não tem itens.")
+        for produto_id, quantidade in itens:
+            produto = self._produtos.get(produto_id)
+            if produto is None:
+                raise ValueError(f"Produto {produto_id} não encontrado.")
+            if isinstance(produto, ProdutoFisico) and (not isinstance(quantidade, int) or quantidade <= 0):
+                raise ValueError(f"Quantidade inválida para o produto {produto_id}.")
+
+        self.confirmar_reservas([(None, produto_id, quantidade) for produto_id, quantidade in itens
+                                 if isinstance(self._produtos[produto_id], ProdutoFisico)])
+        itens_pedido = [self._produtos[produto_id].item_para_pedido(quantidade) for produto_id, quantidade in itens]
+        pedido = Pedido(id=self._proximo_id_pedido(), cliente_id=cliente_id, produtos=itens_pedido,
+                        status='aguardando entrega')
+        self.salvar_pedido(pedido)
+        return pedido
 
     def cadastrar_produto(self):
         """
@@ -110,7 +1200,7 @@ class Mercado(ExibirProdutos):
         nome = Prompt.ask("Nome do produto")
         preco = FloatPrompt.ask("Preço (R$)", default=0.0)
 
-        novo_id = max(self._produtos.keys()) + 1 if self._produtos else 1
+        novo_id = BancoDeDados().proximo_id("produtos", minimo=max(self._produtos.keys(), default=0))
 
         if tipo_produto == 'fisico':
             quantidade = IntPrompt.ask("Quantidade em estoque", default=100)
@@ -123,7 +1213,9 @@ class Mercado(ExibirProdutos):
             novo_produto = ProdutoDigital(id=novo_id, nome=nome, preco=preco, link_download=link_download)
 
         self._produtos[novo_id] = novo_produto
-        self.salvar_produtos()
+        self._indexar_produto(novo_produto)
+        self._acompanhar_estoque(novo_produto)
+        self.salvar_produto(novo_produto)
         console.print(f"\n[bold green]Produto '{nome}' cadastrado com sucesso com o ID {novo_id}![/]")
 
     def editar_produto(self):
@@ -139,11 +1231,23 @@ class Mercado(ExibirProdutos):
             return
 
         produto = self._produtos.get(id_produto)
-        
+        quantidade_anterior = produto.quantidade if isinstance(produto, ProdutoFisico) else None
+
         # Polimorfismo: Chama o método de edição específico da classe do produto
         produto.exibir_menu_edicao()
 
-        self.salvar_produtos()
+        if quantidade_anterior is not None and produto.quantidade != quantidade_anterior:
+            # O estoque editado vira uma variação sobre o do banco, para não desfazer vendas de outros terminais
+            with self._trava_estoque(produto.id):
+                self._variacoes_estoque[produto.id] = (self._variacoes_estoque.get(produto.id, 0)
+                                                       + produto.quantidade - quantidade_anterior)
+
+        if not produto.esta_sujo:
+            console.print(f"\n[yellow]Nenhuma alteração em '{produto.nome}'.[/yellow]")
+            return
+        if 'nome' in produto.campos_alterados:
+            self._indexar_produto(produto)
+        self.salvar_produto(produto)
         console.print(f"\n[bold green]Produto '{produto.nome}' (ID: {produto.id}) salvo com sucesso![/]")
 
     def fazer_novo_pedido(self, cliente_id: int):
@@ -155,11 +1259,27 @@ class Mercado(ExibirProdutos):
         """
         console = Console()
         
-        novo_id_pedido = len(self._pedidos) + 1
-        novo_pedido = Pedido(id=novo_id_pedido, cliente_id=cliente_id)
-        
+        # O ID só é reservado na conclusão, para carrinhos abandonados não consumirem a sequência
+        novo_pedido = Pedido(id=None, cliente_id=cliente_id)
+
+        # Reserva de cada item do carrinho, na mesma ordem dos produtos do pedido (None para digitais)
+        reservas = []
+        try:
+            self._atender_carrinho(console, novo_pedido, reservas)
+        finally:
+            # Carrinho abandonado ou interrompido: o estoque reservado volta a ficar disponível
+            for reserva in reservas:
+                if reserva is not None:
+                    self.liberar_reserva(reserva[0])
+
+    def _atender_carrinho(self, console: Console, novo_pedido: Pedido, reservas: list):
+        """
+        Menu do carrinho de fazer_novo_pedido. Os itens físicos seguram o estoque por
+        reservas, que só viram baixas de estoque quando o pedido é concluído.
+        """
         while True:
-            console.print(f"\n[bold]Pedido nº {novo_pedido.id}[/] | [cyan]{len(novo_pedido.produtos)} itens[/] | [bold green]Total: R$ {novo_pedido.calcular_total():.2f}[/]")
+            self.renovar_reservas([reserva[0] for reserva in reservas if reserva is not None])
+            console.print(f"\n[bold]Novo pedido[/] | [cyan]{len(novo_pedido.produtos)} itens[/] | [bold green]Total: R$ {novo_pedido.calcular_total():.2f}[/]")
             
             # O método exibir_produtos é herdado por Pedido e mostrará os itens do pedido
             novo_pedido.exibir_produtos()
@@ -181,26 +1301,34 @@ class Mercado(ExibirProdutos):
 
                 produto_no_mercado = self._produtos.get(id_produto_mercado)
 
-                # 2. Define a quantidade e realiza a venda
-                produto_para_pedido = None
+                # 2. Define a quantidade e reserva o estoque
+                item_pedido = None
+                reserva = None
                 if isinstance(produto_no_mercado, ProdutoFisico):
                     while True:
+                        disponivel = self.disponivel(produto_no_mercado.id)
                         quantidade_desejada = IntPrompt.ask(
-                            f"Digite a quantidade para '{produto_no_mercado.nome}' (Estoque: {produto_no_mercado.quantidade})",
+                            f"Digite a quantidade para '{produto_no_mercado.nome}' (Disponível: {disponivel})",
                             default=1
                         )
-                        if 0 < quantidade_desejada <= produto_no_mercado.quantidade:
-                            # Cria uma nova instância para o pedido e atualiza o estoque do mercado
-                            produto_para_pedido = produto_no_mercado.realizar_venda(quantidade_desejada)
-                            self.salvar_produtos()  # Salva o estoque atualizado
+                        if 0 < quantidade_desejada <= disponivel:
+                            # Cria o item do pedido e reserva a quantidade no estoque
+                            try:
+                                reserva_id, item_pedido = self.reservar_produto(produto_no_mercado.id, quantidade_desejada)
+                            except ValueError:
+                                # Outro carrinho reservou ou comprou desde a exibição
+                                console.print(f"[bold red]Estoque insuficiente. Disponível agora: {self.disponivel(produto_no_mercado.id)}.[/]")
+                                continue
+                            reserva = (reserva_id, produto_no_mercado.id, quantidade_desejada)
                             break
                         else:
-                            console.print(f"[bold red]Quantidade inválida. Insira um valor entre 1 e {produto_no_mercado.quantidade}.[/]")
+                            console.print(f"[bold red]Quantidade inválida. Insira um valor entre 1 e {disponivel}.[/]")
                 elif isinstance(produto_no_mercado, ProdutoDigital):
-                    produto_para_pedido = produto_no_mercado.realizar_venda()
+                    item_pedido = produto_no_mercado.realizar_venda()
 
-                # 3. Adiciona a nova instância do produto ao pedido
-                novo_pedido.adicionar_produto(produto_para_pedido)
+                # 3. Adiciona o item ao pedido
+                novo_pedido.adicionar_produto(item_pedido)
+                reservas.append(reserva)
             elif escolha == "2":
                 if not novo_pedido.produtos:
                     console.print("\n[yellow]O carrinho está vazio. Não há itens para remover.[/yellow]")
@@ -210,11 +1338,11 @@ class Mercado(ExibirProdutos):
                 
                 # Cria um menu de remoção com os itens do pedido
                 opcoes_remocao = {}
-                for i, produto_no_pedido in enumerate(novo_pedido.produtos):
-                    if isinstance(produto_no_pedido, ProdutoFisico):
-                        label = f"{produto_no_pedido.nome} (Quantidade: {produto_no_pedido.quantidade})"
+                for i, item_no_pedido in enumerate(novo_pedido.produtos):
+                    if item_no_pedido.fisico:
+                        label = f"{item_no_pedido.nome} (Quantidade: {item_no_pedido.quantidade})"
                     else:
-                        label = f"{produto_no_pedido.nome} (Digital)"
+                        label = f"{item_no_pedido.nome} (Digital)"
                     
                     opcoes_remocao[str(i + 1)] = i # Armazena o índice
                     console.print(f"  [cyan]{i + 1}.[/] {label}")
@@ -231,11 +1359,10 @@ class Mercado(ExibirProdutos):
                 indice_para_remover = int(escolha_remocao) - 1
                 item_removido = novo_pedido.remover_produto_por_indice(indice_para_remover)
 
-                # Devolve a quantidade ao estoque se for um produto físico
-                if isinstance(item_removido, ProdutoFisico):
-                    produto_original_no_mercado = self._produtos.get(item_removido.id)
-                    produto_original_no_mercado.quantidade += item_removido.quantidade
-                    self.salvar_produtos()
+                # Libera a reserva se for um produto físico
+                reserva = reservas.pop(indice_para_remover)
+                if reserva is not None:
+                    self.liberar_reserva(reserva[0])
                 
                 console.print(f"\n[green]Item '{item_removido.nome}' removido do pedido com sucesso![/]")
             elif escolha == "3":
@@ -243,28 +1370,70 @@ class Mercado(ExibirProdutos):
                     console.print("\n[bold yellow]Pedido cancelado pois o carrinho está vazio.[/]")
                     break
 
+                # Só agora as reservas viram baixas de estoque
+                try:
+                    self.confirmar_reservas([reserva for reserva in reservas if reserva is not None])
+                except ValueError:
+                    console.print("\n[bold red]A reserva de um item venceu e o estoque não é mais suficiente. "
+                                  "Revise o carrinho.[/]")
+                    reservas[:] = [self._refazer_reserva(reserva) for reserva in reservas]
+                    continue
+                reservas.clear()
+
+                novo_pedido.definir_id(self._proximo_id_pedido())
                 novo_pedido.status = 'aguardando entrega'
-                self._pedidos.append(novo_pedido)
-                self.salvar_pedidos()
+                self.salvar_pedido(novo_pedido)
                 
                 console.print(f"\n[bold green]Pedido nº {novo_pedido.id} concluído com sucesso![/]")
                 console.print(f"Status atual: [cyan]{novo_pedido.status}[/]")
                 break
 
+    def _refazer_reserva(self, reserva: tuple | None) -> tuple | None:
+        """
+        Reserva de novo um item do carrinho (após uma conclusão que falhou)
+        """
+        if reserva is None:
+            return None
+        _, produto_id, quantidade = reserva
+        self.liberar_reserva(reserva[0])
+        try:
+            reserva_id, _ = self.reservar_produto(produto_id, quantidade)
+        except ValueError:
+            return reserva  # Sem estoque: a próxima conclusão tenta vender de novo
+        return (reserva_id, produto_id, quantidade)
+
     def selecionar_produto(self) -> int | None:
         """
-        Exibe os produtos disponíveis, pede para o usuário selecionar um
-        e retorna o ID do produto selecionado.
+        Pede uma busca (parte do nome ou ID), exibe os produtos encontrados
+        e retorna o ID do produto selecionado. Só os resultados da busca são
+        exibidos, e não o catálogo inteiro.
 
         Returns:
-            O ID do produto selecionado ou None se não houver produtos.
+            O ID do produto selecionado ou None se não houver produtos ou o usuário cancelar.
         """
-        self.exibir_produtos()
+        console = Console()
         if not self._produtos:
-            # A mensagem de "nenhum produto" já é exibida por exibir_produtos()
+            console.print("[yellow]Nenhum produto adicionado.[/yellow]")
             return None
 
-        ids_validos = [str(id) for id in self._produtos.keys()]
-        id_selecionado_str = Prompt.ask("\n[bold]Digite o ID do produto desejado[/]", choices=ids_validos)
+        while True:
+            busca = Prompt.ask("\n[bold]Buscar produto[/] (parte do nome ou ID; Enter para cancelar)",
+                               default="", show_default=False).strip()
+            if not busca:
+                return None
+
+            encontrados = self.buscar_produtos(busca)
+            if not encontrados:
+                console.print(f"[yellow]Nenhum produto encontrado para '{busca}'.[/yellow]")
+                continue
+            self.exibir_produtos(encontrados, titulo=f"Resultados para '{busca}'")
 
-        return int(id_selecionado_str)
\ No newline at end of file
+            padrao = str(encontrados[0].id) if len(encontrados) == 1 else ""
+            while True:
+                id_selecionado_str = Prompt.ask("[bold]Digite o ID do produto desejado[/] (Enter para nova busca)",
+                                                default=padrao, show_default=bool(padrao)).strip()
+                if not id_selecionado_str:
+                    break
+                if id_selecionado_str.isdigit() and int(id_selecionado_str) in self._produtos:
+                    return int(id_selecionado_str)
+                console.print("[bold red]ID inválido.[/bold red]")
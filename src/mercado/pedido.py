@@ -1,39 +1,80 @@
 from datetime import datetime
 import json
-from typing import List, Union
+import sys
+from typing import Callable, List
 from rich.console import Console
 
-from produto.produto import Produto
+from ferramentas.alteracoes import SEM_ALTERACOES, RastreiaAlteracoes
+from produto.item_pedido import ItemPedido
 from produto.produto_digital import ProdutoDigital
-from produto.produto_fisico import ProdutoFisico
 from mercado.exibir_produtos import ExibirProdutos
 
-class Pedido(ExibirProdutos):
+class Pedido(RastreiaAlteracoes, ExibirProdutos):
     """
     Representa um pedido feito por um cliente no mercado.
     """
 
-    def __init__(self, id: int, cliente_id: int, produtos: List[Union[ProdutoDigital, ProdutoFisico]] = None,
-                 data: datetime = None, status: str = 'pendente'):
+    __slots__ = ('_id', '_cliente_id', '_data', '_status', '_campos_alterados',
+                 '_itens_serializados', '_hidratar_itens')
+
+    def __init__(self, id: int | None, cliente_id: int, produtos: List[ItemPedido] = None,
+                 data: datetime = None, status: str = 'pendente', itens_serializados: List[dict] = None,
+                 hidratar_itens: Callable[[List[dict]], list] = None):
         """
         Inicializa um pedido.
 
         Args:
-            id: O identificador único do pedido.
+            id: O identificador único do pedido (None no carrinho, até a conclusão).
             cliente_id: O ID do cliente que fez o pedido.
-            produtos: Lista de produtos no pedido. Defaults to None.
+            produtos: Itens do pedido (ItemPedido). Defaults to None.
             data: A data em que o pedido foi feito. Defaults to datetime.now().
             status: O status atual do pedido. Defaults to 'pendente'.
+            itens_serializados: Itens do pedido como gravados no banco. Se informados
+                (com hidratar_itens), os produtos só são montados no primeiro acesso.
+            hidratar_itens: Função que transforma os itens serializados em ItemPedido.
         """
         self._id = id
         self._cliente_id = cliente_id
         self._data = data if data is not None else datetime.now()
-        self._status = status
+        # Os poucos status possíveis são internados: os pedidos compartilham as mesmas strings
+        self._status = sys.intern(status)
+        self._campos_alterados = SEM_ALTERACOES
         super().__init__(produtos if produtos is not None else [])
 
+        # Itens ainda não hidratados (None quando a lista de produtos já está montada)
+        self._itens_serializados = itens_serializados if hidratar_itens is not None else None
+        self._hidratar_itens = hidratar_itens
+
+    def _garantir_hidratado(self):
+        """
+        Monta a lista de produtos a partir dos itens serializados, se ainda não foi montada.
+        """
+        if self._itens_serializados is not None:
+            self._produtos = self._hidratar_itens(self._itens_serializados)
+            self._itens_serializados = None
+            self._hidratar_itens = None
+
+    def itens_nao_hidratados(self) -> List[dict] | None:
+        """
+        Retorna os itens como gravados no banco, se os produtos ainda não foram montados (senão, None)
+        """
+        return self._itens_serializados
+
+    def definir_hidratacao(self, hidratar_itens: Callable[[List[dict]], list]):
+        """
+        Define a função que monta os produtos, caso o pedido ainda não tenha sido hidratado.
+        """
+        if self._itens_serializados is not None:
+            self._hidratar_itens = hidratar_itens
+
+    def __getstate__(self):
+        # A função de hidratação pertence ao mercado, que não é serializado junto com o pedido
+        estado, slots = super().__getstate__()
+        return estado, {**slots, '_hidratar_itens': None}
+
     # Getters
     @property
-    def id(self) -> int:
+    def id(self) -> int | None:
         return self._id
 
     @property
@@ -49,7 +90,8 @@ class Pedido(ExibirProdutos):
         return self._status
 
     @property
-    def produtos(self) -> List[Union[ProdutoDigital, ProdutoFisico]]:
+    def produtos(self) -> List[ItemPedido]:
+        self._garantir_hidratado()
         # Retorna uma cópia para proteger a lista interna de modificações externas diretas
         return self._produtos[:]
 
@@ -59,19 +101,31 @@ class Pedido(ExibirProdutos):
         status_validos = ['pendente', 'aguardando entrega', 'entregue']
         if novo_status.lower() not in status_validos:
             raise ValueError(f"Status inválido. Use um dos seguintes: {', '.join(status_validos)}")
-        self._status = novo_status.lower()
+        self._marcar_alterado("status", self._status, novo_status.lower())
+        self._status = sys.intern(novo_status.lower())
+
+    def definir_id(self, id: int):
+        """
+        Atribui o ID a um pedido criado sem ele (carrinho), na conclusão: assim
+        carrinhos abandonados não consomem IDs da sequência.
+
+        Raises:
+            ValueError: Se o pedido já tem ID
+        """
+        if self._id is not None:
+            raise ValueError(f"O pedido já tem o ID {self._id}.")
+        self._id = id
 
     def get_dic(self):
         """
         Retorna os dados do pedido como um dicionário para serialização.
         A lista de produtos é convertida para uma string JSON.
         """
-        produtos_serializados = []
-        for produto in self.produtos:
-            item = {'id': produto.id}
-            if isinstance(produto, ProdutoFisico):
-                item['quantidade'] = produto.quantidade
-            produtos_serializados.append(item)
+        if self._itens_serializados is not None:
+            # Ainda não hidratado: os itens já estão no formato de gravação
+            produtos_serializados = self._itens_serializados
+        else:
+            produtos_serializados = [item.get_dic() for item in self._produtos]
 
         return {
             'id': self.id,
@@ -81,19 +135,21 @@ class Pedido(ExibirProdutos):
             'produtos': json.dumps(produtos_serializados)
         }
 
-    def adicionar_produto(self, produto: Union[ProdutoDigital, ProdutoFisico]):
+    def adicionar_produto(self, item: ItemPedido):
         """
-        Adiciona um produto à lista de produtos do pedido.
+        Adiciona um item à lista de produtos do pedido.
 
         Args:
-            produto (Union[ProdutoDigital, ProdutoFisico]): O produto a ser adicionado.
+            item (ItemPedido): O item a ser adicionado (ex.: o retornado por realizar_venda).
         """
-        if not isinstance(produto, Produto):
-            raise TypeError("O item adicionado deve ser uma instância de ProdutoDigital ou ProdutoFisico.")
-        self._produtos.append(produto)
-        Console().print(f"Produto '{produto.nome}' adicionado ao pedido.")
-
-    def remover_produto_por_indice(self, indice: int) -> Union[ProdutoDigital, ProdutoFisico]:
+        if not isinstance(item, ItemPedido):
+            raise TypeError("O item adicionado deve ser uma instância de ItemPedido.")
+        self._garantir_hidratado()
+        self._produtos.append(item)
+        self._campos_alterados |= {"produtos"}
+        Console().print(f"Produto '{item.nome}' adicionado ao pedido.")
+
+    def remover_produto_por_indice(self, indice: int) -> ItemPedido:
         """
         Remove um produto da lista do pedido pelo seu índice.
 
@@ -101,46 +157,59 @@ class Pedido(ExibirProdutos):
             indice (int): O índice do produto a ser removido.
 
         Returns:
-            O produto que foi removido.
+            O item que foi removido.
         """
+        self._garantir_hidratado()
         if not 0 <= indice < len(self._produtos):
             raise IndexError("Índice de remoção fora do intervalo.")
+        self._campos_alterados |= {"produtos"}
         return self._produtos.pop(indice)
 
     def calcular_total(self) -> float:
         """
-        Calcula o valor total do pedido somando o preço de todos os produtos.
+        Calcula o valor total do pedido somando o preço de todos os itens.
+        Itens físicos contam o preço da venda vezes a quantidade mais o frete; digitais, o preço.
+        Para vários pedidos de uma vez, use LinhasPedidos (Mercado.totais_pedidos).
 
         Returns:
             float: O valor total do pedido.
         """
         total = 0.0
-        for produto in self.produtos:
-            if isinstance(produto, ProdutoFisico):
-                # Para produtos físicos, o preço é multiplicado pela quantidade no pedido + frete
-                total += ( produto.preco * produto.quantidade ) + produto.calcular_frete()
-            else:
-                # Para produtos digitais, o preço é fixo
-                total += produto.preco
+        for item in self.produtos:
+            # Itens digitais contam uma unidade e não têm frete
+            total += item.preco * item.unidades + item.calcular_frete()
         return total
 
+    def exibir_produtos(self):
+        """
+        Exibe os produtos do pedido, hidratando-os antes se necessário.
+        """
+        self._garantir_hidratado()
+        super().exibir_produtos()
+
+    def registrar_entrega(self):
+        """
+        Marca o pedido como entregue, sem exibir nada (ex.: pelo modo serviço).
+        """
+        self.status = 'entregue'
+
     def processar_entrega(self):
         """
-        Processa a entrega dos produtos do pedido.
+        Processa a entrega dos produtos do pedido, exibindo o andamento no terminal.
         Para produtos digitais, gera o link de download.
         Para produtos físicos, simula o envio.
         """
         console = Console()
         console.print(f"\n[bold blue]Processando entrega do Pedido #{self.id}...[/]")
 
-        for produto in self.produtos:
-            if isinstance(produto, ProdutoDigital):
-                link = produto.link_download
-                console.print(f"  - [green]Enviando link para '{produto.nome}':[/] {link}")
-            elif isinstance(produto, ProdutoFisico):
-                console.print(f"  - [green]Preparando envio de {produto.quantidade}x '{produto.nome}'...[/]")
+        for item in self.produtos:
+            if isinstance(item.produto, ProdutoDigital):
+                link = item.produto.link_download
+                console.print(f"  - [green]Enviando link para '{item.nome}':[/] {link}")
+            elif item.fisico:
+                console.print(f"  - [green]Preparando envio de {item.quantidade}x '{item.nome}'...[/]")
 
-        self.status = 'entregue'
+        self.registrar_entrega()
         console.print(f"\n[bold green]Entrega processada com sucesso! Novo status do pedido: {self.status.title()}[/]")
 
     def __str__(self):
@@ -0,0 +1,127 @@
+import heapq
+import itertools
+import threading
+import time
+
+class Reservas:
+    """
+    Reservas de estoque dos carrinhos abertos. Um item no carrinho segura a
+    quantidade por um tempo limitado, sem alterar o estoque: o estoque só é
+    baixado quando o pedido é concluído, e reservas vencidas são liberadas
+    sozinhas. Se o processo terminar, as reservas somem junto e nada se perde.
+
+    O total reservado de cada produto é mantido à parte, então a consulta do
+    disponível para venda custa O(1) por produto, com qualquer quantidade de
+    carrinhos abertos. As validades ficam em um heap; entradas de reservas
+    liberadas ou renovadas antes de vencer são descartadas quando chegam ao
+    topo, e o heap é refeito quando elas passam a ser a maioria.
+    """
+
+    def __init__(self, validade_segundos: float):
+        """
+        Inicializa as reservas
+
+        Args:
+            validade_segundos: Tempo até uma reserva vencer, contado da criação
+                               ou da última renovação
+        """
+        self._validade = validade_segundos
+        self._reservas: dict[int, tuple[int, int, float]] = {}  # id -> (produto_id, quantidade, vencimento)
+        self._reservado: dict[int, int] = {}                     # produto_id -> quantidade reservada
+        self._vencimentos: list[tuple[float, int]] = []          # heap de (vencimento, id)
+        self._sequencia = itertools.count(1)
+        self._trava = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._reservas)
+
+    def __contains__(self, reserva_id: int) -> bool:
+        return reserva_id in self._reservas
+
+    def reservado(self, produto_id: int) -> int:
+        """
+        Retorna a quantidade do produto segura por reservas ainda válidas
+        """
+        self.expirar()
+        return self._reservado.get(produto_id, 0)
+
+    def reservar(self, produto_id: int, quantidade: int) -> int:
+        """
+        Cria uma reserva. A conferência do estoque disponível fica com quem chama.
+
+        Returns:
+            ID da reserva
+        """
+        with self._trava:
+            reserva_id = next(self._sequencia)
+            vencimento = time.monotonic() + self._validade
+            self._reservas[reserva_id] = (produto_id, quantidade, vencimento)
+            self._reservado[produto_id] = self._reservado.get(produto_id, 0) + quantidade
+            heapq.heappush(self._vencimentos, (vencimento, reserva_id))
+            self._compactar_heap()
+        return reserva_id
+
+    def renovar(self, reserva_ids: list[int]) -> None:
+        """
+        Reinicia a validade das reservas ainda válidas (ex.: o cliente mexeu no carrinho)
+        """
+        with self._trava:
+            vencimento = time.monotonic() + self._validade
+            for reserva_id in reserva_ids:
+                reserva = self._reservas.get(reserva_id)
+                if reserva is not None and reserva[2] != vencimento:
+                    self._reservas[reserva_id] = (reserva[0], reserva[1], vencimento)
+                    heapq.heappush(self._vencimentos, (vencimento, reserva_id))
+            self._compactar_heap()
+
+    def liberar(self, reserva_id: int) -> tuple[int, int] | None:
+        """
+        Remove a reserva, devolvendo a quantidade ao disponível
+
+        Returns:
+            Tupla (produto_id, quantidade), ou None se a reserva já tinha vencido
+        """
+        with self._trava:
+            return self._remover(reserva_id)
+
+    def expirar(self, agora: float | None = None) -> list[tuple[int, int]]:
+        """
+        Libera as reservas vencidas
+
+        Returns:
+            Lista de (produto_id, quantidade) liberados
+        """
+        agora = time.monotonic() if agora is None else agora
+        if not self._vencimentos or self._vencimentos[0][0] > agora:
+            return []
+        liberadas = []
+        with self._trava:
+            while self._vencimentos and self._vencimentos[0][0] <= agora:
+                vencimento, reserva_id = heapq.heappop(self._vencimentos)
+                reserva = self._reservas.get(reserva_id)
+                # Entradas de reservas já liberadas ou renovadas depois são só descartadas
+                if reserva is not None and reserva[2] == vencimento:
+                    liberadas.append(self._remover(reserva_id))
+        return liberadas
+
+    def _compactar_heap(self) -> None:
+        """
+        Refaz o heap só com os vencimentos atuais quando as entradas obsoletas
+        (de renovações e liberações) passam das válidas, para ele não crescer sem limite
+        """
+        if len(self._vencimentos) > 2 * len(self._reservas) + 64:
+            self._vencimentos = [(vencimento, reserva_id)
+                                 for reserva_id, (_, _, vencimento) in self._reservas.items()]
+            heapq.heapify(self._vencimentos)
+
+    def _remover(self, reserva_id: int) -> tuple[int, int] | None:
+        reserva = self._reservas.pop(reserva_id, None)
+        if reserva is None:
+            return None
+        produto_id, quantidade, _ = reserva
+        restante = self._reservado[produto_id] - quantidade
+        if restante:
+            self._reservado[produto_id] = restante
+        else:
+            del self._reservado[produto_id]
+        return produto_id, quantidade
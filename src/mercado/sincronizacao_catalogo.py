@@ -0,0 +1,124 @@
+import os
+import numpy as np
+import pandas as pd
+
+# Colunas da tabela de produtos, na ordem gravada por Produto.get_dic()
+COLUNAS_PRODUTOS = ["id", "nome", "preco", "tipo", "quantidade", "altura", "largura", "profundidade", "link_download"]
+COLUNAS_OBRIGATORIAS = ["id", "nome", "preco", "tipo"]
+COLUNAS_NUMERICAS = ["preco", "quantidade", "altura", "largura", "profundidade"]
+
+
+def ler_catalogo(origem) -> pd.DataFrame:
+    """
+    Lê o catálogo do fornecedor de um DataFrame ou de um arquivo .csv, .jsonl ou .xlsx
+
+    Raises:
+        ValueError: Se o formato não é suportado ou faltam colunas obrigatórias
+    """
+    if isinstance(origem, pd.DataFrame):
+        catalogo = origem.copy()
+    else:
+        extensao = os.path.splitext(str(origem))[1].lower()
+        if extensao == ".csv":
+            catalogo = pd.read_csv(origem)
+        elif extensao in (".jsonl", ".json"):
+            catalogo = pd.read_json(origem, lines=extensao == ".jsonl", dtype=False)
+        elif extensao == ".xlsx":
+            catalogo = pd.read_excel(origem)
+        else:
+            raise ValueError(f"Formato de catálogo não suportado: '{extensao}'. Use .csv, .jsonl, .xlsx ou um DataFrame.")
+
+    faltantes = [coluna for coluna in COLUNAS_OBRIGATORIAS if coluna not in catalogo.columns]
+    if faltantes:
+        raise ValueError(f"Colunas obrigatórias ausentes no catálogo: {', '.join(faltantes)}")
+    return catalogo.reset_index(drop=True)
+
+
+def normalizar_catalogo(catalogo: pd.DataFrame) -> pd.DataFrame:
+    """
+    Deixa o catálogo com as colunas e os tipos da tabela de produtos, para que
+    linhas iguais tenham o mesmo hash venha o catálogo do arquivo ou do banco.
+    Os campos que não se aplicam ao tipo do produto ficam vazios.
+    """
+    normalizado = pd.DataFrame({
+        "id": pd.to_numeric(catalogo["id"], errors="coerce"),
+        "nome": catalogo["nome"].astype("string").str.strip(),
+        "tipo": catalogo["tipo"].astype("string").str.strip().str.lower(),
+    })
+    for coluna in COLUNAS_NUMERICAS:
+        normalizado[coluna] = (pd.to_numeric(catalogo[coluna], errors="coerce").astype("float64")
+                               if coluna in catalogo.columns else np.nan)
+    normalizado["link_download"] = (catalogo["link_download"].astype("string").str.strip()
+                                    if "link_download" in catalogo.columns else pd.NA)
+
+    fisico = normalizado["tipo"].eq("fisico").fillna(False).to_numpy()
+    for coluna in ["quantidade", "altura", "largura", "profundidade"]:
+        normalizado.loc[~fisico, coluna] = np.nan
+    normalizado.loc[fisico, "link_download"] = pd.NA
+    return normalizado[COLUNAS_PRODUTOS]
+
+
+def validar_catalogo(catalogo: pd.DataFrame) -> tuple[pd.DataFrame, pd.DataFrame]:
+    """
+    Aplica ao catálogo normalizado as mesmas regras de ProdutoFisico e ProdutoDigital
+
+    Returns:
+        Tupla (linhas válidas, linhas rejeitadas com a coluna 'motivo')
+    """
+    fisico = catalogo["tipo"].eq("fisico").fillna(False)
+    digital = catalogo["tipo"].eq("digital").fillna(False)
+    quantidade = catalogo["quantidade"]
+    condicoes = [
+        catalogo["id"].isna() | (catalogo["id"] % 1 != 0),
+        catalogo["id"].duplicated(keep=False),
+        catalogo["nome"].isna() | catalogo["nome"].eq(""),
+        ~(fisico | digital),
+        catalogo["preco"].isna() | (catalogo["preco"] < 0),
+        fisico & quantidade.notna() & ((quantidade < 0) | (quantidade % 1 != 0)),
+        fisico & ~((catalogo["altura"] > 0) & (catalogo["largura"] > 0) & (catalogo["profundidade"] > 0)),
+        digital & (catalogo["link_download"].isna() | catalogo["link_download"].eq("")).fillna(True),
+    ]
+    motivos = ["id inválido", "id repetido no catálogo", "nome vazio", "tipo inválido", "preço inválido",
+               "quantidade inválida", "dimensões inválidas", "link de download vazio"]
+    motivo = pd.Series(np.select(condicoes, motivos, default=""), index=catalogo.index)
+
+    rejeitadas = motivo.ne("")
+    validas = catalogo[~rejeitadas].astype({"id": "int64"})
+    return validas.reset_index(drop=True), catalogo[rejeitadas].assign(motivo=motivo[rejeitadas])
+
+
+def hashes_linhas(catalogo: pd.DataFrame) -> pd.Series:
+    """
+    Retorna o hash do conteúdo de cada linha do catálogo normalizado, indexado pelo id
+    """
+    hashes = pd.util.hash_pandas_object(catalogo[COLUNAS_PRODUTOS].astype({"id": "int64"}), index=False)
+    return pd.Series(hashes.to_numpy(), index=catalogo["id"].to_numpy())
+
+
+def comparar_catalogos(atual: pd.DataFrame, novo: pd.DataFrame,
+                       remover_ausentes: bool = False) -> tuple[pd.DataFrame, pd.DataFrame, list[int]]:
+    """
+    Compara o catálogo atual com o novo pelos hashes das linhas (ambos normalizados)
+
+    Args:
+        atual: Catálogo atual (tabela de produtos)
+        novo: Catálogo novo, já validado
+        remover_ausentes: Se True, produtos que não estão no catálogo novo são removidos
+
+    Returns:
+        Tupla (linhas a inserir, linhas a atualizar, IDs a remover)
+    """
+    hashes_atuais = hashes_linhas(atual)
+    hashes_novos = hashes_linhas(novo)
+
+    existentes = hashes_novos.index.isin(hashes_atuais.index)
+    inserir = novo[~existentes]
+    alteradas = existentes.copy()
+    alteradas[existentes] = hashes_novos[existentes].to_numpy() != hashes_atuais.reindex(
+        hashes_novos.index[existentes]).to_numpy()
+    atualizar = novo[alteradas]
+
+    remover = []
+    if remover_ausentes:
+        remover = hashes_atuais.index[~hashes_atuais.index.isin(hashes_novos.index)].astype(int).tolist()
+    return inserir, atualizar, remover
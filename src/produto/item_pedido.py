@@ -0,0 +1,139 @@
+from produto.produto import Produto
+
+
+class ProdutoForaDoCatalogo:
+    """
+    Produto de um item de pedido que não está mais no catálogo (ex.: removido
+    por uma sincronização). Só o ID é conhecido; o item mantém a quantidade, o
+    preço e o frete gravados.
+    """
+
+    __slots__ = ('_id',)
+
+    def __init__(self, id: int):
+        self._id = id
+
+    @property
+    def id(self) -> int:
+        return self._id
+
+    @property
+    def nome(self) -> str:
+        return f"Produto #{self._id} (fora do catálogo)"
+
+    @property
+    def preco(self) -> float:
+        """
+        Preço desconhecido: itens gravados sem preço de produtos removidos valem zero
+        """
+        return 0.0
+
+    def calcular_frete(self) -> float:
+        return 0.0
+
+    def __repr__(self):
+        return f"ProdutoForaDoCatalogo(id={self._id})"
+
+
+class ItemPedido:
+    """
+    Item de um pedido: o produto do catálogo, a quantidade vendida, o preço
+    unitário e o frete no momento da venda.
+
+    O tipo do item (físico ou digital) é o da linha gravada, e não o do produto
+    no catálogo atual: um item é físico se tem quantidade.
+
+    O item não copia o produto: nome, dimensões e link de download são lidos do
+    próprio produto do catálogo, compartilhado por todos os itens que o vendem.
+    Só o que é do item fica nele (a quantidade, o preço e o frete da venda, que
+    não mudam se o produto do catálogo mudar ou sair do catálogo depois). Itens
+    de produtos digitais não têm quantidade (None), contam uma unidade e não têm
+    frete.
+    """
+
+    __slots__ = ('_produto', '_quantidade', '_preco_unitario', '_frete')
+
+    def __init__(self, produto: Produto | ProdutoForaDoCatalogo, quantidade: int | None,
+                 preco_unitario: float, frete: float = 0.0):
+        """
+        Args:
+            produto: Produto do catálogo (ProdutoForaDoCatalogo se não está mais nele)
+            quantidade: Quantidade vendida; None para produtos digitais
+            preco_unitario: Preço unitário no momento da venda
+            frete: Frete do item no momento da venda; ignorado nos itens digitais
+        """
+        self._produto = produto
+        self._quantidade = quantidade
+        self._preco_unitario = preco_unitario
+        self._frete = frete if quantidade is not None else 0.0
+
+    @property
+    def produto(self) -> Produto | ProdutoForaDoCatalogo:
+        return self._produto
+
+    @property
+    def id(self) -> int:
+        return self._produto.id
+
+    @property
+    def nome(self) -> str:
+        return self._produto.nome
+
+    @property
+    def quantidade(self) -> int | None:
+        return self._quantidade
+
+    @property
+    def preco(self) -> float:
+        """
+        Preço unitário no momento da venda
+        """
+        return self._preco_unitario
+
+    @property
+    def fisico(self) -> bool:
+        return self._quantidade is not None
+
+    @property
+    def unidades(self) -> int:
+        """
+        Unidades cobradas: a quantidade dos itens físicos, uma para os digitais
+        """
+        return self._quantidade if self._quantidade is not None else 1
+
+    def calcular_frete(self) -> float:
+        """
+        Frete do item no momento da venda; zero nos digitais
+        """
+        return self._frete
+
+    @classmethod
+    def de_gravado(cls, item: dict, produto: Produto | None) -> "ItemPedido":
+        """
+        Monta o item a partir da linha gravada na coluna de produtos da tabela de pedidos.
+        Linhas gravadas sem preço ou sem frete usam os do produto do catálogo.
+
+        Args:
+            item: Linha gravada ('id', 'quantidade' e 'frete' nos itens físicos, 'preco')
+            produto: Produto do catálogo com o ID da linha; None se não está mais no catálogo
+        """
+        if produto is None:
+            produto = ProdutoForaDoCatalogo(item['id'])
+        quantidade = item.get('quantidade')
+        preco = item.get('preco')
+        frete = item.get('frete')
+        if frete is None and quantidade is not None:
+            frete = produto.calcular_frete()
+        return cls(produto, quantidade, produto.preco if preco is None else preco, frete or 0.0)
+
+    def get_dic(self) -> dict:
+        """
+        Retorna o item no formato gravado na coluna de produtos da tabela de pedidos
+        """
+        if self.fisico:
+            return {'id': self.id, 'quantidade': self._quantidade, 'preco': self._preco_unitario,
+                    'frete': self._frete}
+        return {'id': self.id, 'preco': self._preco_unitario}
+
+    def __repr__(self):
+        return f"ItemPedido(id={self.id}, nome='{self.nome}', quantidade={self._quantidade}, preco={self._preco_unitario})"
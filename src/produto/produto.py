@@ -1,6 +1,11 @@
 from abc import ABC, abstractmethod
+from ferramentas.alteracoes import SEM_ALTERACOES, RastreiaAlteracoes
+
+class Produto(RastreiaAlteracoes, ABC):
+
+    # Atributos fixos, sem __dict__ por objeto: o catálogo pode ter milhões de produtos
+    __slots__ = ('_id', '_nome', '_preco', '_campos_alterados')
 
-class Produto(ABC):
     def __init__(self, id: int, nome: str, preco: float):
         """
         Inicializa um produto
@@ -12,7 +17,8 @@ class Produto(ABC):
         """
         self._id = id
         self._nome = nome
-        self._preco = preco
+        self._preco = float(preco)
+        self._campos_alterados = SEM_ALTERACOES
 
     # Getters
     @property
@@ -30,12 +36,14 @@ class Produto(ABC):
     # Setters
     @nome.setter
     def nome(self, nome: str):
+        self._marcar_alterado("nome", self._nome, nome)
         self._nome = nome
 
     @preco.setter
     def preco(self, preco: float):
         if preco < 0:
             raise ValueError("O preço não pode ser negativo.")
+        self._marcar_alterado("preco", self._preco, preco)
         self._preco = preco
     
     def __str__(self):
@@ -60,6 +68,12 @@ class Produto(ABC):
             "preco": self._preco,
         }
     
+    def calcular_frete(self) -> float:
+        """
+        Frete do produto; sem envio (como os digitais), não há frete
+        """
+        return 0.0
+
     @abstractmethod
     def realizar_venda(self):
         """
@@ -67,6 +81,14 @@ class Produto(ABC):
         """
         pass
 
+    @abstractmethod
+    def item_para_pedido(self, quantidade, preco_unitario: float | None = None):
+        """
+        Método abstrato que cria o item de pedido (ItemPedido) que vende o produto,
+        sem alterar o produto do catálogo
+        """
+        pass
+
     @abstractmethod
     def exibir_menu_edicao(self):
         """
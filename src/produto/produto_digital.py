@@ -1,8 +1,12 @@
+from produto.item_pedido import ItemPedido
 from produto.produto import Produto
 from rich.console import Console
 from rich.prompt import Prompt, FloatPrompt
 
 class ProdutoDigital(Produto):
+
+    __slots__ = ('_link_download',)
+
     def __init__(self, id: int, nome: str, preco: float, link_download: str):
         """
         Inicializa um produto digital
@@ -26,6 +30,7 @@ class ProdutoDigital(Produto):
     def link_download(self, link: str):
         if not link or not link.strip():
             raise ValueError("O link de download não pode ser vazio.")
+        self._marcar_alterado("link_download", self._link_download, link)
         self._link_download = link
 
     def __str__(self):
@@ -35,14 +40,20 @@ class ProdutoDigital(Produto):
         return (f"ProdutoDigital(id={self.id}, nome='{self.nome}', "
                 f"preco={self.preco}, link_download='{self.link_download}')")
     
-    def realizar_venda(self):
+    def realizar_venda(self) -> ItemPedido:
         """
         Realiza a venda do produto digital
         
         Simula o processo de venda, como enviar o link de download ao cliente.
         """
-        # Retorna uma nova instância do produto digital
-        return ProdutoDigital(self.id, self.nome, self.preco, self.link_download)
+        # Retorna o item do pedido
+        return self.item_para_pedido()
+
+    def item_para_pedido(self, quantidade: float | None = None, preco_unitario: float | None = None) -> ItemPedido:
+        """
+        Cria o item de pedido do produto. A quantidade é ignorada.
+        """
+        return ItemPedido(self, None, self._preco if preco_unitario is None else preco_unitario)
 
     def get_dic(self):
         """
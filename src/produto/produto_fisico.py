@@ -1,9 +1,24 @@
+from produto.item_pedido import ItemPedido
 from produto.produto import Produto
 import hashlib
 from rich.console import Console
 from rich.prompt import Prompt, FloatPrompt, IntPrompt
 
+
+class EstoqueInsuficiente(ValueError):
+    """
+    Lançada quando a quantidade pedida passa do estoque (ou do disponível para venda)
+    """
+    pass
+
+
 class ProdutoFisico(Produto):
+
+    # Valor do frete por unidade de volume do produto
+    FRETE_POR_VOLUME = 0.5
+
+    __slots__ = ('_quantidade', '_altura', '_largura', '_profundidade', '_observador_quantidade')
+
     def __init__(self, id: int, nome: str, preco: float, quantidade: float, 
                  altura: float, largura: float, profundidade: float):
         """
@@ -20,9 +35,11 @@ class ProdutoFisico(Produto):
         """
         super().__init__(id, nome, preco)
         self._quantidade = quantidade
-        self._altura = altura
-        self._largura = largura
-        self._profundidade = profundidade
+        self._altura = float(altura)
+        self._largura = float(largura)
+        self._profundidade = float(profundidade)
+        # Função chamada com (id, nova quantidade) a cada mudança de estoque; só os produtos do catálogo têm uma
+        self._observador_quantidade = None
 
     # Getters
     @property
@@ -46,20 +63,43 @@ class ProdutoFisico(Produto):
     def quantidade(self, quantidade: float):
         if quantidade < 0:
             raise ValueError("A quantidade não pode ser negativa.")
+        self._marcar_alterado("quantidade", self._quantidade, quantidade)
         self._quantidade = quantidade
+        if self._observador_quantidade is not None:
+            self._observador_quantidade(self._id, quantidade)
 
     @altura.setter
     def altura(self, altura: float):
         if altura <= 0:
             raise ValueError("A altura deve ser um valor positivo.")
+        self._marcar_alterado("altura", self._altura, altura)
         self._altura = altura
 
     @largura.setter
     def largura(self, largura: float):
         if largura <= 0:
             raise ValueError("A largura deve ser um valor positivo.")
+        self._marcar_alterado("largura", self._largura, largura)
         self._largura = largura
+
+    @profundidade.setter
+    def profundidade(self, profundidade: float):
+        if profundidade <= 0:
+            raise ValueError("A profundidade deve ser um valor positivo.")
+        self._marcar_alterado("profundidade", self._profundidade, profundidade)
+        self._profundidade = profundidade
     
+    def observar_quantidade(self, observador) -> None:
+        """
+        Define a função avisada a cada mudança do estoque, com (id, nova quantidade); None para parar de avisar
+        """
+        self._observador_quantidade = observador
+
+    def __getstate__(self):
+        # O observador pertence ao mercado, que não é serializado junto com o produto
+        estado, slots = super().__getstate__()
+        return estado, {**slots, '_observador_quantidade': None}
+
     def __str__(self):
             """
             Representação em string do produto físico
@@ -77,28 +117,35 @@ class ProdutoFisico(Produto):
         """
         return self._altura * self._largura * self._profundidade
     
-    def realizar_venda(self, quantidade: float) -> None:
+    def realizar_venda(self, quantidade: float) -> ItemPedido:
         """
         Realiza uma venda do produto
         
         Args:
             quantidade: Quantidade a ser vendida
+
+        Raises:
+            EstoqueInsuficiente: Se a quantidade passa do estoque
         """
         if quantidade > self._quantidade:
-            raise ValueError("Quantidade insuficiente em estoque")
+            raise EstoqueInsuficiente("Quantidade insuficiente em estoque")
         
         self.quantidade -= quantidade # Usa o setter implicitamente
 
-        # Retorna uma nova instância com a quantidade do pedido
-        return ProdutoFisico(
-            id=self.id,
-            nome=self.nome,
-            preco=self.preco,
-            quantidade=quantidade,
-            altura=self._altura,
-            largura=self._largura,
-            profundidade=self._profundidade
-        )
+        # Retorna o item do pedido, com a quantidade vendida
+        return self.item_para_pedido(quantidade)
+
+    def item_para_pedido(self, quantidade: float, preco_unitario: float | None = None) -> ItemPedido:
+        """
+        Cria o item de pedido do produto, sem conferir nem baixar o estoque.
+        Usado também para montar pedidos já gravados.
+
+        Args:
+            quantidade: Quantidade do produto no pedido
+            preco_unitario: Preço da venda; se None, o preço atual
+        """
+        return ItemPedido(self, quantidade, self._preco if preco_unitario is None else preco_unitario,
+                          self.calcular_frete())
     
     def calcular_frete(self) -> float:
         """
@@ -115,7 +162,7 @@ class ProdutoFisico(Produto):
         volume_produto = self.calcular_volume()
 
         # Cálculo simples baseado no volume
-        valor_frete = (volume_produto * 0.5)
+        valor_frete = (volume_produto * self.FRETE_POR_VOLUME)
 
         return valor_frete
     
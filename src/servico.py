@@ -0,0 +1,225 @@
+import threading
+from datetime import datetime, timedelta
+from rich.console import Console
+
+from ferramentas import configuracao
+from ferramentas.servidor_http import ErroHTTP, ServidorHTTP
+from mercado.pedido import Pedido
+from produto.produto import Produto
+from produto.produto_fisico import EstoqueInsuficiente, ProdutoFisico
+from sistema import Sistema
+
+# Tamanho padrão e máximo das páginas de produtos e pedidos
+ITENS_POR_PAGINA = 50
+MAXIMO_POR_PAGINA = 500
+
+
+class Servico:
+    """
+    Modo serviço: um único Sistema carregado em memória atende vários clientes
+    por uma API JSON local, em vez de cada terminal carregar os dados sozinho.
+
+    Rotas:
+        GET  /produtos              catálogo (?tipo=fisico|digital, ?pagina, ?por_pagina)
+        GET  /produtos/{id}         produto, com o disponível para venda se for físico
+        POST /pedidos               cria um pedido: {"cliente_id": 1, "itens": [{"produto_id": 2, "quantidade": 3}]}
+        GET  /pedidos               consulta (?cliente_id, ?status, ?produto_id, ?inicio, ?fim, ?limite)
+        GET  /pedidos/{id}          pedido
+        POST /pedidos/{id}/processar  processa a entrega do pedido
+        GET  /relatorios/vendas     agregados de vendas (?dias, ?limite)
+        GET  /metricas              latência por rota
+    """
+
+    def __init__(self, sistema: Sistema | None = None):
+        """
+        Inicializa o serviço, carregando o sistema (do snapshot, se válido) uma única vez
+
+        Args:
+            sistema: Sistema já carregado (se None, é criado aqui)
+        """
+        self._sistema = sistema if sistema is not None else Sistema()
+        self._mercado = self._sistema.mercado
+        # Evita que duas requisições processem a entrega do mesmo pedido ao mesmo tempo
+        self._trava_processamento = threading.Lock()
+        self._servidor = ServidorHTTP(configuracao.SERVICO_ENDERECO, configuracao.SERVICO_PORTA,
+                                      configuracao.SERVICO_TRABALHADORES)
+
+        # O catálogo está todo em memória: as consultas rodam direto no laço de eventos
+        self._servidor.rota("GET", "/produtos", self.listar_produtos, bloqueante=False)
+        self._servidor.rota("GET", "/produtos/{id}", self.consultar_produto, bloqueante=False)
+        self._servidor.rota("GET", "/metricas", self.consultar_metricas, bloqueante=False)
+        self._servidor.rota("POST", "/pedidos", self.criar_pedido)
+        self._servidor.rota("GET", "/pedidos", self.buscar_pedidos)
+        self._servidor.rota("GET", "/pedidos/{id}", self.consultar_pedido)
+        self._servidor.rota("POST", "/pedidos/{id}/processar", self.processar_pedido)
+        self._servidor.rota("GET", "/relatorios/vendas", self.relatorio_vendas)
+
+    def iniciar(self):
+        """
+        Atende as requisições até Ctrl+C. Ao sair, grava as alterações pendentes e o snapshot.
+        """
+        console = Console()
+        endereco = f"http://{configuracao.SERVICO_ENDERECO}:{configuracao.SERVICO_PORTA}"
+        try:
+            self._servidor.iniciar(pronto=lambda: console.print(
+                f"[bold green]Serviço do mercado em {endereco}[/] (Ctrl+C para encerrar)"))
+        finally:
+            self._mercado.encerrar()
+        self._sistema.salvar_snapshot()
+        console.print("\n[bold blue]Serviço encerrado.[/]")
+
+    # Rotas
+
+    def listar_produtos(self, parametros: dict, consulta: dict, corpo) -> tuple[int, dict]:
+        tipo = consulta.get("tipo")
+        if tipo not in (None, "fisico", "digital"):
+            raise ErroHTTP(400, "O tipo deve ser 'fisico' ou 'digital'.")
+        pagina = self._inteiro(consulta.get("pagina", "1"), "pagina", minimo=1)
+        por_pagina = min(self._inteiro(consulta.get("por_pagina", str(ITENS_POR_PAGINA)), "por_pagina", minimo=1),
+                         MAXIMO_POR_PAGINA)
+
+        produtos = self._mercado.listar_produtos(tipo)
+        inicio = (pagina - 1) * por_pagina
+        return 200, {
+            "total": len(produtos),
+            "pagina": pagina,
+            "por_pagina": por_pagina,
+            "produtos": [self._produto_json(produto) for produto in produtos[inicio:inicio + por_pagina]],
+        }
+
+    def consultar_produto(self, parametros: dict, consulta: dict, corpo) -> tuple[int, dict]:
+        produto = self._mercado.buscar_produto(self._inteiro(parametros["id"], "id"))
+        if produto is None:
+            raise ErroHTTP(404, f"Produto {parametros['id']} não encontrado.")
+        return 200, self._produto_json(produto, com_disponivel=True)
+
+    def consultar_metricas(self, parametros: dict, consulta: dict, corpo) -> tuple[int, dict]:
+        return 200, self._servidor.metricas.resumo()
+
+    def criar_pedido(self, parametros: dict, consulta: dict, corpo) -> tuple[int, dict]:
+        if not isinstance(corpo, dict):
+            raise ErroHTTP(400, "Envie um JSON com 'cliente_id' e 'itens'.")
+        cliente_id = corpo.get("cliente_id")
+        if (not isinstance(cliente_id, int) or isinstance(cliente_id, bool)
+                or self._sistema.usuario_por_id(cliente_id) is None):
+            raise ErroHTTP(400, f"Cliente inválido: {cliente_id}.")
+        itens_corpo = corpo.get("itens")
+        if not isinstance(itens_corpo, list) or not all(isinstance(item, dict) for item in itens_corpo):
+            raise ErroHTTP(400, "'itens' deve ser uma lista de objetos com 'produto_id' e 'quantidade'.")
+        itens = [self._item_pedido(item) for item in itens_corpo]
+
+        try:
+            pedido = self._mercado.criar_pedido(cliente_id, itens)
+        except EstoqueInsuficiente as erro:
+            # Conflito com o estado atual do estoque, e não requisição inválida
+            raise ErroHTTP(409, str(erro))
+        except ValueError as erro:
+            raise ErroHTTP(400, str(erro))
+        return 201, self._pedido_json(pedido)
+
+    def buscar_pedidos(self, parametros: dict, consulta: dict, corpo) -> tuple[int, dict]:
+        filtros = {
+            "cliente_id": self._inteiro(consulta["cliente_id"], "cliente_id") if "cliente_id" in consulta else None,
+            "produto_id": self._inteiro(consulta["produto_id"], "produto_id") if "produto_id" in consulta else None,
+            "status": consulta.get("status"),
+            "inicio": self._data(consulta["inicio"], "inicio") if "inicio" in consulta else None,
+            "fim": self._data(consulta["fim"], "fim") if "fim" in consulta else None,
+        }
+        limite = min(self._inteiro(consulta.get("limite", str(ITENS_POR_PAGINA)), "limite", minimo=1), MAXIMO_POR_PAGINA)
+        ids = self._mercado.buscar_pedidos(**filtros)
+        pedidos = self._mercado.pedidos_por_ids(ids[:limite])
+        return 200, {"total": len(ids), "pedidos": [self._pedido_json(pedido) for pedido in pedidos]}
+
+    def consultar_pedido(self, parametros: dict, consulta: dict, corpo) -> tuple[int, dict]:
+        return 200, self._pedido_json(self._buscar_pedido(parametros["id"]))
+
+    def processar_pedido(self, parametros: dict, consulta: dict, corpo) -> tuple[int, dict]:
+        with self._trava_processamento:
+            pedido = self._buscar_pedido(parametros["id"])
+            if pedido.status != 'aguardando entrega':
+                raise ErroHTTP(409, f"O pedido {pedido.id} não está aguardando entrega (status: {pedido.status}).")
+            # A entrega pelo terminal (processar_entrega) imprime no console; aqui só o status muda
+            pedido.registrar_entrega()
+            self._mercado.salvar_pedido(pedido)
+            return 200, self._pedido_json(pedido)
+
+    def relatorio_vendas(self, parametros: dict, consulta: dict, corpo) -> tuple[int, dict]:
+        dias = self._inteiro(consulta.get("dias", "30"), "dias", minimo=0)
+        limite = min(self._inteiro(consulta.get("limite", "10"), "limite", minimo=1), MAXIMO_POR_PAGINA)
+        inicio = (datetime.now() - timedelta(days=dias - 1)).date() if dias > 0 else None
+        relatorio = self._mercado.relatorio_vendas(inicio=inicio, limite=limite)
+        return 200, {
+            "status": relatorio["status"],
+            "produtos": [{"produto_id": int(produto_id), "unidades": float(linha["unidades"]),
+                          "receita": round(float(linha["receita"]), 2)}
+                         for produto_id, linha in relatorio["produtos"].iterrows()],
+            "dias": [{"data": data.isoformat(), "unidades": float(linha["unidades"]),
+                      "receita": round(float(linha["receita"]), 2)}
+                     for data, linha in relatorio["dias"].iterrows()],
+            "clientes": [{"cliente_id": int(cliente_id), "pedidos": int(linha["pedidos"]),
+                          "valor": round(float(linha["valor"]), 2)}
+                         for cliente_id, linha in relatorio["clientes"].iterrows()],
+        }
+
+    # Auxiliares
+
+    def _buscar_pedido(self, texto_id: str) -> Pedido:
+        pedido = self._mercado.pedido_por_id(self._inteiro(texto_id, "id"))
+        if pedido is None:
+            raise ErroHTTP(404, f"Pedido {texto_id} não encontrado.")
+        return pedido
+
+    @staticmethod
+    def _inteiro(texto: str, nome: str, minimo: int | None = None) -> int:
+        try:
+            valor = int(texto)
+        except (TypeError, ValueError):
+            raise ErroHTTP(400, f"'{nome}' deve ser um número inteiro.")
+        if minimo is not None and valor < minimo:
+            raise ErroHTTP(400, f"'{nome}' deve ser pelo menos {minimo}.")
+        return valor
+
+    @staticmethod
+    def _item_pedido(item: dict) -> tuple[int, int]:
+        """
+        Confere um item do corpo de POST /pedidos e o converte em (produto_id, quantidade)
+        """
+        produto_id = item.get("produto_id")
+        quantidade = item.get("quantidade", 1)
+        # bool é subclasse de int, mas true/false não são IDs nem quantidades
+        if not isinstance(produto_id, int) or isinstance(produto_id, bool):
+            raise ErroHTTP(400, f"'produto_id' deve ser um número inteiro: {produto_id!r}.")
+        if not isinstance(quantidade, int) or isinstance(quantidade, bool) or quantidade <= 0:
+            raise ErroHTTP(400, f"'quantidade' deve ser um inteiro positivo: {quantidade!r}.")
+        return produto_id, quantidade
+
+    @staticmethod
+    def _data(texto: str, nome: str) -> datetime:
+        try:
+            return datetime.fromisoformat(texto)
+        except ValueError:
+            raise ErroHTTP(400, f"'{nome}' deve ser uma data ISO (ex.: 2024-01-31).")
+
+    def _produto_json(self, produto: Produto, com_disponivel: bool = False) -> dict:
+        dados = produto.get_dic()
+        dados = {chave: valor for chave, valor in dados.items() if valor is not None}
+        if com_disponivel and isinstance(produto, ProdutoFisico):
+            dados["disponivel"] = self._mercado.disponivel(produto.id)
+        return dados
+
+    @staticmethod
+    def _pedido_json(pedido: Pedido) -> dict:
+        itens = []
+        for item_pedido in pedido.produtos:
+            item = {"produto_id": item_pedido.id, "nome": item_pedido.nome, "preco": item_pedido.preco}
+            if item_pedido.fisico:
+                item["quantidade"] = item_pedido.quantidade
+            itens.append(item)
+        return {
+            "id": pedido.id,
+            "cliente_id": pedido.cliente_id,
+            "data": pedido.data.isoformat(),
+            "status": pedido.status,
+            "itens": itens,
+            "total": round(pedido.calcular_total(), 2),
+        }
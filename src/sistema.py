@@ -1,6 +1,7 @@
 import re
 import pandas as pd
 from ferramentas.banco_de_dados import BancoDeDados
+from ferramentas.snapshot import Snapshot
 from mercado.mercado import Mercado
 from usuarios.usuario import Usuario
 from usuarios.admin import Admin
@@ -9,13 +10,54 @@ from rich.prompt import Prompt
 
 class Sistema:
 
+    # Tabelas das quais o estado guardado no snapshot é montado
+    TABELAS_SNAPSHOT = ["usuarios", "produtos", "pedidos"]
+
     def __init__(self):
         """
         Inicializa o sistema de gerenciamento de mercado, carregando os dados
         """ 
         self._usuario_logado = None
-        self.carregar_usuarios()
-        self.mercado = Mercado()
+
+        # Tenta retomar o estado do último encerramento; se estiver desatualizado, monta tudo do banco
+        self._snapshot = Snapshot(self._tabelas_snapshot)
+        if not self.restaurar_snapshot():
+            self.carregar_usuarios()
+            self.mercado = Mercado()
+        self._snapshot.marcar_referencia()
+
+    def _tabelas_snapshot(self) -> list[str]:
+        # Os pedidos ficam divididos em partições, cada uma em sua própria tabela
+        return self.TABELAS_SNAPSHOT + Mercado.tabela_pedidos().tabelas()
+
+    def restaurar_snapshot(self) -> bool:
+        """
+        Restaura usuários, catálogo e pedidos a partir do snapshot gravado no último encerramento
+
+        Returns:
+            True se o snapshot era válido e foi restaurado
+        """
+        estado = self._snapshot.carregar()
+        if estado is None:
+            return False
+        try:
+            self.mercado = Mercado(estado=estado['mercado'])
+        except (KeyError, ValueError):
+            return False
+        self._usuarios = estado['usuarios']
+        return True
+
+    def salvar_snapshot(self):
+        """
+        Grava o snapshot do estado atual, usado para acelerar a próxima inicialização.
+        Se outro terminal alterou as tabelas durante a sessão, o estado em memória pode
+        estar desatualizado: o snapshot é descartado e a próxima inicialização lê o banco.
+        """
+        estado_mercado = self.mercado.exportar_estado()
+        if estado_mercado is None or self._snapshot.alteradas_externamente():
+            self._snapshot.invalidar()
+            return
+        self._snapshot.salvar({'usuarios': self._usuarios, 'mercado': estado_mercado})
 
     def carregar_usuarios(self):
         """
@@ -37,6 +79,12 @@ class Sistema:
 
         self._usuarios = lista_usuarios
 
+    def usuario_por_id(self, usuario_id: int) -> Usuario | None:
+        """
+        Retorna o usuário com o ID informado, ou None se não existir
+        """
+        return next((usuario for usuario in self._usuarios if usuario.id == usuario_id), None)
+
     def salvar_usuarios(self):
         """
         Salva os dados dos usuários no banco de dados
@@ -47,6 +95,12 @@ class Sistema:
         # Salva os dados no banco de dado
         BancoDeDados().salvar_tabela(dados_usuarios, "usuarios")
 
+    def salvar_usuario(self, usuario: Usuario):
+        """
+        Salva apenas a linha do usuário informado no banco de dados
+        """
+        BancoDeDados().upsert_linhas(pd.DataFrame([usuario.get_dic()]), "usuarios")
+
     def cadastrar_usuario(self, tipo_usuario='cliente') :
         """
         Realiza o primeiro acesso ao sistema, criando um usuário administrador
@@ -163,10 +217,13 @@ class Sistema:
             else:
                 console.print(f"[bold red]Erro: {erro}[/]")
 
+        # O identificador vem de uma sequência compartilhada, para não repetir entre terminais
+        novo_id = BancoDeDados().proximo_id("usuarios", minimo=max((u.id for u in self._usuarios), default=0))
+
         # Cria a instância correta de acordo com o tipo de usuário
         if tipo_usuario == 'administrador':
             instancia_usuario = Admin(
-                id=len(self._usuarios) + 1,
+                id=novo_id,
                 nome=nome,
                 endereco=endereco,
                 telefone=telefone,
@@ -175,7 +232,7 @@ class Sistema:
             )
         else:
             instancia_usuario = Usuario(
-                id=len(self._usuarios) + 1,
+                id=novo_id,
                 nome=nome,
                 endereco=endereco,
                 telefone=telefone,
@@ -188,7 +245,7 @@ class Sistema:
         self._usuario_logado = instancia_usuario  # Define o usuário logado como o recém-criado
 
         # Salva os dados no banco de dados
-        self.salvar_usuarios()
+        self.salvar_usuario(instancia_usuario)
 
         # Exibe resumo dos dados inseridos
         console.print("\n[bold green]Usuário cadastrado com sucesso![/]")
@@ -246,6 +303,19 @@ class Sistema:
         """
         Inicia o sistema de gerenciamento de mercado, exibindo o menu inicial.
         """
+        try:
+            self._exibir_menu_inicial()
+        finally:
+            # Garante que as alterações gravadas em segundo plano cheguem ao disco antes de sair
+            self.mercado.encerrar()
+
+        # Só um encerramento limpo (sem erro) gera o snapshot
+        self.salvar_snapshot()
+
+    def _exibir_menu_inicial(self):
+        """
+        Exibe o menu inicial e, após o login, o menu do usuário.
+        """
         console = Console()
         console.print("[bold green]Bem-vindo ao Super Urach! 💃🛍️[/]")
 
@@ -279,5 +349,3 @@ class Sistema:
         # Quando o usuário logar, vai exibir o menu
         if self._usuario_logado:
             self._usuario_logado.exibir_menu(self.mercado) # Polimormfismo
-
-       
\ No newline at end of file
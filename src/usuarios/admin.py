@@ -1,13 +1,16 @@
+from datetime import datetime, timedelta
 from mercado.mercado import Mercado
 from usuarios.usuario import Usuario
 from rich.console import Console
 from rich.table import Table
-from rich.prompt import Prompt
+from rich.prompt import Prompt, IntPrompt
 
 class Admin(Usuario):
     """
     Classe que representa um usuário administrador do sistema
     """
+
+    __slots__ = ()
     def __init__(self, id: int, nome: str, endereco: str, telefone: str, email: str, senha: str):
         """
         Inicializa um usuário administrador
@@ -40,12 +43,13 @@ class Admin(Usuario):
             console.print("[cyan]3.[/] Editar Produto")
             console.print("[cyan]4.[/] Verificar Pedidos")
             console.print("[cyan]5.[/] Processar Pedido")
-            console.print("[cyan]6.[/] Sair")
+            console.print("[cyan]6.[/] Relatório de Vendas")
+            console.print("[cyan]7.[/] Sair")
 
-            escolha = Prompt.ask("[bold]Escolha uma opção[/]", choices=["1", "2", "3", "4", "5", "6"])
+            escolha = Prompt.ask("[bold]Escolha uma opção[/]", choices=["1", "2", "3", "4", "5", "6", "7"])
 
             if escolha == "1":
-                mercado.exibir_produtos()
+                self._verificar_estoque(mercado)
             elif escolha == "2":
                 mercado.cadastrar_produto()
             elif escolha == "3":
@@ -55,9 +59,91 @@ class Admin(Usuario):
             elif escolha == "5":
                 self._processar_pedido(mercado)
             elif escolha == "6":
+                self._relatorio_vendas(mercado)
+            elif escolha == "7":
                 console.print("\n[bold blue]Saindo do sistema. Até logo![/]")
                 break
     
+    def _verificar_estoque(self, mercado: Mercado):
+        """
+        Exibe os produtos a repor (estoque no limite de reposição ou abaixo dele) e
+        permite ver os menores estoques, definir limites e navegar pelo catálogo.
+        """
+        console = Console()
+        while True:
+            console.print("\n[bold yellow]----- Verificar Estoque -----[/bold yellow]")
+            repor = mercado.produtos_estoque_baixo()
+            cor = "red" if repor else "green"
+            console.print(f"[{cor}]{len(repor)} produto(s) no limite de reposição ou abaixo dele.[/]")
+            faltas = mercado.faltas_estoque()
+            if faltas:
+                console.print(f"[bold red]{len(faltas)} produto(s) vendidos além do estoque por vendas "
+                              f"simultâneas em outros terminais.[/]")
+            console.print("[cyan]r[/] Relatório de reposição  [cyan]m[/] Menores estoques  "
+                          "[cyan]l[/] Definir limite de reposição  [cyan]f[/] Faltas  "
+                          "[cyan]t[/] Todos os produtos  [cyan]s[/] Sair")
+            escolha = Prompt.ask("[bold]Opção[/]", choices=["r", "m", "l", "f", "t", "s"],
+                                 default="f" if faltas else "r" if repor else "t")
+
+            if escolha == "f":
+                if not faltas:
+                    console.print("[green]Nenhuma venda passou do estoque.[/]")
+                    continue
+                tabela = Table(title="Vendas além do estoque", show_header=True, header_style="bold magenta")
+                tabela.add_column("ID", style="dim", justify="center")
+                tabela.add_column("Nome")
+                tabela.add_column("Unidades faltando", justify="right")
+                for produto_id, faltando in faltas.items():
+                    produto = mercado.buscar_produto(produto_id)
+                    tabela.add_row(str(produto_id), produto.nome if produto is not None else "-", str(faltando))
+                console.print(tabela)
+                if Prompt.ask("Marcar as faltas como resolvidas?", choices=["s", "n"], default="n") == "s":
+                    mercado.resolver_faltas_estoque(list(faltas))
+            elif escolha == "r":
+                if not repor:
+                    console.print("[green]Nenhum produto precisa de reposição.[/]")
+                for inicio in range(0, len(repor), mercado.ITENS_POR_PAGINA):
+                    self._tabela_estoque(mercado, repor[inicio:inicio + mercado.ITENS_POR_PAGINA],
+                                         f"Reposição ({inicio + 1} a {min(inicio + mercado.ITENS_POR_PAGINA, len(repor))} "
+                                         f"de {len(repor)})")
+                    if inicio + mercado.ITENS_POR_PAGINA < len(repor) and \
+                            Prompt.ask("Ver a próxima página?", choices=["s", "n"], default="s") == "n":
+                        break
+            elif escolha == "m":
+                quantidade = max(IntPrompt.ask("Quantos produtos?", default=10), 1)
+                self._tabela_estoque(mercado, mercado.menores_estoques(quantidade), "Menores estoques")
+            elif escolha == "l":
+                produto_id = mercado.selecionar_produto()
+                if produto_id is None:
+                    continue
+                limite = IntPrompt.ask("Novo limite de reposição (-1 para usar o padrão)",
+                                       default=mercado.limite_estoque(produto_id))
+                try:
+                    mercado.definir_limite_estoque(produto_id, limite if limite >= 0 else None)
+                    console.print(f"[green]Limite de reposição: {mercado.limite_estoque(produto_id)}.[/]")
+                except ValueError as erro:
+                    console.print(f"[red]{erro}[/]")
+            elif escolha == "t":
+                mercado.navegar_produtos()
+            else:
+                return
+
+    @staticmethod
+    def _tabela_estoque(mercado: Mercado, produtos: list, titulo: str):
+        """
+        Exibe o estoque e o limite de reposição de cada produto informado
+        """
+        tabela = Table(title=titulo, show_header=True, header_style="bold magenta")
+        tabela.add_column("ID", style="dim", justify="center")
+        tabela.add_column("Nome")
+        tabela.add_column("Estoque", justify="right")
+        tabela.add_column("Limite", justify="right")
+        for produto in produtos:
+            limite = mercado.limite_estoque(produto.id)
+            cor = "red" if produto.quantidade <= limite else "white"
+            tabela.add_row(str(produto.id), produto.nome, f"[{cor}]{produto.quantidade}[/]", str(limite))
+        Console().print(tabela)
+
     def _verificar_pedidos(self, mercado: Mercado):
         """
         Busca e exibe todos os pedidos do sistema.
@@ -65,29 +151,81 @@ class Admin(Usuario):
         console = Console()
         console.print("\n[bold yellow]----- Todos os Pedidos do Sistema -----[/bold yellow]")
 
-        todos_os_pedidos = mercado.carregar_pedidos()
+        # Limitar o período faz com que apenas as partições desses dias sejam lidas
+        dias = IntPrompt.ask("Exibir os pedidos de quantos dias? (0 para todo o histórico)", default=30)
+        inicio = datetime.now() - timedelta(days=dias) if dias > 0 else None
+
+        exibiu_algum = False
+        for pagina in self._percorrer_paginas(mercado.iterar_pedidos(inicio=inicio)):
+            exibiu_algum = True
+            tabela = Table(show_header=True, header_style="bold magenta")
+            tabela.add_column("ID Pedido", style="dim", justify="center")
+            tabela.add_column("ID Cliente", justify="center")
+            tabela.add_column("Data", justify="center")
+            tabela.add_column("Status", justify="center")
+            tabela.add_column("Total (R$)", justify="right")
+
+            # Os totais da página saem de uma única soma agrupada, sem montar os produtos de cada pedido
+            for pedido, total in zip(pagina, mercado.totais_pedidos(pagina)):
+                status_cor = {"aguardando entrega": "yellow", "entregue": "green"}.get(pedido.status, "white")
+                tabela.add_row(
+                    str(pedido.id),
+                    str(pedido.cliente_id),
+                    pedido.data.strftime("%d/%m/%Y %H:%M"),
+                    f"[{status_cor}]{pedido.status.replace('_', ' ').title()}[/]",
+                    f"{total:.2f}"
+                )
 
-        if not todos_os_pedidos:
+            console.print(tabela)
+
+        if not exibiu_algum:
+            console.print("Nenhum pedido foi realizado no período." if inicio else "Nenhum pedido foi realizado no sistema ainda.")
+
+    def _relatorio_vendas(self, mercado: Mercado):
+        """
+        Exibe o relatório de vendas: pedidos por status, produtos mais vendidos,
+        receita por dia no período e maiores clientes.
+        """
+        console = Console()
+        console.print("\n[bold yellow]----- Relatório de Vendas -----[/bold yellow]")
+
+        dias = IntPrompt.ask("Período do relatório em dias (0 para todo o histórico)", default=30)
+        inicio = (datetime.now() - timedelta(days=dias - 1)).date() if dias > 0 else None
+        relatorio = mercado.relatorio_vendas(inicio=inicio)
+
+        if not relatorio['status']:
             console.print("Nenhum pedido foi realizado no sistema ainda.")
             return
+        console.print("Pedidos por status: " + ", ".join(
+            f"[bold]{status.title()}[/]: {quantidade}" for status, quantidade in relatorio['status'].items()))
 
-        tabela = Table(show_header=True, header_style="bold magenta")
-        tabela.add_column("ID Pedido", style="dim", justify="center")
-        tabela.add_column("ID Cliente", justify="center")
+        tabela = Table(title="Produtos mais vendidos no período", show_header=True, header_style="bold magenta")
+        tabela.add_column("ID", style="dim", justify="center")
+        tabela.add_column("Produto")
+        tabela.add_column("Unidades", justify="right")
+        tabela.add_column("Receita (R$)", justify="right")
+        for produto_id, linha in relatorio['produtos'].iterrows():
+            produto = mercado.buscar_produto(produto_id)
+            tabela.add_row(str(produto_id), produto.nome if produto else "[dim](removido)[/dim]",
+                           f"{linha['unidades']:g}", f"{linha['receita']:.2f}")
+        console.print(tabela)
+
+        tabela = Table(title="Vendas por dia", show_header=True, header_style="bold magenta")
         tabela.add_column("Data", justify="center")
-        tabela.add_column("Status", justify="center")
-        tabela.add_column("Total (R$)", justify="right")
-
-        for pedido in todos_os_pedidos:
-            status_cor = {"aguardando entrega": "yellow", "entregue": "green"}.get(pedido.status, "white")
-            tabela.add_row(
-                str(pedido.id),
-                str(pedido.cliente_id),
-                pedido.data.strftime("%d/%m/%Y %H:%M"),
-                f"[{status_cor}]{pedido.status.replace('_', ' ').title()}[/]",
-                f"{pedido.calcular_total():.2f}"
-            )
-        
+        tabela.add_column("Unidades", justify="right")
+        tabela.add_column("Receita (R$)", justify="right")
+        for data, linha in relatorio['dias'].tail(31).iterrows():
+            tabela.add_row(data.strftime("%d/%m/%Y"), f"{linha['unidades']:g}", f"{linha['receita']:.2f}")
+        tabela.add_row("[bold]Total[/]", f"[bold]{relatorio['dias']['unidades'].sum():g}[/]",
+                       f"[bold]{relatorio['dias']['receita'].sum():.2f}[/]")
+        console.print(tabela)
+
+        tabela = Table(title="Maiores clientes (todo o histórico)", show_header=True, header_style="bold magenta")
+        tabela.add_column("ID Cliente", justify="center")
+        tabela.add_column("Pedidos", justify="right")
+        tabela.add_column("Valor (R$)", justify="right")
+        for cliente_id, linha in relatorio['clientes'].iterrows():
+            tabela.add_row(str(cliente_id), str(int(linha['pedidos'])), f"{linha['valor']:.2f}")
         console.print(tabela)
 
     def _processar_pedido(self, mercado: Mercado):
@@ -97,38 +235,35 @@ class Admin(Usuario):
         console = Console()
         console.print("\n[bold yellow]----- Processar Pedidos Pendentes -----[/bold yellow]")
 
-        # Carrega todos os pedidos e filtra os que estão aguardando entrega
-        todos_os_pedidos = mercado.carregar_pedidos()
-        pedidos_pendentes = [p for p in todos_os_pedidos if p.status == 'aguardando entrega']
+        # Percorre apenas os pedidos aguardando entrega, uma página por vez
+        pedidos_exibidos = {}
+        for pagina in self._percorrer_paginas(mercado.iterar_pedidos(status='aguardando entrega')):
+            tabela = Table(show_header=True, header_style="bold magenta")
+            tabela.add_column("ID Pedido", style="dim", justify="center")
+            tabela.add_column("ID Cliente", justify="center")
+            tabela.add_column("Data", justify="center")
+            tabela.add_column("Total (R$)", justify="right")
+
+            for pedido, total in zip(pagina, mercado.totais_pedidos(pagina)):
+                pedidos_exibidos[str(pedido.id)] = pedido
+                tabela.add_row(
+                    str(pedido.id),
+                    str(pedido.cliente_id),
+                    pedido.data.strftime("%d/%m/%Y %H:%M"),
+                    f"{total:.2f}"
+                )
 
-        if not pedidos_pendentes:
+            console.print(tabela)
+
+        if not pedidos_exibidos:
             console.print("Não há pedidos aguardando entrega no momento.")
             return
 
-        tabela = Table(show_header=True, header_style="bold magenta")
-        tabela.add_column("ID Pedido", style="dim", justify="center")
-        tabela.add_column("ID Cliente", justify="center")
-        tabela.add_column("Data", justify="center")
-        tabela.add_column("Total (R$)", justify="right")
-
-        ids_validos = []
-        for pedido in pedidos_pendentes:
-            ids_validos.append(str(pedido.id))
-            tabela.add_row(
-                str(pedido.id),
-                str(pedido.cliente_id),
-                pedido.data.strftime("%d/%m/%Y %H:%M"),
-                f"{pedido.calcular_total():.2f}"
-            )
-        
-        console.print(tabela)
-
-        id_selecionado_str = Prompt.ask("\n[bold]Digite o ID do pedido que deseja processar[/]", choices=ids_validos)
-        id_selecionado = int(id_selecionado_str)
+        id_selecionado_str = Prompt.ask("\n[bold]Digite o ID do pedido que deseja processar[/]", choices=list(pedidos_exibidos))
 
-        # Encontra o pedido selecionado na lista original para modificar
-        pedido_a_processar = next((p for p in todos_os_pedidos if p.id == id_selecionado), None)
+        # Encontra o pedido selecionado entre os exibidos para modificar
+        pedido_a_processar = pedidos_exibidos.get(id_selecionado_str)
 
         if pedido_a_processar:
             pedido_a_processar.processar_entrega()
-            mercado.salvar_pedidos()
+            mercado.salvar_pedido(pedido_a_processar)
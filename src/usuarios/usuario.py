@@ -1,3 +1,4 @@
+import sys
 from abc import ABC, abstractmethod
 from rich.console import Console
 from rich.prompt import Prompt
@@ -5,6 +6,9 @@ from rich.table import Table
 from mercado.mercado import Mercado
 
 class Usuario:
+
+    __slots__ = ('_id', '_nome', '_endereco', '_telefone', '_email', '_senha', '_tipo')
+
     def __init__(self, id: int, nome: str, endereco: str, telefone: str, email: str, senha: str, tipo: str = 'cliente'):
         """
         Inicializa um usuário
@@ -24,7 +28,7 @@ class Usuario:
         self._telefone = telefone
         self._email = email
         self._senha = senha
-        self._tipo = tipo  
+        self._tipo = sys.intern(tipo)  # Poucos tipos possíveis: todos os usuários compartilham as mesmas strings
 
     # Getters
     @property
@@ -128,28 +132,49 @@ class Usuario:
         console = Console()
         console.print("\n[bold yellow]----- Meus Pedidos -----[/bold yellow]")
 
-        pedidos_do_cliente = mercado.carregar_pedidos(cliente_id=self.id)
-
-        if not pedidos_do_cliente:
+        # Os pedidos são lidos e exibidos uma página por vez
+        paginas = mercado.iterar_pedidos(cliente_id=self.id)
+        exibiu_algum = False
+
+        for pagina in self._percorrer_paginas(paginas):
+            exibiu_algum = True
+            tabela = Table(show_header=True, header_style="bold magenta")
+            tabela.add_column("ID Pedido", style="dim", justify="center")
+            tabela.add_column("Data", justify="center")
+            tabela.add_column("Status", justify="center")
+            tabela.add_column("Nº de Itens", justify="center")
+            tabela.add_column("Total (R$)", justify="right")
+
+            for pedido in pagina:
+                status_cor = {"aguardando entrega": "yellow", "entregue": "green"}.get(pedido.status, "white")
+
+                tabela.add_row(
+                    str(pedido.id),
+                    pedido.data.strftime("%d/%m/%Y %H:%M"),
+                    f"[{status_cor}]{pedido.status.replace('_', ' ').title()}[/]",
+                    str(len(pedido.produtos)),
+                    f"{pedido.calcular_total():.2f}"
+                )
+
+            console.print(tabela)
+
+        if not exibiu_algum:
             console.print("Você ainda não fez nenhum pedido.")
-            return
 
-        tabela = Table(show_header=True, header_style="bold magenta")
-        tabela.add_column("ID Pedido", style="dim", justify="center")
-        tabela.add_column("Data", justify="center")
-        tabela.add_column("Status", justify="center")
-        tabela.add_column("Nº de Itens", justify="center")
-        tabela.add_column("Total (R$)", justify="right")
+    def _percorrer_paginas(self, paginas):
+        """
+        Percorre as páginas de pedidos, perguntando ao usuário se deseja ver a
+        próxima antes de lê-la do banco.
 
-        for pedido in pedidos_do_cliente:
-            status_cor = {"aguardando entrega": "yellow", "entregue": "green"}.get(pedido.status, "white")
-            
-            tabela.add_row(
-                str(pedido.id),
-                pedido.data.strftime("%d/%m/%Y %H:%M"),
-                f"[{status_cor}]{pedido.status.replace('_', ' ').title()}[/]",
-                str(len(pedido.produtos)),
-                f"{pedido.calcular_total():.2f}"
-            )
-        
-        console.print(tabela)
\ No newline at end of file
+        Args:
+            paginas: Iterador de páginas (listas de pedidos).
+        """
+        pagina = next(paginas, None)
+        while pagina is not None:
+            yield pagina
+            # Só lê a próxima página do banco se o usuário pedir
+            if Prompt.ask("\n[bold]Exibir mais pedidos?[/]", choices=["s", "n"], default="s") == "n":
+                return
+            pagina = next(paginas, None)
+            if pagina is None:
+                Console().print("Não há mais pedidos.")
\ No newline at end of file